@@ -1,22 +1,71 @@
 import threading
-from pynput import mouse, keyboard
-from typing import Callable
+from array import array
+from typing import Callable, Optional
+
+from .clock import Clock, get_default_clock
 
 class ActivityTracker:
     """
     Tracks keyboard and mouse activity to determine if the user is active.
+
+    Input events are coalesced: every event only stores the time of the
+    last activity and bumps a counter, which consumers read when they need
+    it (see ``get_last_activity_time``). ``on_activity`` is called only on
+    the idle -> active edge, i.e. for the first event after at least
+    ``idle_gap`` seconds without input.
+
+    The listener callbacks do not take locks. Attribute writes are atomic
+    and each counter has a single writer thread (mouse or keyboard
+    listener), so readers may at worst see a value one event old.
+
+    Input intensity is also accumulated into per-minute buckets: a fixed
+    ring of ``bucket_count`` wall-clock minutes backed by preallocated
+    arrays, so recording an event is an index computation and an in-place
+    increment. ``drain_minute_buckets()`` hands completed minutes over for
+    bulk storage and must run more often than the ring wraps around.
+    Events racing a minute rollover on the other listener thread may be
+    attributed to the neighbouring minute.
+
+    pynput is imported by ``start()``, so the tracker can be created (and
+    fed events directly) where no input listener or display is available.
     """
-    def __init__(self, on_activity: Callable = None):
+    def __init__(
+        self,
+        on_activity: Callable = None,
+        clock: Optional[Clock] = None,
+        idle_gap: float = 1.0,
+        bucket_count: int = 120
+    ):
         self.on_activity = on_activity
+        self.clock = clock or get_default_clock()
+        self.idle_gap = idle_gap
         self.mouse_listener = None
         self.keyboard_listener = None
         self.is_running = False
         
+        self.last_activity_time = self.clock.now()
+        self.mouse_moves = 0
+        self.mouse_clicks = 0
+        self.mouse_scrolls = 0
+        self.key_presses = 0
+        self.activity_edges = 0  # Number of on_activity callbacks fired
+        
+        # Per-minute ring buffer; slot = minute % bucket_count, -1 marks an empty slot
+        self.bucket_count = bucket_count
+        self._bucket_minute = array('q', [-1]) * bucket_count
+        self._bucket_keys = array('L', [0]) * bucket_count
+        self._bucket_clicks = array('L', [0]) * bucket_count
+        self._bucket_scrolls = array('L', [0]) * bucket_count
+        self._bucket_moves = array('L', [0]) * bucket_count
+        
     def start(self):
         """Start tracking user activity."""
         if self.is_running:
             return
             
+        # Imported here because pynput needs a display as soon as it loads
+        from pynput import mouse, keyboard
+        
         self.is_running = True
         
         # Start mouse listener in a separate thread
@@ -48,25 +97,97 @@ class ActivityTracker:
             self.keyboard_listener.stop()
             self.keyboard_listener = None
     
+    def get_last_activity_time(self):
+        """Get the clock time of the most recent input event."""
+        return self.last_activity_time
+    
+    def get_counters(self):
+        """Get the number of input events seen since start-up."""
+        return {
+            "mouse_moves": self.mouse_moves,
+            "mouse_clicks": self.mouse_clicks,
+            "mouse_scrolls": self.mouse_scrolls,
+            "key_presses": self.key_presses,
+            "activity_edges": self.activity_edges
+        }
+    
+    def drain_minute_buckets(self):
+        """Remove and return the completed minutes that saw any input.
+        
+        Returns a list of (minute_start_timestamp, key_presses, mouse_clicks,
+        mouse_scrolls, mouse_moves) tuples ordered by time. The current
+        minute is left in place because it is still being filled.
+        """
+        current_minute = int(self.clock.wall_time() // 60)
+        rows = []
+        for slot in range(self.bucket_count):
+            minute = self._bucket_minute[slot]
+            if minute < 0 or minute >= current_minute:
+                continue
+            rows.append((
+                minute * 60,
+                self._bucket_keys[slot],
+                self._bucket_clicks[slot],
+                self._bucket_scrolls[slot],
+                self._bucket_moves[slot]
+            ))
+            self._clear_bucket(slot, -1)
+        rows.sort()
+        return rows
+    
+    def _clear_bucket(self, slot, minute):
+        """Reset a ring slot so that it starts counting the given minute."""
+        self._bucket_keys[slot] = 0
+        self._bucket_clicks[slot] = 0
+        self._bucket_scrolls[slot] = 0
+        self._bucket_moves[slot] = 0
+        self._bucket_minute[slot] = minute
+    
+    def _bucket_slot(self):
+        """Return the ring slot of the current minute, rolling it over if needed."""
+        minute = int(self.clock.wall_time() // 60)
+        slot = minute % self.bucket_count
+        if self._bucket_minute[slot] != minute:
+            self._clear_bucket(slot, minute)
+        return slot
+    
+    def _record_activity(self):
+        """Store the activity timestamp and fire on_activity on the idle -> active edge."""
+        now = self.clock.now()
+        previous = self.last_activity_time
+        self.last_activity_time = now
+        
+        if now - previous >= self.idle_gap and self.on_activity:
+            self.activity_edges += 1
+            self.on_activity()
+    
     def _on_mouse_move(self, x, y):
         """Callback for mouse movement."""
-        if self.is_running and self.on_activity:
-            self.on_activity()
+        if self.is_running:
+            self.mouse_moves += 1
+            self._bucket_moves[self._bucket_slot()] += 1
+            self._record_activity()
     
     def _on_mouse_click(self, x, y, button, pressed):
         """Callback for mouse clicks."""
-        if self.is_running and pressed and self.on_activity:
-            self.on_activity()
+        if self.is_running and pressed:
+            self.mouse_clicks += 1
+            self._bucket_clicks[self._bucket_slot()] += 1
+            self._record_activity()
     
     def _on_mouse_scroll(self, x, y, dx, dy):
         """Callback for mouse scrolling."""
-        if self.is_running and self.on_activity:
-            self.on_activity()
+        if self.is_running:
+            self.mouse_scrolls += 1
+            self._bucket_scrolls[self._bucket_slot()] += 1
+            self._record_activity()
     
     def _on_key_press(self, key):
         """Callback for keyboard key press."""
-        if self.is_running and self.on_activity:
-            self.on_activity()
+        if self.is_running:
+            self.key_presses += 1
+            self._bucket_keys[self._bucket_slot()] += 1
+            self._record_activity()
     
     def _on_key_release(self, key):
         """Callback for keyboard key release."""
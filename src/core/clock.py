@@ -0,0 +1,145 @@
+import time
+import datetime
+import threading
+from typing import Optional
+
+
+class Clock:
+    """
+    Source of time for the timer, the monitors and the app controller.
+
+    ``now()`` is a monotonic reading used for all durations and deadlines,
+    ``wall_time()`` is used for timestamps that end up in the database.
+    """
+    is_virtual = False
+
+    def now(self) -> float:
+        """Return a monotonic timestamp in seconds."""
+        raise NotImplementedError
+
+    def wall_time(self) -> float:
+        """Return the current wall-clock time as a Unix timestamp."""
+        raise NotImplementedError
+
+    def datetime_now(self) -> datetime.datetime:
+        """Return the current local wall-clock time as a datetime."""
+        return datetime.datetime.fromtimestamp(self.wall_time())
+
+    def wait(self, condition: threading.Condition, timeout: Optional[float] = None):
+        """Wait on a held condition for at most ``timeout`` seconds."""
+        raise NotImplementedError
+
+    def sleep(self, seconds: float):
+        """Block for the given number of seconds."""
+        raise NotImplementedError
+
+
+class MonotonicClock(Clock):
+    """Real clock used in production."""
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    def wall_time(self) -> float:
+        return time.time()
+
+    def datetime_now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def wait(self, condition: threading.Condition, timeout: Optional[float] = None):
+        condition.wait(timeout)
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Simulated clock for replaying scenarios without waiting.
+
+    Components that would normally run their own thread register themselves
+    as participants instead. A participant provides ``next_deadline()``
+    (a time on this clock, or None) and ``run_due(now)``. ``advance()`` then
+    jumps from deadline to deadline on the caller's thread, so a full workday
+    of breaks runs in milliseconds:
+
+        clock = VirtualClock()
+        timer = EyeCareTimer(clock=clock, on_break_start=...)
+        timer.start()
+        clock.advance(8 * 3600)
+    """
+    is_virtual = True
+
+    # Guard against participants that never move their deadline forward
+    max_steps_per_advance = 1_000_000
+
+    def __init__(self, start: float = 0.0, wall_start: Optional[float] = None):
+        self._now = start
+        self._wall_offset = (time.time() if wall_start is None else wall_start) - start
+        self._participants = []
+        self._lock = threading.RLock()
+
+    def now(self) -> float:
+        return self._now
+
+    def wall_time(self) -> float:
+        return self._now + self._wall_offset
+
+    def wait(self, condition: threading.Condition, timeout: Optional[float] = None):
+        # Nothing runs on its own in virtual time; waiting returns immediately
+        # and the caller re-checks its state.
+        return
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def register(self, participant):
+        """Add a component whose deadlines are driven by this clock."""
+        with self._lock:
+            if participant not in self._participants:
+                self._participants.append(participant)
+
+    def unregister(self, participant):
+        """Remove a previously registered component."""
+        with self._lock:
+            if participant in self._participants:
+                self._participants.remove(participant)
+
+    def _next_due(self, target):
+        """Return (deadline, participant) for the earliest deadline <= target."""
+        best = None
+        for participant in list(self._participants):
+            deadline = participant.next_deadline()
+            if deadline is None or deadline > target:
+                continue
+            if best is None or deadline < best[0]:
+                best = (deadline, participant)
+        return best
+
+    def advance(self, seconds: float):
+        """Move time forward, running every deadline that falls in between."""
+        self.advance_to(self._now + seconds)
+
+    def advance_to(self, target: float):
+        """Move time forward to ``target``, running due deadlines in order."""
+        with self._lock:
+            steps = 0
+            while True:
+                due = self._next_due(target)
+                if due is None:
+                    break
+                deadline, participant = due
+                self._now = max(self._now, deadline)
+                participant.run_due(self._now)
+                steps += 1
+                if steps > self.max_steps_per_advance:
+                    raise RuntimeError("Virtual clock made no progress; a deadline is not advancing")
+            self._now = max(self._now, target)
+
+
+def get_default_clock() -> Clock:
+    """Return the shared real clock."""
+    return _DEFAULT_CLOCK
+
+
+_DEFAULT_CLOCK = MonotonicClock()
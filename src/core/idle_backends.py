@@ -0,0 +1,289 @@
+import os
+import time
+import ctypes
+import select
+import socket
+import threading
+import ctypes.util
+from typing import Callable, Optional
+
+from .clock import Clock, get_default_clock
+
+try:
+    from jeepney import DBusAddress, MatchRule, Properties, new_method_call
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+except ImportError:
+    open_dbus_connection = None
+
+# Consider the system idle after this many seconds without input
+DEFAULT_IDLE_THRESHOLD = 300
+
+
+class IdleBackend:
+    """
+    Source of the "system is idle or locked" state used by SystemMonitor.
+
+    Backends with ``supports_signals`` can block in ``wait_for_change()``
+    until the state may have changed, so the monitor does not need to poll.
+    ``interrupt()`` ends such a wait early from another thread; ``close()``
+    is only called once nothing waits any more.
+    """
+    name = "base"
+    supports_signals = False
+
+    def is_idle(self) -> bool:
+        """Return True while the session is locked or idle."""
+        raise NotImplementedError
+
+    def wait_for_change(self, timeout: Optional[float]) -> bool:
+        """Block until the state may have changed; return False on timeout or interrupt."""
+        return False
+
+    def interrupt(self):
+        """Make a pending (and any later) ``wait_for_change()`` return."""
+        pass
+
+    def close(self):
+        """Release any resources held by the backend."""
+        pass
+
+
+class LogindBackend(IdleBackend):
+    """
+    Reads ``LockedHint`` and ``IdleHint`` of the current logind session over
+    D-Bus and listens for their ``PropertiesChanged`` signals.
+
+    ``bus`` is passed to jeepney's ``open_dbus_connection``: "SYSTEM" for
+    the real logind, or "SESSION"/a bus address to talk to a stand-in
+    service implementing the same interface.
+
+    The signal wait selects on the D-Bus socket together with one end of
+    a socket pair; ``interrupt()`` writes to the other end, which wakes
+    the wait at once.
+    """
+    name = "logind"
+    supports_signals = True
+
+    LOGIN1 = "org.freedesktop.login1"
+    SESSION_INTERFACE = "org.freedesktop.login1.Session"
+
+    def __init__(self, bus: str = "SYSTEM", session_id: str = "auto"):
+        if open_dbus_connection is None:
+            raise RuntimeError("jeepney is not installed")
+
+        self._interrupted = threading.Event()
+        self._wakeup_reader, self._wakeup_writer = socket.socketpair()
+        self._wakeup_writer.setblocking(False)
+        try:
+            self.conn = open_dbus_connection(bus=bus)
+        except Exception:
+            self._close_wakeup()
+            raise
+        try:
+            self.session_path = self._resolve_session_path(session_id)
+            self.session = DBusAddress(
+                self.session_path,
+                bus_name=self.LOGIN1,
+                interface=self.SESSION_INTERFACE
+            )
+
+            rule = MatchRule(
+                type="signal",
+                interface="org.freedesktop.DBus.Properties",
+                member="PropertiesChanged",
+                path=self.session_path
+            )
+            self.conn.send_and_get_reply(message_bus.AddMatch(rule))
+            self._signals = self.conn.filter(rule, bufsize=16)
+            # Fail early if the session does not expose the hints
+            self.is_idle()
+        except Exception:
+            self.conn.close()
+            self._close_wakeup()
+            raise
+
+    def _resolve_session_path(self, session_id):
+        """Turn a session id (or "auto") into its object path.
+
+        Signals are emitted on the real session path, not on the "auto" alias.
+        """
+        manager = DBusAddress(
+            "/org/freedesktop/login1",
+            bus_name=self.LOGIN1,
+            interface="org.freedesktop.login1.Manager"
+        )
+        if session_id == "auto":
+            auto = DBusAddress(
+                "/org/freedesktop/login1/session/auto",
+                bus_name=self.LOGIN1,
+                interface=self.SESSION_INTERFACE
+            )
+            reply = self.conn.send_and_get_reply(Properties(auto).get("Id"))
+            session_id = reply.body[0][1]
+        reply = self.conn.send_and_get_reply(new_method_call(manager, "GetSession", "s", (session_id,)))
+        return reply.body[0]
+
+    def _get_bool(self, name):
+        reply = self.conn.send_and_get_reply(Properties(self.session).get(name))
+        return bool(reply.body[0][1])
+
+    def is_idle(self) -> bool:
+        return self._get_bool("LockedHint") or self._get_bool("IdleHint")
+
+    def wait_for_change(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Take in what has arrived already, without blocking
+            try:
+                while not self._signals.queue:
+                    self.conn.recv_messages(timeout=0)
+            except TimeoutError:
+                pass
+            if self._signals.queue:
+                self._signals.queue.clear()
+                return True
+            if self._interrupted.is_set():
+                return False
+
+            wait = None
+            if deadline is not None:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    return False
+            readable, _, _ = select.select([self.conn.sock, self._wakeup_reader], [], [], wait)
+            if self._wakeup_reader in readable or not readable:
+                return False
+
+    def interrupt(self):
+        self._interrupted.set()
+        try:
+            self._wakeup_writer.send(b"\0")
+        except OSError:
+            pass  # Already woken, or closed
+
+    def _close_wakeup(self):
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+
+    def close(self):
+        try:
+            self._signals.close()
+        finally:
+            self.conn.close()
+            self._close_wakeup()
+
+
+class _XScreenSaverInfo(ctypes.Structure):
+    _fields_ = [
+        ("window", ctypes.c_ulong),
+        ("state", ctypes.c_int),
+        ("kind", ctypes.c_int),
+        ("til_or_since", ctypes.c_ulong),
+        ("idle", ctypes.c_ulong),
+        ("eventMask", ctypes.c_ulong)
+    ]
+
+
+class XScreenSaverBackend(IdleBackend):
+    """Uses the X11 screensaver extension: screensaver state and idle counter."""
+    name = "xscreensaver"
+
+    SCREEN_SAVER_ON = 1
+
+    def __init__(self, idle_threshold: float = DEFAULT_IDLE_THRESHOLD):
+        if not os.environ.get("DISPLAY"):
+            raise RuntimeError("No X display")
+
+        xlib_path = ctypes.util.find_library("X11")
+        xss_path = ctypes.util.find_library("Xss")
+        if not xlib_path or not xss_path:
+            raise RuntimeError("libX11/libXss not found")
+
+        self.idle_threshold = idle_threshold
+        self.xlib = ctypes.cdll.LoadLibrary(xlib_path)
+        self.xss = ctypes.cdll.LoadLibrary(xss_path)
+        self.xlib.XOpenDisplay.restype = ctypes.c_void_p
+        self.xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.xlib.XDefaultRootWindow.restype = ctypes.c_ulong
+        self.xlib.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        self.xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.xlib.XFree.argtypes = [ctypes.c_void_p]
+        self.xss.XScreenSaverAllocInfo.restype = ctypes.POINTER(_XScreenSaverInfo)
+        self.xss.XScreenSaverQueryInfo.argtypes = [
+            ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(_XScreenSaverInfo)
+        ]
+
+        self.display = self.xlib.XOpenDisplay(None)
+        if not self.display:
+            raise RuntimeError("Cannot open X display")
+        self.root = self.xlib.XDefaultRootWindow(self.display)
+        self.info = self.xss.XScreenSaverAllocInfo()
+        if not self.xss.XScreenSaverQueryInfo(self.display, self.root, self.info):
+            self.close()
+            raise RuntimeError("XScreenSaver extension not available")
+
+    def get_idle_seconds(self) -> float:
+        """Return the time since the last X input event in seconds."""
+        self.xss.XScreenSaverQueryInfo(self.display, self.root, self.info)
+        return self.info.contents.idle / 1000.0
+
+    def is_idle(self) -> bool:
+        idle_seconds = self.get_idle_seconds()
+        return self.info.contents.state == self.SCREEN_SAVER_ON or idle_seconds >= self.idle_threshold
+
+    def close(self):
+        if self.info:
+            self.xlib.XFree(self.info)
+            self.info = None
+        if self.display:
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+class ActivityFallbackBackend(IdleBackend):
+    """Treats the system as idle when the activity tracker saw no input for a while."""
+    name = "activity"
+
+    def __init__(
+        self,
+        activity_source: Callable[[], float],
+        clock: Optional[Clock] = None,
+        idle_threshold: float = DEFAULT_IDLE_THRESHOLD
+    ):
+        self.activity_source = activity_source
+        self.clock = clock or get_default_clock()
+        self.idle_threshold = idle_threshold
+
+    def is_idle(self) -> bool:
+        return self.clock.now() - self.activity_source() >= self.idle_threshold
+
+
+def select_linux_backend(
+    activity_source: Optional[Callable[[], float]] = None,
+    clock: Optional[Clock] = None,
+    idle_threshold: float = DEFAULT_IDLE_THRESHOLD,
+    bus: str = "SYSTEM",
+    candidates: Optional[list] = None
+) -> Optional[IdleBackend]:
+    """Pick the best available Linux backend: logind, then XScreenSaver, then activity.
+
+    ``candidates`` replaces the factories tried, in order; a factory
+    raises when its backend is unavailable.
+    """
+    if candidates is None:
+        candidates = [
+            lambda: LogindBackend(bus=bus),
+            lambda: XScreenSaverBackend(idle_threshold=idle_threshold),
+        ]
+        if activity_source is not None:
+            candidates.append(lambda: ActivityFallbackBackend(activity_source, clock, idle_threshold))
+
+    for create in candidates:
+        try:
+            backend = create()
+            print(f"Using {backend.name} idle backend")
+            return backend
+        except Exception as e:
+            print(f"[WARNING] Idle backend unavailable: {e}")
+    return None
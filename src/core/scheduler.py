@@ -0,0 +1,444 @@
+import heapq
+import threading
+from typing import Callable, Dict, Optional
+
+from .clock import Clock, get_default_clock
+
+# Kinds of deadlines kept in the shared heap
+DEADLINE_BREAK_DUE = "break_due"
+DEADLINE_BREAK_END = "break_end"
+DEADLINE_INACTIVITY = "inactivity"
+
+
+class ReminderSchedule:
+    """A named work/break cycle run by a ReminderScheduler."""
+    def __init__(
+        self,
+        name: str,
+        work_duration: int,
+        break_duration: int,
+        on_break_start: Optional[Callable] = None,
+        on_break_end: Optional[Callable] = None
+    ):
+        self.name = name
+        self.work_duration = work_duration
+        self.break_duration = break_duration
+        self.on_break_start = on_break_start
+        self.on_break_end = on_break_end
+
+        self.is_in_break = False
+        self.work_start_time = None
+        self.break_start_time = None
+        self.breaks_taken = 0
+        self.generation = 0  # Bumped whenever the schedule's deadlines change
+
+    def next_deadline(self):
+        """Return (when, kind) of this schedule's next deadline."""
+        if self.is_in_break:
+            return self.break_start_time + self.break_duration, DEADLINE_BREAK_END
+        return self.work_start_time + self.work_duration, DEADLINE_BREAK_DUE
+
+
+class ReminderScheduler:
+    """
+    Runs any number of named reminder schedules on a single thread.
+
+    Every schedule (eye breaks, stretching, hydration, ...) has its own
+    durations and callbacks, but they share one deadline heap, one wakeup
+    source and one inactivity model: when the user is inactive or the
+    scheduler is paused, all schedules are frozen together.
+
+    Heap entries carry the schedule's generation, so rescheduling a single
+    schedule just pushes new entries and stale ones are skipped when popped.
+
+    ``activity_source`` works as for EyeCareTimer: it is read only when the
+    inactivity deadline is due.
+
+    Other deadline sources with the virtual clock's hooks
+    (``next_deadline()`` and ``run_due(now)``), such as an EyeCareTimer
+    created with ``scheduler=``, can be ``attach()``-ed so this thread (or
+    the virtual clock, through the scheduler's own hooks) drives them too.
+    They share ``condition``, so their state changes wake the thread.
+    Attached sources only run while the scheduler is running, and they
+    follow its pause state: a source with ``scheduler_paused(manual)`` and
+    ``scheduler_resumed()`` is told about every pause and resume, so the
+    inactivity model and the pause state live here only.
+    """
+    def __init__(
+        self,
+        clock: Optional[Clock] = None,
+        inactivity_threshold: int = 5 * 60,
+        activity_source: Optional[Callable[[], float]] = None
+    ):
+        self.clock = clock or get_default_clock()
+        self.activity_source = activity_source
+        self.inactivity_threshold = inactivity_threshold
+
+        self.schedules: Dict[str, ReminderSchedule] = {}
+        self.is_running = False
+        self.is_paused = False
+        self.pause_time = None
+        self.last_activity_time = self.clock.now()
+        self.scheduler_thread = None
+        self.wakeups = 0
+
+        self._manual_pause = False
+        self._cond = threading.Condition(threading.RLock())
+        self._deadlines = []  # Heap of (when, seq, name, generation, kind)
+        self._deadline_seq = 0
+        self._inactivity_generation = 0
+        self._sources = []  # Attached deadline sources
+
+    @property
+    def condition(self) -> threading.Condition:
+        """The condition the scheduler thread sleeps on."""
+        return self._cond
+
+    @property
+    def is_manually_paused(self) -> bool:
+        """Whether the current pause was requested by the user."""
+        return self._manual_pause
+
+    def attach(self, source):
+        """Drive ``source``'s deadlines from the scheduler thread.
+
+        A source attached while the scheduler is paused is paused as well.
+        """
+        with self._cond:
+            if source not in self._sources:
+                self._sources.append(source)
+                if self.is_running and self.is_paused:
+                    self._notify_source(source, "scheduler_paused", self._manual_pause)
+            self._cond.notify_all()
+
+    def detach(self, source):
+        """Stop driving ``source``."""
+        with self._cond:
+            if source in self._sources:
+                self._sources.remove(source)
+            self._cond.notify_all()
+
+    def set_inactivity_threshold(self, threshold: int):
+        """Change the inactivity threshold and re-arm the inactivity deadline."""
+        with self._cond:
+            self.inactivity_threshold = threshold
+            if self.is_running and not self.is_paused:
+                self._arm_inactivity()
+
+    def add_schedule(
+        self,
+        name: str,
+        work_duration: int,
+        break_duration: int,
+        on_break_start: Optional[Callable] = None,
+        on_break_end: Optional[Callable] = None
+    ) -> ReminderSchedule:
+        """Add (or replace) a named schedule."""
+        schedule = ReminderSchedule(name, work_duration, break_duration, on_break_start, on_break_end)
+        with self._cond:
+            old = self.schedules.get(name)
+            if old is not None:
+                old.generation += 1
+            self.schedules[name] = schedule
+            if self.is_running:
+                schedule.work_start_time = self.pause_time if self.is_paused else self.clock.now()
+                self._arm(schedule)
+        return schedule
+
+    def remove_schedule(self, name: str):
+        """Remove a schedule; its pending deadlines are discarded."""
+        with self._cond:
+            schedule = self.schedules.pop(name, None)
+            if schedule is not None:
+                schedule.generation += 1
+
+    def get_schedule(self, name: str) -> Optional[ReminderSchedule]:
+        """Return the schedule with the given name, if any."""
+        return self.schedules.get(name)
+
+    def update_schedule(self, name: str, work_duration=None, break_duration=None):
+        """Change the durations of a schedule and re-arm its deadline."""
+        with self._cond:
+            schedule = self.schedules[name]
+            if work_duration is not None:
+                schedule.work_duration = work_duration
+            if break_duration is not None:
+                schedule.break_duration = break_duration
+            if self.is_running:
+                self._arm(schedule)
+
+    def start(self):
+        """Start all schedules."""
+        with self._cond:
+            if self.is_running:
+                return
+
+            self.is_running = True
+            self.is_paused = False
+            now = self.clock.now()
+            for schedule in self.schedules.values():
+                schedule.is_in_break = False
+                schedule.work_start_time = now
+                schedule.break_start_time = None
+            self._rebuild()
+        if self.clock.is_virtual:
+            self.clock.register(self)
+            return
+        self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+        self.scheduler_thread.start()
+
+    def stop(self):
+        """Stop all schedules."""
+        with self._cond:
+            self.is_running = False
+            self.is_paused = False
+            self._rebuild()
+        if self.clock.is_virtual:
+            self.clock.unregister(self)
+        if self.scheduler_thread and self.scheduler_thread is not threading.current_thread():
+            self.scheduler_thread.join(timeout=1.0)
+
+    def pause(self):
+        """Freeze every schedule."""
+        self._pause(manual=False)
+
+    def manually_pause(self):
+        """Pause all schedules (user initiated)."""
+        self._pause(manual=True)
+
+    def _pause(self, manual):
+        """Pause, or mark the current pause as manual, and tell the attached sources."""
+        with self._cond:
+            if not self.is_running:
+                return
+            if not self.is_paused:
+                self.is_paused = True
+                self.pause_time = self.clock.now()
+                self._rebuild()
+            elif not manual or self._manual_pause:
+                return
+            self._manual_pause = manual
+            for source in list(self._sources):
+                self._notify_source(source, "scheduler_paused", manual)
+
+    def resume(self):
+        """Resume every schedule, shifting their deadlines by the paused time."""
+        with self._cond:
+            if not self.is_running or not self.is_paused:
+                return
+
+            pause_duration = self.clock.now() - self.pause_time
+            for schedule in self.schedules.values():
+                if schedule.work_start_time is not None:
+                    schedule.work_start_time += pause_duration
+                if schedule.break_start_time is not None:
+                    schedule.break_start_time += pause_duration
+            self.pause_time = None
+            self.is_paused = False
+            self._manual_pause = False
+            self._rebuild()
+            for source in list(self._sources):
+                self._notify_source(source, "scheduler_resumed")
+
+    def resume_from_idle(self):
+        """Resume unless the current pause was requested by the user."""
+        with self._cond:
+            if not self._manual_pause:
+                self.resume()
+
+    @staticmethod
+    def _notify_source(source, hook, *args):
+        """Call an attached source's pause hook, if it has one."""
+        callback = getattr(source, hook, None)
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"Error in scheduled deadline source: {e}")
+
+    def update_activity(self):
+        """Update the shared last activity timestamp."""
+        self.last_activity_time = self.clock.now()
+
+        if self.is_running and self.is_paused and not self._manual_pause:
+            self.resume()
+
+    def end_break(self, name: str):
+        """End the current break of one schedule early."""
+        with self._cond:
+            schedule = self.schedules.get(name)
+            if schedule is None or not schedule.is_in_break:
+                return
+            schedule.is_in_break = False
+            # resume() shifts the start by the paused time, so while paused
+            # the work period starts at the pause
+            schedule.work_start_time = self.pause_time if self.is_paused else self.clock.now()
+            if self.is_running and not self.is_paused:
+                self._arm(schedule)
+        if schedule.on_break_end:
+            schedule.on_break_end()
+
+    def get_remaining_time(self, name: str) -> int:
+        """Get the remaining time until the next break (or break end) of a schedule."""
+        with self._cond:
+            schedule = self.schedules.get(name)
+            if not self.is_running or schedule is None:
+                return 0
+            when, _ = schedule.next_deadline()
+            now = self.pause_time if self.is_paused else self.clock.now()
+            return int(max(0, when - now))
+
+    def _push(self, when, name, generation, kind):
+        """Add a deadline to the heap and wake the scheduler thread."""
+        self._deadline_seq += 1
+        heapq.heappush(self._deadlines, (when, self._deadline_seq, name, generation, kind))
+        self._cond.notify_all()
+
+    def _arm(self, schedule: ReminderSchedule):
+        """Invalidate a schedule's old deadline and push its next one."""
+        schedule.generation += 1
+        when, kind = schedule.next_deadline()
+        self._push(when, schedule.name, schedule.generation, kind)
+
+    def _latest_activity(self):
+        """Return the most recent activity time from all sources."""
+        if self.activity_source is None:
+            return self.last_activity_time
+        return max(self.last_activity_time, self.activity_source())
+
+    def _arm_inactivity(self):
+        """Push the shared inactivity deadline."""
+        self._inactivity_generation += 1
+        self._push(
+            self._latest_activity() + self.inactivity_threshold,
+            None,
+            self._inactivity_generation,
+            DEADLINE_INACTIVITY
+        )
+
+    def _rebuild(self):
+        """Rebuild the whole heap from the current state.
+
+        Must be called with the condition held.
+        """
+        self._deadlines = []
+        if self.is_running and not self.is_paused:
+            for schedule in self.schedules.values():
+                self._arm(schedule)
+            self._arm_inactivity()
+        self._cond.notify_all()
+
+    def _is_current(self, name, generation, kind):
+        """Check whether a popped heap entry is still valid."""
+        if kind == DEADLINE_INACTIVITY:
+            return generation == self._inactivity_generation
+        schedule = self.schedules.get(name)
+        return schedule is not None and schedule.generation == generation
+
+    def _process_due_deadlines(self, now):
+        """Apply every expired deadline and return the callbacks to fire.
+
+        Must be called with the condition held.
+        """
+        callbacks = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, name, generation, kind = heapq.heappop(self._deadlines)
+            if not self._is_current(name, generation, kind):
+                continue
+
+            if kind == DEADLINE_INACTIVITY:
+                if now - self._latest_activity() >= self.inactivity_threshold:
+                    self._pause(manual=False)
+                    return callbacks
+                self._arm_inactivity()
+                continue
+
+            schedule = self.schedules[name]
+            if kind == DEADLINE_BREAK_DUE:
+                schedule.is_in_break = True
+                schedule.break_start_time = now
+                schedule.breaks_taken += 1
+                if schedule.on_break_start:
+                    callbacks.append(schedule.on_break_start)
+            else:
+                schedule.is_in_break = False
+                schedule.work_start_time = now
+                if schedule.on_break_end:
+                    callbacks.append(schedule.on_break_end)
+            self._arm(schedule)
+        return callbacks
+
+    def next_deadline(self):
+        """Return the time of the earliest pending deadline, attached sources included (virtual clock hook)."""
+        with self._cond:
+            while self._deadlines and not self._is_current(*self._deadlines[0][2:]):
+                heapq.heappop(self._deadlines)
+            deadlines = [source.next_deadline() for source in self._sources] if self.is_running else []
+            if self._deadlines:
+                deadlines.append(self._deadlines[0][0])
+            deadlines = [when for when in deadlines if when is not None]
+            return min(deadlines) if deadlines else None
+
+    def run_due(self, now):
+        """Apply due deadlines, then run due attached sources (virtual clock hook)."""
+        with self._cond:
+            callbacks = self._process_due_deadlines(now)
+        for callback in callbacks:
+            callback()
+        with self._cond:
+            source_deadlines = [(source, source.next_deadline()) for source in self._sources] if self.is_running else []
+            due_sources = [
+                source for source, when in source_deadlines
+                if when is not None and when <= now
+            ]
+        for source in due_sources:
+            source.run_due(now)
+
+    def _run_scheduler(self):
+        """Main scheduler loop running in a separate thread."""
+        try:
+            self._cond.acquire()
+            try:
+                while self.is_running:
+                    now = self.clock.now()
+                    callbacks = self._process_due_deadlines(now)
+                    source_deadlines = [(source, source.next_deadline()) for source in self._sources]
+                    due_sources = [
+                        source for source, when in source_deadlines
+                        if when is not None and when <= now
+                    ]
+
+                    if callbacks or due_sources:
+                        # Run callbacks and sources without holding the lock
+                        self._cond.release()
+                        try:
+                            for callback in callbacks:
+                                try:
+                                    callback()
+                                except Exception as e:
+                                    print(f"Error in reminder callback: {e}")
+                            for source in due_sources:
+                                try:
+                                    source.run_due(now)
+                                except Exception as e:
+                                    print(f"Error in scheduled deadline source: {e}")
+                        finally:
+                            self._cond.acquire()
+                        continue
+
+                    if not self.is_running:
+                        break
+
+                    deadlines = [when for _, when in source_deadlines if when is not None]
+                    if self._deadlines:
+                        deadlines.append(self._deadlines[0][0])
+                    timeout = None
+                    if deadlines:
+                        timeout = max(0.0, min(deadlines) - self.clock.now())
+                    self.clock.wait(self._cond, timeout)
+                    self.wakeups += 1
+            finally:
+                self._cond.release()
+        except Exception as e:
+            print(f"Error in scheduler thread: {e}")
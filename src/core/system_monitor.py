@@ -1,22 +1,79 @@
-import threading
 import time
+import threading
 import platform
-import psutil
-from typing import Callable
+from typing import Callable, Optional
 import ctypes
 
+try:
+    import psutil
+except ImportError:
+    psutil = None  # CPU and battery checks are skipped
+
+from .clock import Clock, get_default_clock
+from .idle_backends import DEFAULT_IDLE_THRESHOLD, IdleBackend, select_linux_backend
+
 class SystemMonitor:
     """
     Monitors system state to detect when to pause/resume the timer.
     Checks for lock screen, screensaver, and system sleep states.
+
+    ``idle_probe`` replaces the platform check, which is how simulations
+    feed a scripted idle state in together with a virtual clock.
+
+    ``idle_threshold`` is the time without input, in seconds, after which
+    the backends that measure input (Windows, XScreenSaver, the activity
+    tracker) report the system as idle.
+
+    On Linux an ``IdleBackend`` (logind, XScreenSaver or the activity
+    tracker's last-input time) is chosen when the monitor thread starts,
+    unless one is passed in. Backends that deliver D-Bus signals wake the
+    monitor on change instead of being polled every ``check_interval``.
+
+    Polling is adaptive: ``check_interval`` starts at ``min_check_interval``,
+    doubles after every probe that sees no change up to
+    ``max_check_interval``, drops back to the minimum after a transition
+    and is stretched further while running on battery. ``get_stats()``
+    reports the current interval and what the probes cost.
     """
-    def __init__(self, on_system_idle: Callable = None, on_system_active: Callable = None):
+    # Upper bound for a signal wait, so a missed signal is caught eventually
+    signal_wait_timeout = 60
+    
+    min_check_interval = 2  # seconds
+    max_check_interval = 30  # seconds
+    backoff_factor = 2.0
+    battery_multiplier = 2.0
+    battery_check_interval = 60  # seconds between battery status reads
+
+    def __init__(
+        self,
+        on_system_idle: Callable = None,
+        on_system_active: Callable = None,
+        clock: Optional[Clock] = None,
+        idle_probe: Optional[Callable[[], bool]] = None,
+        backend: Optional[IdleBackend] = None,
+        activity_source: Optional[Callable[[], float]] = None,
+        idle_threshold: float = DEFAULT_IDLE_THRESHOLD
+    ):
         self.on_system_idle = on_system_idle
         self.on_system_active = on_system_active
+        self.clock = clock or get_default_clock()
+        self.idle_probe = idle_probe
+        self.backend = backend
+        self.activity_source = activity_source
+        self.idle_threshold = idle_threshold
         self.is_running = False
         self.monitor_thread = None
         self.system_was_idle = False
-        self.check_interval = 2  # seconds
+        self.check_interval = self.min_check_interval  # current adaptive interval
+        self.on_battery = False
+        self._battery_checked_at = None
+        self._base_interval = self.min_check_interval
+        self._next_check_time = None
+        self.probe_count = 0
+        self.transition_count = 0
+        self.last_probe_seconds = 0.0
+        self._probe_seconds_total = 0.0
+        self._cond = threading.Condition()
         
     def start(self):
         """Start the system monitor."""
@@ -24,14 +81,56 @@ class SystemMonitor:
             return
 
         self.is_running = True
+        self._base_interval = self.min_check_interval
+        self.check_interval = self.min_check_interval
+        try:
+            # Prime the non-blocking CPU sampler used by the fallback probe
+            if psutil is not None:
+                psutil.cpu_percent(interval=None)
+        except Exception:
+            pass
+        if self.clock.is_virtual:
+            self._next_check_time = self.clock.now()
+            self.clock.register(self)
+            return
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
         
     def stop(self):
         """Stop the system monitor."""
-        self.is_running = False
+        with self._cond:
+            self.is_running = False
+            self._cond.notify_all()
+        if self.clock.is_virtual:
+            self.clock.unregister(self)
+        if self.backend:
+            # Ends a pending signal wait
+            self.backend.interrupt()
         if self.monitor_thread:
-            self.monitor_thread.join(timeout=self.check_interval + 1)
+            self.monitor_thread.join(timeout=2.0)
+        if self.backend:
+            if self.monitor_thread and self.monitor_thread.is_alive():
+                print("[WARNING] System monitor did not stop, leaving its idle backend open")
+                return
+            try:
+                self.backend.close()
+            except Exception as e:
+                print(f"Error closing idle backend: {e}")
+
+    def set_idle_threshold(self, idle_threshold):
+        """Change the idle threshold, including the current backend's."""
+        self.idle_threshold = idle_threshold
+        if self.backend is not None and hasattr(self.backend, "idle_threshold"):
+            self.backend.idle_threshold = idle_threshold
+
+    def next_deadline(self):
+        """Return the time of the next check (virtual clock hook)."""
+        return self._next_check_time if self.is_running else None
+
+    def run_due(self, now):
+        """Run one check and schedule the next one (virtual clock hook)."""
+        self._check_once()
+        self._next_check_time = now + self.check_interval
 
     @staticmethod
     def _get_idle_duration():
@@ -50,12 +149,15 @@ class SystemMonitor:
         
     def _is_system_idle(self):
         """Check if the system is currently idle (locked/screensaver/sleep)."""
+        if self.idle_probe is not None:
+            return self.idle_probe()
+
         os_name = platform.system()
 
         if os_name == "Windows":
             try:
                 idle_seconds = self._get_idle_duration()
-                return idle_seconds > 300  # Consider idle after 5 minutes
+                return idle_seconds > self.idle_threshold
             except Exception as e:
                 print(f"[ERROR] Idle check failed on Windows: {e}")
                 return False
@@ -65,35 +167,112 @@ class SystemMonitor:
             return False
 
         elif os_name == "Linux":
-            # Placeholder for Linux implementation
-            return False
+            if self.backend is None:
+                return False
+            return self.backend.is_idle()
 
-        # Fallback method for unknown systems: check CPU usage
+        # Fallback method for unknown systems: check CPU usage since the
+        # previous probe without blocking
+        if psutil is None:
+            return False
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.5)
+            cpu_percent = psutil.cpu_percent(interval=None)
             return cpu_percent < 1.0
         except Exception:
             return False
+    
+    def _update_battery_state(self):
+        """Refresh the cached on-battery flag at most once per battery_check_interval."""
+        now = self.clock.now()
+        if self._battery_checked_at is not None and now - self._battery_checked_at < self.battery_check_interval:
+            return
+        self._battery_checked_at = now
+        if psutil is None:
+            self.on_battery = False
+            return
+        try:
+            battery = psutil.sensors_battery()
+            self.on_battery = battery is not None and not battery.power_plugged
+        except Exception:
+            self.on_battery = False
+    
+    def _adapt_interval(self, changed):
+        """Tighten the polling interval after a transition, back off otherwise."""
+        if changed:
+            self._base_interval = self.min_check_interval
+        else:
+            self._base_interval = min(self._base_interval * self.backoff_factor, self.max_check_interval)
+        
+        self._update_battery_state()
+        interval = self._base_interval
+        if self.on_battery:
+            interval *= self.battery_multiplier
+        self.check_interval = interval
+    
+    def get_stats(self):
+        """Get polling statistics."""
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "signal_driven": bool(self.backend and self.backend.supports_signals),
+            "check_interval": self.check_interval,
+            "on_battery": self.on_battery,
+            "probes": self.probe_count,
+            "transitions": self.transition_count,
+            "last_probe_seconds": self.last_probe_seconds,
+            "avg_probe_seconds": self._probe_seconds_total / self.probe_count if self.probe_count else 0.0
+        }
             
-    def _monitor_loop(self):
-        """Main monitoring loop running in a separate thread."""
-        while self.is_running:
-            try:
-                is_idle_now = self._is_system_idle()
+    def _check_once(self):
+        """Probe the system state once and fire callbacks on transitions."""
+        changed = False
+        try:
+            probe_start = time.perf_counter()
+            is_idle_now = self._is_system_idle()
+            self.last_probe_seconds = time.perf_counter() - probe_start
+            self._probe_seconds_total += self.last_probe_seconds
+            self.probe_count += 1
+            changed = is_idle_now != self.system_was_idle
+            if changed:
+                self.transition_count += 1
 
-                # State transition from active to idle
-                if is_idle_now and not self.system_was_idle:
-                    if self.on_system_idle:
-                        self.on_system_idle()
+            # State transition from active to idle
+            if is_idle_now and not self.system_was_idle:
+                if self.on_system_idle:
+                    self.on_system_idle()
 
-                # State transition from idle to active
-                elif not is_idle_now and self.system_was_idle:
-                    if self.on_system_active:
-                        self.on_system_active()
+            # State transition from idle to active
+            elif not is_idle_now and self.system_was_idle:
+                if self.on_system_active:
+                    self.on_system_active()
 
-                self.system_was_idle = is_idle_now
+            self.system_was_idle = is_idle_now
 
-            except Exception as e:
-                print(f"Error in system monitor: {e}")
+        except Exception as e:
+            print(f"Error in system monitor: {e}")
+        
+        self._adapt_interval(changed)
+
+    def _monitor_loop(self):
+        """Main monitoring loop running in a separate thread."""
+        if self.backend is None and self.idle_probe is None and platform.system() == "Linux":
+            self.backend = select_linux_backend(
+                activity_source=self.activity_source,
+                clock=self.clock,
+                idle_threshold=self.idle_threshold
+            )
+
+        while self.is_running:
+            self._check_once()
+
+            if self.backend and self.backend.supports_signals and self.idle_probe is None:
+                try:
+                    self.backend.wait_for_change(self.signal_wait_timeout)
+                except Exception as e:
+                    if self.is_running:
+                        print(f"Idle backend signal wait failed, polling instead: {e}")
+                        self.backend.supports_signals = False
+                continue
 
-            time.sleep(self.check_interval)
+            with self._cond:
+                if self.is_running:
+                    self.clock.wait(self._cond, self.check_interval)
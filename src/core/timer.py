@@ -1,201 +1,626 @@
-import time
+import heapq
 import threading
 import datetime
+from collections import Counter, deque, namedtuple
 from typing import Callable, Optional
 
+from .clock import Clock, get_default_clock
+
+# Kinds of deadlines the timer thread can sleep until
+DEADLINE_BREAK_DUE = "break_due"
+DEADLINE_BREAK_END = "break_end"
+DEADLINE_INACTIVITY = "inactivity"
+
+# Commands consumed by the timer state machine
+CMD_START = "start"
+CMD_STOP = "stop"
+CMD_PAUSE = "pause"
+CMD_MANUAL_PAUSE = "manual_pause"
+CMD_RESUME = "resume"
+CMD_ACTIVITY = "activity"
+CMD_END_BREAK = "end_break"
+CMD_CONFIGURE = "configure"
+
+# Timer states
+STATUS_STOPPED = "stopped"
+STATUS_WORKING = "working"
+STATUS_PAUSED = "paused"
+STATUS_IN_BREAK = "in_break"
+
+# Immutable view of the timer state, replaced atomically on every transition
+TimerSnapshot = namedtuple('TimerSnapshot', [
+    'status',
+    'is_running',
+    'is_paused',
+    'is_in_break',
+    'manual_pause',
+    'work_start_time',
+    'break_start_time',
+    'pause_time',
+    'breaks_taken',
+    'version'
+])
+
+
+class _Command:
+    """A queued request to change the timer state."""
+    __slots__ = ('name', 'payload', 'posted_at', 'done')
+
+    def __init__(self, name, payload, posted_at, done):
+        self.name = name
+        self.payload = payload
+        self.posted_at = posted_at
+        self.done = done
+
+
 class EyeCareTimer:
     """
     Core timer implementation for the 20-20-20 rule.
     Tracks work sessions and triggers breaks at specified intervals.
+
+    The timer thread keeps a heap of upcoming deadlines (break due, break end,
+    inactivity) and sleeps on a condition variable until the earliest one,
+    so it only wakes when something can actually happen or when a state
+    change (pause, resume, stop, ...) notifies it.
+
+    The timer state is owned by a single state machine. Other threads never
+    change it directly: ``pause()``, ``resume()``, ``end_break()``, ... post
+    commands to a queue that the timer thread applies one at a time, and each
+    transition publishes a new immutable ``TimerSnapshot``. Reading
+    ``is_running``, ``is_paused``, ... or ``snapshot()`` is a single
+    attribute read. Without a running timer thread (before ``start()``, with
+    a virtual clock or a scheduler, or when called from the timer thread
+    itself) commands are applied inline: the posting thread drains the
+    queue itself, under the same condition the deadline processing holds,
+    so commands and deadlines still run one at a time. Attached to a
+    scheduler, as in the application, that is always the case; only a
+    standalone timer has a thread consuming the queue.
+
+    ``activity_source`` optionally returns the time of the latest input
+    event (see ``ActivityTracker.get_last_activity_time``); it is read only
+    when an inactivity deadline is due, so input events never have to call
+    into the timer while the user is active.
+
+    All times come from the injected clock. With a virtual clock no thread
+    is started; the clock drives the deadlines through ``next_deadline()``
+    and ``run_due()``. Given a ``ReminderScheduler`` the timer starts no
+    thread either: it attaches to the scheduler, whose thread (or, with a
+    virtual clock, whose hooks) drive the timer's, and shares its condition
+    so commands wake that thread. An attached timer has no inactivity
+    model of its own: ``pause()``, ``resume()``, ``update_activity()``, ...
+    act on the scheduler, which pauses and resumes every schedule and the
+    timer together.
     """
+    # How long callers wait for the timer thread to apply a command
+    command_timeout = 2.0
+
     def __init__(
-        self, 
+        self,
         work_duration: int = 20 * 60,  # 20 minutes in seconds
         break_duration: int = 20,      # 20 seconds
         on_break_start: Optional[Callable] = None,
-        on_break_end: Optional[Callable] = None
+        on_break_end: Optional[Callable] = None,
+        clock: Optional[Clock] = None,
+        activity_source: Optional[Callable[[], float]] = None,
+        scheduler=None
     ):
+        self.clock = clock or get_default_clock()
+        self.activity_source = activity_source
+        self.scheduler = scheduler
         self.work_duration = work_duration
         self.break_duration = break_duration
         self.on_break_start = on_break_start
         self.on_break_end = on_break_end
-        
-        self.is_running = False
-        self.is_paused = False
-        self.is_in_break = False
+
         self.timer_thread = None
-        self.work_start_time = None
-        self.break_start_time = None
-        self.elapsed_work_time = 0
-        self.pause_time = None
-        self.last_activity_time = time.time()
+        self.last_activity_time = self.clock.now()
         self.inactivity_threshold = 5 * 60  # 5 minutes in seconds
-        self.break_ended_manually = False  # New flag to track manual end
-        self.breaks_taken = 0  # Track number of breaks taken
-    
+        self.wakeups = 0  # Number of times the timer thread woke up
+
+        # State owned by the state machine; only touched with the condition held
+        self._running = False
+        self._paused = False
+        self._in_break = False
+        self._manual_pause = False
+        self._work_start_time = None
+        self._break_start_time = None
+        self._pause_time = None
+        self._breaks_taken = 0
+        self._version = 0
+        self._snapshot = None
+
+        if scheduler is not None:
+            self._cond = scheduler.condition
+        else:
+            self._cond = threading.Condition(threading.RLock())
+        self._commands = deque()
+        self._consumer = None  # Thread currently draining the command queue
+        self._activity_pending = False
+        self._deadlines = []  # Heap of (when, seq, kind)
+        self._deadline_seq = 0
+
+        # Transition metrics
+        self.command_counts = Counter()
+        self.transition_counts = Counter()
+        self._command_latency_total = 0.0
+        self._command_latency_max = 0.0
+        self._commands_applied = 0
+
+        self._publish()
+
+    def snapshot(self) -> TimerSnapshot:
+        """Return the latest published timer state."""
+        return self._snapshot
+
+    @property
+    def is_running(self):
+        return self._snapshot.is_running
+
+    @property
+    def is_paused(self):
+        return self._snapshot.is_paused
+
+    @property
+    def is_in_break(self):
+        return self._snapshot.is_in_break
+
+    @property
+    def is_manually_paused(self):
+        return self._snapshot.manual_pause
+
+    @property
+    def work_start_time(self):
+        return self._snapshot.work_start_time
+
+    @property
+    def break_start_time(self):
+        return self._snapshot.break_start_time
+
+    @property
+    def pause_time(self):
+        return self._snapshot.pause_time
+
+    @property
+    def breaks_taken(self):
+        return self._snapshot.breaks_taken
+
+    def get_transition_stats(self):
+        """Get counters describing the commands and transitions applied so far."""
+        with self._cond:
+            applied = self._commands_applied
+            return {
+                "commands": dict(self.command_counts),
+                "transitions": {
+                    f"{old}->{new}": count for (old, new), count in self.transition_counts.items()
+                },
+                "commands_applied": applied,
+                "avg_command_latency": self._command_latency_total / applied if applied else 0.0,
+                "max_command_latency": self._command_latency_max,
+                "wakeups": self.wakeups
+            }
+
     def start(self):
         """Start the timer."""
         if self.is_running:
             return
-            
-        self.is_running = True
-        self.is_paused = False
-        self.work_start_time = time.time()
+        self._post(CMD_START)
+        if self.scheduler is not None:
+            self.scheduler.attach(self)
+            return
+        if self.clock.is_virtual:
+            self.clock.register(self)
+            return
         self.timer_thread = threading.Thread(target=self._run_timer, daemon=True)
+        with self._cond:
+            self._consumer = self.timer_thread
         self.timer_thread.start()
-        
+
     def pause(self):
         """Pause the timer."""
-        if not self.is_running or self.is_paused:
+        if self.scheduler is not None:
+            self.scheduler.pause()
             return
-            
-        self.is_paused = True
-        self.pause_time = time.time()
-        
+        self._post(CMD_PAUSE)
+
     def resume(self):
         """Resume the timer from a paused state."""
-        if not self.is_running or not self.is_paused:
+        if self.scheduler is not None:
+            self.scheduler.resume()
             return
-            
-        if self.pause_time:
-            pause_duration = time.time() - self.pause_time
-            self.work_start_time += pause_duration
-            self.break_start_time = None if not self.is_in_break else self.break_start_time + pause_duration
-            self.pause_time = None
-            
-        self.is_paused = False
-        
+        self._post(CMD_RESUME)
+
     def stop(self):
         """Stop the timer completely."""
-        self.is_running = False
-        self.is_paused = False
-        self.is_in_break = False
-        self.work_start_time = None
-        self.elapsed_work_time = 0
-        if self.timer_thread:
+        self._post(CMD_STOP)
+        if self.scheduler is not None:
+            self.scheduler.detach(self)
+        elif self.clock.is_virtual:
+            self.clock.unregister(self)
+        if self.timer_thread and self.timer_thread is not threading.current_thread():
             self.timer_thread.join(timeout=1.0)
-        
+
     def update_activity(self):
         """Update the last activity timestamp."""
-        self.last_activity_time = time.time()
-        
-        if self.is_running and self.is_paused and self._is_paused_due_to_inactivity():
-            self.resume()
-    
+        if self.scheduler is not None:
+            self.scheduler.update_activity()
+            return
+
+        # Only a plain attribute write on the hot path: an inactivity deadline
+        # that fires early simply re-arms itself from the new timestamp.
+        self.last_activity_time = self.clock.now()
+
+        snapshot = self._snapshot
+        if snapshot.is_paused and not snapshot.manual_pause and not self._activity_pending:
+            self._activity_pending = True
+            self._post(CMD_ACTIVITY, wait=False)
+
     def manually_pause(self):
         """Pause the timer manually (user initiated)."""
-        self.pause()
-        self._manual_pause = True
-        
-    def _is_paused_due_to_inactivity(self):
-        """Check if the current pause is due to inactivity."""
-        return self.is_paused and not getattr(self, '_manual_pause', False)
-        
-    def _check_inactivity(self):
-        """Check if user has been inactive beyond the threshold."""
-        if time.time() - self.last_activity_time > self.inactivity_threshold:
-            if self.is_running and not self.is_paused:
-                self.pause()
-                if hasattr(self, '_manual_pause'):
-                    self._manual_pause = False
+        if self.scheduler is not None:
+            self.scheduler.manually_pause()
+            return
+        self._post(CMD_MANUAL_PAUSE)
+
+    def resume_from_idle(self):
+        """Resume unless the current pause was requested by the user."""
+        if self.scheduler is not None:
+            self.scheduler.resume_from_idle()
+            return
+        self._post(CMD_ACTIVITY)
+
+    def scheduler_paused(self, manual):
+        """Follow a pause of the scheduler this timer is attached to."""
+        self._post(CMD_MANUAL_PAUSE if manual else CMD_PAUSE)
+
+    def scheduler_resumed(self):
+        """Follow the scheduler this timer is attached to out of a pause."""
+        self._post(CMD_RESUME)
+
+    def update_durations(self, work_duration=None, break_duration=None, inactivity_threshold=None):
+        """Change the timer durations and re-arm the pending deadlines."""
+        self._post(CMD_CONFIGURE, {
+            "work_duration": work_duration,
+            "break_duration": break_duration,
+            "inactivity_threshold": inactivity_threshold
+        })
+
+    def end_break(self, notify=True):
+        """End the break and resume work cycle.
+
+        ``notify=False`` is used by callers that already handle the break end
+        themselves and only need the timer to leave the break state.
+        """
+        print("Ending break in timer")
+        self._post(CMD_END_BREAK, notify)
+
+    def _post(self, name, payload=None, wait=True):
+        """Queue a command for the state machine.
+
+        Blocks until the command has been applied unless ``wait`` is False.
+        """
+        done = threading.Event() if wait else None
+        command = _Command(name, payload, self.clock.now(), done)
+        callbacks = []
+        with self._cond:
+            self._commands.append(command)
+            consumer = self._consumer
+            if consumer is None or consumer is threading.current_thread():
+                # Nobody else is consuming: apply it right here
+                callbacks = self._drain_commands(self.clock.now())
+                done = None
+            else:
+                self._cond.notify_all()
+
+        self._fire(callbacks)
+        if done is not None:
+            done.wait(self.command_timeout)
+
+    def _status(self):
+        """Return the current status. Must be called with the condition held."""
+        if not self._running:
+            return STATUS_STOPPED
+        if self._in_break:
+            return STATUS_IN_BREAK
+        if self._paused:
+            return STATUS_PAUSED
+        return STATUS_WORKING
+
+    def _publish(self):
+        """Publish a new snapshot. Must be called with the condition held."""
+        self._version += 1
+        self._snapshot = TimerSnapshot(
+            status=self._status(),
+            is_running=self._running,
+            is_paused=self._paused,
+            is_in_break=self._in_break,
+            manual_pause=self._manual_pause,
+            work_start_time=self._work_start_time,
+            break_start_time=self._break_start_time,
+            pause_time=self._pause_time,
+            breaks_taken=self._breaks_taken,
+            version=self._version
+        )
+
+    def _drain_commands(self, now):
+        """Apply every queued command and return the callbacks to fire.
+
+        Must be called with the condition held.
+        """
+        callbacks = []
+        while self._commands:
+            command = self._commands.popleft()
+            old_status = self._status()
+            try:
+                self._apply_command(command, now, callbacks)
+            except Exception as e:
+                print(f"Error applying timer command {command.name}: {e}")
+            new_status = self._status()
+
+            latency = now - command.posted_at
+            self.command_counts[command.name] += 1
+            self._commands_applied += 1
+            self._command_latency_total += latency
+            self._command_latency_max = max(self._command_latency_max, latency)
+            if new_status != old_status:
+                self.transition_counts[(old_status, new_status)] += 1
+
+            self._reschedule()
+            self._publish()
+            if command.done is not None:
+                command.done.set()
+        return callbacks
+
+    def _apply_command(self, command, now, callbacks):
+        """Apply a single command to the state. Must be called with the condition held."""
+        name = command.name
+
+        if name == CMD_START:
+            if self._running:
+                return
+            self._running = True
+            self._paused = False
+            self._manual_pause = False
+            self._in_break = False
+            self._work_start_time = now
+            self._break_start_time = None
+            self._pause_time = None
+
+        elif name == CMD_STOP:
+            self._running = False
+            self._paused = False
+            self._manual_pause = False
+            self._in_break = False
+            self._work_start_time = None
+            self._break_start_time = None
+            self._pause_time = None
+
+        elif name in (CMD_PAUSE, CMD_MANUAL_PAUSE):
+            if not self._running:
+                return
+            if not self._paused:
+                self._paused = True
+                self._pause_time = now
+            if name == CMD_MANUAL_PAUSE:
+                self._manual_pause = True
+
+        elif name == CMD_RESUME:
+            self._resume(now)
+
+        elif name == CMD_ACTIVITY:
+            self._activity_pending = False
+            # Only pauses caused by inactivity or an idle system end on activity
+            if not self._manual_pause:
+                self._resume(now)
+
+        elif name == CMD_END_BREAK:
+            if not self._in_break:
+                print("Not in break, ignoring end_break call")
+                return
+            self._in_break = False
+            self._work_start_time = now
+            if command.payload and self.on_break_end:
+                callbacks.append(self.on_break_end)
+
+        elif name == CMD_CONFIGURE:
+            for key, value in command.payload.items():
+                if value is not None:
+                    setattr(self, key, value)
+
+    def _resume(self, now):
+        """Leave the paused state, shifting the cycle by the paused time."""
+        if not self._running or not self._paused:
+            return
+        if self._pause_time is not None:
+            pause_duration = now - self._pause_time
+            self._work_start_time += pause_duration
+            if self._in_break and self._break_start_time is not None:
+                self._break_start_time += pause_duration
+            else:
+                self._break_start_time = None
+        self._pause_time = None
+        self._paused = False
+        self._manual_pause = False
+
+    def _latest_activity(self):
+        """Return the most recent activity time from all sources."""
+        if self.activity_source is None:
+            return self.last_activity_time
+        return max(self.last_activity_time, self.activity_source())
+
+    def _check_inactivity(self, now):
+        """Pause if the user has been inactive beyond the threshold.
+
+        Must be called with the condition held.
+        """
+        if now - self._latest_activity() >= self.inactivity_threshold:
+            if self._running and not self._paused:
+                self._paused = True
+                self._pause_time = now
+                self._manual_pause = False
                 return True
         return False
-    
+
+    def _process_due_deadlines(self, now):
+        """Apply every deadline that has expired and return the callbacks to fire.
+
+        Must be called with the condition held.
+        """
+        callbacks = []
+        if not self._deadlines or self._deadlines[0][0] > now:
+            return callbacks
+
+        due_kinds = set()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, kind = heapq.heappop(self._deadlines)
+            due_kinds.add(kind)
+
+        old_status = self._status()
+        if DEADLINE_INACTIVITY in due_kinds and self._check_inactivity(now):
+            # Paused: the remaining deadlines are frozen until resume
+            pass
+        elif DEADLINE_BREAK_DUE in due_kinds and not self._in_break:
+            self._in_break = True
+            self._break_start_time = now
+            self._breaks_taken += 1  # Increment break counter
+            if self.on_break_start:
+                callbacks.append(self.on_break_start)
+        elif DEADLINE_BREAK_END in due_kinds and self._in_break:
+            self._in_break = False
+            self._work_start_time = now
+            if self.on_break_end:
+                callbacks.append(self.on_break_end)  # Let notification handle the rest
+
+        new_status = self._status()
+        if new_status != old_status:
+            self.transition_counts[(old_status, new_status)] += 1
+        self._reschedule()
+        self._publish()
+        return callbacks
+
+    def _push_deadline(self, when, kind):
+        """Add a deadline to the heap."""
+        self._deadline_seq += 1
+        heapq.heappush(self._deadlines, (when, self._deadline_seq, kind))
+
+    def _reschedule(self):
+        """Rebuild the deadline heap from the current state and wake the timer thread.
+
+        Must be called with the condition held.
+        """
+        self._deadlines = []
+        if self._running and not self._paused:
+            if self._in_break:
+                if self._break_start_time is not None:
+                    self._push_deadline(self._break_start_time + self.break_duration, DEADLINE_BREAK_END)
+            elif self._work_start_time is not None:
+                self._push_deadline(self._work_start_time + self.work_duration, DEADLINE_BREAK_DUE)
+            if self.scheduler is None:
+                # An attached timer is paused by the scheduler's inactivity deadline
+                self._push_deadline(self._latest_activity() + self.inactivity_threshold, DEADLINE_INACTIVITY)
+        self._cond.notify_all()
+
+    def next_deadline(self):
+        """Return the time of the earliest pending deadline (virtual clock hook)."""
+        with self._cond:
+            return self._deadlines[0][0] if self._deadlines else None
+
+    def run_due(self, now):
+        """Apply due deadlines and fire their callbacks (virtual clock hook)."""
+        with self._cond:
+            callbacks = self._process_due_deadlines(now)
+        self._fire(callbacks)
+
+    def _fire(self, callbacks):
+        """Run callbacks outside the lock."""
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in timer callback: {e}")
+
+    def _run_timer(self):
+        """Main timer loop running in a separate thread."""
+        try:
+            self._cond.acquire()
+            try:
+                while True:
+                    now = self.clock.now()
+                    callbacks = self._drain_commands(now)
+                    callbacks += self._process_due_deadlines(now)
+
+                    if callbacks:
+                        # Run callbacks without holding the lock so that other
+                        # threads (and the callbacks themselves) can post commands
+                        self._cond.release()
+                        try:
+                            self._fire(callbacks)
+                        finally:
+                            self._cond.acquire()
+                        continue
+
+                    if not self._running:
+                        break
+
+                    if self._commands:
+                        continue
+
+                    # Sleep until the next deadline, or indefinitely while paused
+                    timeout = None
+                    if self._deadlines:
+                        timeout = max(0.0, self._deadlines[0][0] - self.clock.now())
+                    self.clock.wait(self._cond, timeout)
+                    self.wakeups += 1
+            finally:
+                # Later commands are applied inline by their callers
+                if self._consumer is threading.current_thread():
+                    self._consumer = None
+                self._cond.release()
+        except Exception as e:
+            print(f"Error in timer thread: {e}")
+
     def get_remaining_work_time(self):
         """Get the remaining time until the next break."""
-        if not self.is_running or self.is_in_break:
+        state = self._snapshot
+        if not state.is_running or state.is_in_break:
             return 0
-            
-        if self.is_paused:
-            elapsed = self.pause_time - self.work_start_time
+
+        if state.is_paused:
+            elapsed = state.pause_time - state.work_start_time
         else:
-            elapsed = time.time() - self.work_start_time
-            
+            elapsed = self.clock.now() - state.work_start_time
+
         remaining = max(0, self.work_duration - elapsed)
         return int(remaining)
-    
+
     def get_remaining_break_time(self):
         """Get the remaining time in the current break."""
-        if not self.is_running or not self.is_in_break or not self.break_start_time:
+        state = self._snapshot
+        if not state.is_running or not state.is_in_break or state.break_start_time is None:
             return 0
-            
-        if self.is_paused:
-            elapsed = self.pause_time - self.break_start_time
+
+        if state.is_paused:
+            elapsed = state.pause_time - state.break_start_time
         else:
-            elapsed = time.time() - self.break_start_time
-            
+            elapsed = self.clock.now() - state.break_start_time
+
         remaining = max(0, self.break_duration - elapsed)
         return int(remaining)
-    
-    def _run_timer(self):
-        """Main timer loop running in a separate thread."""
-        try:
-            while self.is_running:
-                if self.is_paused:
-                    time.sleep(1)
-                    continue
-                    
-                self._check_inactivity()
-                
-                current_time = time.time()
-                
-                if not self.is_in_break:
-                    if self.work_start_time and current_time - self.work_start_time >= self.work_duration:
-                        self.is_in_break = True
-                        self.break_start_time = current_time
-                        self.breaks_taken += 1  # Increment break counter
-                        if self.on_break_start:
-                            self.on_break_start()
-                else:
-                    if self.break_start_time and current_time - self.break_start_time >= self.break_duration:
-                        if not self.break_ended_manually:  # Only trigger if not ended manually
-                            self.is_in_break = False
-                            self.work_start_time = current_time
-                            if self.on_break_end:
-                                self.on_break_end()  # Let notification handle the rest
-                        self.break_ended_manually = False  # Reset flag
-                
-                time.sleep(0.5)
-        except Exception as e:
-            print(f"Error in timer thread: {e}")
-    
-    def end_break(self):
-        """End the break and resume work cycle."""
-        print("Ending break in timer")
-        if not self.is_in_break:
-            print("Not in break, ignoring end_break call")
-            return
-            
-        self.is_in_break = False
-        self.break_ended_manually = True  # Mark as manually ended
-        self.work_start_time = time.time()
-        
-        # Call on_break_end callback if provided
-        if self.on_break_end:
-            try:
-                self.on_break_end()
-            except Exception as e:
-                print(f"Error in break end callback: {e}")
-        
+
     def get_session_stats(self):
         """Get statistics about the current session."""
-        if not self.work_start_time:
+        state = self._snapshot
+        if state.work_start_time is None:
             return {
                 "session_duration": 0,
                 "breaks_taken": 0,
                 "current_status": "stopped"
             }
-        
-        current_time = time.time() if not self.is_paused else self.pause_time
-        if self.work_start_time:
-            total_duration = current_time - self.work_start_time
-        else:
-            total_duration = 0
-        
-        status = "in_break" if self.is_in_break else "paused" if self.is_paused else "working"
-        
+
+        current_time = self.clock.now() if not state.is_paused else state.pause_time
+        total_duration = current_time - state.work_start_time
+
         return {
             "session_duration": int(total_duration),
-            "breaks_taken": self.breaks_taken,
-            "current_status": status
-        }
\ No newline at end of file
+            "breaks_taken": state.breaks_taken,
+            "current_status": state.status
+        }
@@ -1,102 +1,406 @@
 import os
+import time
+import datetime
 import sqlite3
+import weakref
 import threading
+from collections import deque
 from pathlib import Path
 
+from .migrations import BackgroundMigrator, migrate, rebuild_daily_stats
+from .models import Settings
+
+
+class _ConnectionHolder:
+    """A thread's read connection, held in thread-local storage."""
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
 class Database:
-    """SQLite database manager for the eye care application."""
+    """SQLite database manager for the eye care application.
+    
+    Writes are write-behind: the write methods only append to an in-memory
+    journal and return. A dedicated writer thread with its own connection
+    applies the journal in FIFO order, batched into one transaction every
+    ``flush_interval`` seconds or as soon as ``batch_size`` writes are
+    waiting. ``flush()`` blocks until everything queued so far is
+    committed; ``close()`` flushes before shutting down.
+    
+    Row ids for new sessions and breaks are allocated up front so callers
+    get them back immediately. Commit listeners are called on the writer
+    thread after every committed batch, so in-memory models can follow the
+    data without polling it.
+    
+    The database runs in WAL mode. ``conn`` is a read-only connection
+    private to the calling thread, so readers never share a connection
+    and never block on the writer; only the writer thread writes. A
+    thread's connection is closed when the thread ends.
     
-    # Singleton instance
-    _instance = None
+    There is one instance per database file: ``Database(path)`` returns
+    the open instance for that file, with its warm connections, until it
+    is closed. ``Database()`` is the default file in the user's home.
+    """
+    
+    # Write-behind tuning
+    flush_interval = 0.5  # seconds a write may wait for others to join its batch
+    batch_size = 200  # pending writes that trigger an immediate batch
+    
+    # Connection tuning
+    busy_timeout = 5.0  # seconds to wait on a locked database before failing
+    statement_cache_size = 64  # prepared statements kept per connection
+    
+    # Open instances by database file
+    _instances = {}
     _lock = threading.Lock()
     
-    def __new__(cls):
+    def __new__(cls, db_path=None):
+        key = cls.resolve_path(db_path)
         with cls._lock:
-            if cls._instance is None:
-                cls._instance = super(Database, cls).__new__(cls)
-                cls._instance._initialized = False
-            return cls._instance
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super(Database, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[key] = instance
+            return instance
     
-    def __init__(self):
+    def __init__(self, db_path=None):
         if self._initialized:
             return
             
-        # Create data directory in user's home folder
-        self.data_dir = Path.home() / ".eyecare_app"
+        # Default is the data directory in the user's home folder; an
+        # explicit location is e.g. a profile or a scratch database
+        self.db_path = self.resolve_path(db_path)
+        self.data_dir = self.db_path.parent
         os.makedirs(self.data_dir, exist_ok=True)
-        
-        self.db_path = self.data_dir / "eyecare.db"
-        self.conn = None
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self._connect()
         self._create_tables()
+        self._start_writer()
+        self.migrator = BackgroundMigrator(self)
+        self.migrator.start()
         self._initialized = True
     
+    @staticmethod
+    def resolve_path(db_path=None):
+        """Get the absolute, symlink-free path of a database file; None is the default file.
+        
+        Instances are keyed by this path, so every spelling of a file must
+        resolve to the same one.
+        """
+        if db_path is None:
+            db_path = Path.home() / ".eyecare_app" / "eyecare.db"
+        return Path(db_path).expanduser().resolve()
+    
     def _connect(self):
-        """Connect to the SQLite database."""
-        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # Return results as dictionary-like objects
+        """Switch the database to WAL mode and check it is usable."""
+        conn = self._open_connection()
+        try:
+            # Only takes effect on a new, empty database; older ones are
+            # converted by DatabaseMaintenance
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+            if mode.lower() != 'wal':
+                print(f"[WARNING] WAL journaling unavailable, using {mode}")
+        finally:
+            conn.close()
+    
+    def _open_connection(self, read_only=False, autocommit=False):
+        """Open a connection with the shared pragma profile."""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout,
+            cached_statements=self.statement_cache_size,
+            # Each connection is used by one thread only; close() may run elsewhere
+            check_same_thread=False,
+            isolation_level=None if autocommit else ''
+        )
+        conn.row_factory = sqlite3.Row  # Return results as dictionary-like objects
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}')
+        # In WAL mode NORMAL only syncs at checkpoints and stays crash-safe
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        if read_only:
+            conn.execute('PRAGMA query_only = 1')
+        return conn
+    
+    @property
+    def conn(self):
+        """Read-only connection owned by the calling thread."""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            conn = self._open_connection(read_only=True, autocommit=True)
+            holder = _ConnectionHolder(conn)
+            # The thread's local storage, and the holder with it, goes
+            # away when the thread ends
+            weakref.finalize(holder, self._release_connection, conn)
+            self._local.holder = holder
+            with self._connections_lock:
+                self._connections.append(conn)
+        return holder.conn
+    
+    def _release_connection(self, conn):
+        """Close the read connection of a thread that has ended."""
+        with self._connections_lock:
+            if conn not in self._connections:
+                return  # Already closed by close()
+            self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing database connection: {e}")
     
     def _create_tables(self):
-        """Create necessary database tables if they don't exist."""
+        """Bring the schema up to date; expensive backfills continue in the background."""
+        conn = self._open_connection(autocommit=True)
+        try:
+            self._create_schema(conn)
+        finally:
+            conn.close()
+    
+    def _create_schema(self, conn):
+        """Migrate the schema and add missing default settings on ``conn``."""
+        migrate(conn)
+        
+        # Insert default settings if they don't exist
+        default_settings = list(Settings().to_dict().items())
+        
+        conn.executemany('''
+        INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)
+        ''', default_settings)
+    
+    def _start_writer(self):
+        """Set up the write journal, id allocation and the writer thread."""
+        self._pending_writes = deque()  # (seq, operation, standalone) in commit order
+        self._write_cond = threading.Condition()
+        self._enqueued_seq = 0
+        self._committed_seq = 0
+        self._flush_requested = False
+        self._closing = False
+        self._writer_stopped = False
+        self.write_batches = 0
+        self.write_errors = 0
+        self._commit_listeners = []
+        
+        self._id_lock = threading.Lock()
+        self._next_ids = {
+            'sessions': self._current_max_id('sessions') + 1,
+            'breaks': self._current_max_id('breaks') + 1
+        }
+        
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
+    
+    def _current_max_id(self, table):
+        """Get the highest id ever used in an AUTOINCREMENT table."""
         cursor = self.conn.cursor()
+        cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,))
+        row = cursor.fetchone()
+        sequence = row['seq'] if row else 0
+        cursor.execute(f'SELECT COALESCE(MAX(id), 0) AS max_id FROM {table}')
+        return max(sequence, cursor.fetchone()['max_id'])
+    
+    def _allocate_id(self, table):
+        """Reserve the next row id for a table."""
+        with self._id_lock:
+            row_id = self._next_ids[table]
+            self._next_ids[table] += 1
+            return row_id
+    
+    def _enqueue(self, operation, standalone=False):
+        """Append an operation taking a cursor to the write journal.
         
-        # Sessions table - tracks each work session
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            start_time TIMESTAMP NOT NULL,
-            end_time TIMESTAMP,
-            duration_seconds INTEGER,
-            breaks_taken INTEGER DEFAULT 0
-        )
-        ''')
+        ``standalone`` operations run on their own outside any transaction,
+        for statements such as VACUUM that cannot run inside one.
+        """
+        with self._write_cond:
+            if self._closing:
+                raise RuntimeError("Database is closed")
+            self._enqueued_seq += 1
+            self._pending_writes.append((self._enqueued_seq, operation, standalone))
+            if len(self._pending_writes) >= self.batch_size:
+                self._write_cond.notify_all()
+            elif len(self._pending_writes) == 1:
+                # Wake the writer so it starts the batch window
+                self._write_cond.notify_all()
+    
+    def _enqueue_write(self, sql, params=(), many=False):
+        """Queue a single SQL statement (or executemany) for the writer thread."""
+        if many:
+            self._enqueue(lambda cursor: cursor.executemany(sql, params))
+        else:
+            self._enqueue(lambda cursor: cursor.execute(sql, params))
+    
+    def run_write(self, operation, standalone=False):
+        """Run ``operation(cursor)`` on the writer thread and return its result.
         
-        # Breaks table - tracks each break
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS breaks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id INTEGER,
-            start_time TIMESTAMP NOT NULL,
-            duration_seconds INTEGER,
-            completed BOOLEAN DEFAULT 0,
-            FOREIGN KEY (session_id) REFERENCES sessions(id)
-        )
-        ''')
+        Blocks until the operation is committed, so this is meant for
+        background work such as maintenance, not for the UI thread. An
+        exception raised by the operation rolls its transaction back and
+        is raised again here.
+        """
+        result = {}
         
-        # Daily stats table - aggregated daily statistics
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS daily_stats (
-            date TEXT PRIMARY KEY,
-            total_work_seconds INTEGER DEFAULT 0,
-            total_breaks INTEGER DEFAULT 0,
-            completed_breaks INTEGER DEFAULT 0,
-            longest_session_seconds INTEGER DEFAULT 0
-        )
-        ''')
+        def capture(cursor):
+            result.clear()
+            try:
+                result['value'] = operation(cursor)
+            except Exception as e:
+                result['error'] = e
+                raise
         
-        # Settings table - user preferences
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT NOT NULL
-        )
-        ''')
+        self._enqueue(capture, standalone)
+        if not self.flush():
+            raise RuntimeError("Database writer is not running")
+        if 'error' in result:
+            raise result['error']
+        return result.get('value')
+    
+    def add_commit_listener(self, callback):
+        """Call ``callback()`` on the writer thread after each committed batch.
         
-        # Insert default settings if they don't exist
-        default_settings = [
-            ('work_duration', '1200'),  # 20 minutes in seconds
-            ('break_duration', '20'),   # 20 seconds
-            ('inactivity_threshold', '300'),  # 5 minutes in seconds
-            ('notification_style', 'center'),
-            ('sound_enabled', 'false'),
-            ('selected_sound', 'none')
-        ]
-        
-        cursor.executemany('''
-        INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)
-        ''', default_settings)
+        The callback may read but must not wait for queued writes.
+        """
+        with self._write_cond:
+            self._commit_listeners.append(callback)
+        return callback
+    
+    def remove_commit_listener(self, callback):
+        """Stop calling ``callback`` after commits."""
+        with self._write_cond:
+            if callback in self._commit_listeners:
+                self._commit_listeners.remove(callback)
+    
+    def flush(self, timeout=None):
+        """Block until every write queued so far is committed.
+        
+        Returns False if ``timeout`` expires first or the writer thread is
+        no longer running, in which case the writes may never be applied.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._write_cond:
+            target = self._enqueued_seq
+            self._flush_requested = True
+            self._write_cond.notify_all()
+            while self._committed_seq < target:
+                if self._writer_stopped or not self._writer_thread.is_alive():
+                    print("[WARNING] Database writer is not running, pending writes were not committed")
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._write_cond.wait(remaining)
+        return True
+    
+    def _writer_loop(self):
+        """Apply the write journal in batched transactions.
         
-        self.conn.commit()
+        A batch counts as committed once it has been applied, whatever its
+        writes raised, so one bad write never stops the writer or leaves
+        flush() waiting.
+        """
+        conn = None
+        try:
+            conn = self._open_connection(autocommit=True)
+            while True:
+                with self._write_cond:
+                    while not self._pending_writes and not self._closing:
+                        self._write_cond.wait()
+                    if not self._pending_writes:
+                        break
+                    
+                    # Give more writes a chance to join this batch
+                    deadline = time.monotonic() + self.flush_interval
+                    while (len(self._pending_writes) < self.batch_size
+                           and not self._flush_requested and not self._closing):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._write_cond.wait(remaining)
+                    
+                    batch = list(self._pending_writes)
+                    self._pending_writes.clear()
+                    self._flush_requested = False
+                
+                try:
+                    self._apply_batch(conn, batch)
+                    
+                    # Before the batch counts as committed, so flush() also
+                    # waits for the listeners
+                    with self._write_cond:
+                        listeners = list(self._commit_listeners)
+                    for callback in listeners:
+                        try:
+                            callback()
+                        except Exception as e:
+                            print(f"Error in database commit listener: {e}")
+                except Exception as e:
+                    print(f"Error in database writer: {e}")
+                finally:
+                    with self._write_cond:
+                        self._committed_seq = batch[-1][0]
+                        self._write_cond.notify_all()
+        except Exception as e:
+            print(f"Database writer stopped: {e}")
+        finally:
+            with self._write_cond:
+                self._writer_stopped = True
+                self._write_cond.notify_all()
+            if conn is not None:
+                conn.close()
+    
+    def _apply_batch(self, conn, batch):
+        """Apply a batch, splitting it around standalone operations."""
+        segment = []
+        for entry in batch:
+            if entry[2]:
+                self._apply_transaction(conn, segment)
+                segment = []
+                try:
+                    entry[1](conn.cursor())
+                except Exception as e:
+                    self.write_errors += 1
+                    print(f"Error applying database write: {e}")
+            else:
+                segment.append(entry)
+        self._apply_transaction(conn, segment)
+    
+    def _apply_transaction(self, conn, batch):
+        """Commit a run of writes in one transaction.
+        
+        If the transaction fails it is rolled back and replayed one write
+        per transaction, so a single bad write cannot take the others with
+        it and the original order is kept.
+        """
+        if not batch:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for _, operation, _ in batch:
+                operation(cursor)
+            cursor.execute('COMMIT')
+            self.write_batches += 1
+            return
+        except Exception as e:
+            print(f"Error committing write batch, retrying one by one: {e}")
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+        
+        for _, operation, _ in batch:
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                operation(cursor)
+                cursor.execute('COMMIT')
+            except Exception as e:
+                self.write_errors += 1
+                print(f"Error applying database write: {e}")
+                if conn.in_transaction:
+                    cursor.execute('ROLLBACK')
     
     def get_setting(self, key, default=None):
         """Get a setting value by key."""
@@ -105,103 +409,296 @@ class Database:
         result = cursor.fetchone()
         return result['value'] if result else default
     
+    def get_all_settings(self):
+        """Get every stored setting as a dict of strings."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT key, value FROM settings')
+        return {row['key']: row['value'] for row in cursor.fetchall()}
+    
+    def get_daily_stats(self, date):
+        """Get the daily_stats row for one date (ISO string), or None."""
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM daily_stats WHERE date = ?', (date,))
+        return cursor.fetchone()
+    
     def set_setting(self, key, value):
         """Set a setting value."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        self._enqueue_write('''
         INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
         ''', (key, str(value)))
-        self.conn.commit()
+    
+    def set_settings(self, values):
+        """Set several settings in one write."""
+        if not values:
+            return
+        self._enqueue_write('''
+        INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
+        ''', [(key, str(value)) for key, value in values.items()], many=True)
     
     def start_session(self, start_time):
         """Record the start of a new work session."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        INSERT INTO sessions (start_time) VALUES (?)
-        ''', (start_time,))
-        self.conn.commit()
-        return cursor.lastrowid
+        session_id = self._allocate_id('sessions')
+        self._enqueue_write('''
+        INSERT INTO sessions (id, start_time) VALUES (?, ?)
+        ''', (session_id, start_time))
+        return session_id
+    
+    def checkpoint_session(self, session_id, duration, breaks_taken, checkpoint_time):
+        """Store the running duration of a session that is still open.
+        
+        ``duration`` is the session's total work time so far and
+        ``checkpoint_time`` the ISO timestamp it was measured at; the
+        triggers add the difference to the daily and hourly work time.
+        """
+        self._enqueue_write('''
+        UPDATE sessions 
+        SET last_checkpoint = ?, duration_seconds = ?, breaks_taken = ?
+        WHERE id = ?
+        ''', (checkpoint_time, duration, breaks_taken, session_id))
     
     def end_session(self, session_id, end_time, duration, breaks_taken):
         """Record the end of a work session."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        self._enqueue_write('''
         UPDATE sessions 
-        SET end_time = ?, duration_seconds = ?, breaks_taken = ?
+        SET end_time = ?, last_checkpoint = ?, duration_seconds = ?, breaks_taken = ?
         WHERE id = ?
-        ''', (end_time, duration, breaks_taken, session_id))
-        self.conn.commit()
+        ''', (end_time, end_time, duration, breaks_taken, session_id))
     
     def record_break(self, session_id, start_time):
         """Record the start of a break."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        INSERT INTO breaks (session_id, start_time) VALUES (?, ?)
-        ''', (session_id, start_time))
-        self.conn.commit()
-        return cursor.lastrowid
+        break_id = self._allocate_id('breaks')
+        self._enqueue_write('''
+        INSERT INTO breaks (id, session_id, start_time) VALUES (?, ?, ?)
+        ''', (break_id, session_id, start_time))
+        return break_id
     
     def complete_break(self, break_id, duration):
         """Mark a break as completed."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        self._enqueue_write('''
         UPDATE breaks 
         SET duration_seconds = ?, completed = 1
         WHERE id = ?
         ''', (duration, break_id))
-        self.conn.commit()
+    
+    def skip_break(self, break_id, duration):
+        """Mark a break as skipped after ``duration`` seconds."""
+        self._enqueue_write('''
+        UPDATE breaks 
+        SET duration_seconds = ?, completed = 0
+        WHERE id = ?
+        ''', (duration, break_id))
     
     def update_daily_stats(self, date, work_seconds, breaks, completed_breaks, session_seconds):
-        """Update the daily statistics."""
+        """Add to the daily statistics of a date.
+        
+        Sessions and breaks are counted by triggers; this is only needed for
+        adjustments that have no raw rows behind them.
+        """
+        self._enqueue_write('''
+        INSERT INTO daily_stats 
+        (date, total_work_seconds, total_breaks, completed_breaks, longest_session_seconds)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(date) DO UPDATE SET
+            total_work_seconds = total_work_seconds + excluded.total_work_seconds,
+            total_breaks = total_breaks + excluded.total_breaks,
+            completed_breaks = completed_breaks + excluded.completed_breaks,
+            longest_session_seconds = MAX(longest_session_seconds, excluded.longest_session_seconds)
+        ''', (date, work_seconds, breaks, completed_breaks, session_seconds))
+    
+    def rebuild_daily_stats(self):
+        """Recompute daily_stats from the sessions and breaks tables."""
+        self._enqueue(rebuild_daily_stats)
+    
+    def record_activity_minutes(self, rows):
+        """Store per-minute input counts in bulk.
+        
+        ``rows`` holds (minute_start, key_presses, mouse_clicks, mouse_scrolls,
+        mouse_moves) tuples with minute_start as an ISO timestamp. Counts for
+        a minute that is already stored are added up.
+        """
+        if not rows:
+            return
+        self._enqueue_write('''
+        INSERT INTO activity_minutes
+        (minute_start, key_presses, mouse_clicks, mouse_scrolls, mouse_moves)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(minute_start) DO UPDATE SET
+            key_presses = key_presses + excluded.key_presses,
+            mouse_clicks = mouse_clicks + excluded.mouse_clicks,
+            mouse_scrolls = mouse_scrolls + excluded.mouse_scrolls,
+            mouse_moves = mouse_moves + excluded.mouse_moves
+        ''', list(rows), many=True)
+    
+    @staticmethod
+    def _date_bounds(start_date=None, end_date=None):
+        """Turn an inclusive date range into half-open ISO string bounds.
+        
+        Dates may be ``datetime.date`` objects or ISO strings; None leaves
+        that side open. Timestamps are stored as local ISO strings, so the
+        bounds compare correctly against both dates and timestamps and keep
+        the start_time indexes usable.
+        """
+        if isinstance(start_date, str):
+            start_date = datetime.date.fromisoformat(start_date[:10])
+        if isinstance(end_date, str):
+            end_date = datetime.date.fromisoformat(end_date[:10])
+        lower = start_date.isoformat() if start_date else ''
+        upper = (end_date + datetime.timedelta(days=1)).isoformat() if end_date else '9999-12-31'
+        return lower, upper
+    
+    def get_stats_between(self, start_date=None, end_date=None):
+        """Get daily_stats rows for the dates from ``start_date`` to ``end_date`` inclusive."""
+        lower, upper = self._date_bounds(start_date, end_date)
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT date, total_work_seconds, total_breaks, completed_breaks, longest_session_seconds
+        FROM daily_stats 
+        WHERE date >= ? AND date < ?
+        ORDER BY date
+        ''', (lower, upper))
+        return cursor.fetchall()
+    
+    def get_sessions_between(self, start_date=None, end_date=None):
+        """Get the sessions started from ``start_date`` to ``end_date`` inclusive."""
+        lower, upper = self._date_bounds(start_date, end_date)
         cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT id, start_time, end_time, duration_seconds, breaks_taken
+        FROM sessions 
+        WHERE start_time >= ? AND start_time < ?
+        ORDER BY start_time
+        ''', (lower, upper))
+        return cursor.fetchall()
+    
+    def get_breaks_between(self, start_date=None, end_date=None):
+        """Get the breaks started from ``start_date`` to ``end_date`` inclusive."""
+        lower, upper = self._date_bounds(start_date, end_date)
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT id, session_id, start_time, duration_seconds, completed
+        FROM breaks 
+        WHERE start_time >= ? AND start_time < ?
+        ORDER BY start_time
+        ''', (lower, upper))
+        return cursor.fetchall()
+    
+    def get_hourly_rollup(self, start_date=None, end_date=None):
+        """Get work time and break counts per weekday and hour of day.
         
-        # First check if the date already exists
-        cursor.execute('SELECT * FROM daily_stats WHERE date = ?', (date,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing record
-            cursor.execute('''
-            UPDATE daily_stats 
-            SET total_work_seconds = total_work_seconds + ?,
-                total_breaks = total_breaks + ?,
-                completed_breaks = completed_breaks + ?,
-                longest_session_seconds = MAX(longest_session_seconds, ?)
-            WHERE date = ?
-            ''', (work_seconds, breaks, completed_breaks, session_seconds, date))
-        else:
-            # Create new record
-            cursor.execute('''
-            INSERT INTO daily_stats 
-            (date, total_work_seconds, total_breaks, completed_breaks, longest_session_seconds)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (date, work_seconds, breaks, completed_breaks, session_seconds))
-            
-        self.conn.commit()
+        Sums the hourly rollup over the dates from ``start_date`` to
+        ``end_date`` inclusive; ``weekday`` 0 is Sunday.
+        """
+        lower, upper = self._date_bounds(start_date, end_date)
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT weekday, hour,
+               SUM(work_seconds) AS work_seconds,
+               SUM(breaks_due) AS breaks_due,
+               SUM(breaks_completed) AS breaks_completed,
+               SUM(breaks_skipped) AS breaks_skipped
+        FROM hourly_rollup
+        WHERE date >= ? AND date < ?
+        GROUP BY weekday, hour
+        ORDER BY weekday, hour
+        ''', (lower, upper))
+        return cursor.fetchall()
+    
+    def get_activity_by_day(self, start_date, end_date=None):
+        """Get active minutes and input counts per day from ``start_date`` to ``end_date``."""
+        lower, upper = self._date_bounds(start_date, end_date)
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        SELECT date,
+               SUM(active_minutes) AS active_minutes,
+               SUM(key_presses) AS key_presses,
+               SUM(mouse_clicks) AS mouse_clicks,
+               SUM(mouse_scrolls) AS mouse_scrolls,
+               SUM(mouse_moves) AS mouse_moves
+        FROM (
+            SELECT substr(minute_start, 1, 10) AS date, 1 AS active_minutes,
+                   key_presses, mouse_clicks, mouse_scrolls, mouse_moves
+            FROM activity_minutes
+            WHERE minute_start >= ? AND minute_start < ?
+            UNION ALL
+            SELECT date, active_minutes, key_presses, mouse_clicks, mouse_scrolls, mouse_moves
+            FROM activity_days
+            WHERE date >= ? AND date < ?
+        )
+        GROUP BY date
+        ORDER BY date DESC
+        ''', (lower, upper, lower, upper))
+        return cursor.fetchall()
+    
+    @staticmethod
+    def _last_days(days):
+        """Return the inclusive (start, end) dates of the last ``days`` calendar days."""
+        today = datetime.date.today()
+        return today - datetime.timedelta(days=days - 1), today
     
     def get_streak_data(self, days=30):
-        """Get data for calculating user's streak."""
+        """Get data for calculating user's streak over the last ``days`` calendar days."""
+        lower, upper = self._date_bounds(*self._last_days(days))
         cursor = self.conn.cursor()
         cursor.execute('''
         SELECT date, total_breaks, completed_breaks 
         FROM daily_stats 
-        ORDER BY date DESC 
-        LIMIT ?
-        ''', (days,))
+        WHERE date >= ? AND date < ?
+        ORDER BY date DESC
+        ''', (lower, upper))
         return cursor.fetchall()
     
+    def get_streak(self, today=None):
+        """Get the current and longest streak of days with a completed break.
+        
+        Reads the trigger-maintained streak_state row. The current streak
+        counts as broken once a whole day before ``today`` passed without
+        a completed break; today itself still has time.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT last_date, current_streak, longest_streak FROM streak_state WHERE id = 1')
+        row = cursor.fetchone()
+        if row is None:
+            return {"current_streak": 0, "longest_streak": 0, "last_date": None}
+        
+        yesterday = ((today or datetime.date.today()) - datetime.timedelta(days=1)).isoformat()
+        alive = row['last_date'] is not None and row['last_date'] >= yesterday
+        return {
+            "current_streak": row['current_streak'] if alive else 0,
+            "longest_streak": row['longest_streak'],
+            "last_date": row['last_date']
+        }
+    
     def get_screen_time_stats(self, days=7):
-        """Get screen time statistics for the specified number of past days."""
+        """Get screen time statistics for the last ``days`` calendar days."""
+        lower, upper = self._date_bounds(*self._last_days(days))
         cursor = self.conn.cursor()
         cursor.execute('''
         SELECT date, total_work_seconds, total_breaks, completed_breaks 
         FROM daily_stats 
-        ORDER BY date DESC 
-        LIMIT ?
-        ''', (days,))
+        WHERE date >= ? AND date < ?
+        ORDER BY date DESC
+        ''', (lower, upper))
         return cursor.fetchall()
         
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
+        """Flush pending writes and close the database connections."""
+        if getattr(self, 'migrator', None):
+            self.migrator.stop()
+        if getattr(self, '_writer_thread', None) and self._writer_thread.is_alive():
+            self.flush()
+            with self._write_cond:
+                self._closing = True
+                self._write_cond.notify_all()
+            self._writer_thread.join(timeout=5.0)
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error closing database connection: {e}")
+        
+        # The next Database(path) opens the file afresh
+        with Database._lock:
+            if Database._instances.get(self.db_path) is self:
+                del Database._instances[self.db_path]
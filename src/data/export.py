@@ -0,0 +1,258 @@
+"""
+Streaming export of the history database.
+
+Rows are paged out of SQLite with ``fetchmany`` and written as they
+arrive, so memory use does not grow with the size of the history.
+Sessions, breaks and daily stats can be written as CSV, NDJSON or, when
+pyarrow is installed, Parquet.
+
+From the ``src`` directory, without starting the UI::
+
+    python -m data.export --format parquet --out ~/eyecare-export
+"""
+import os
+import csv
+import sys
+import json
+import argparse
+import datetime
+import tempfile
+from contextlib import contextmanager
+
+# Optional: Parquet output
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Table -> (date column used for ranges and ordering, [(column, type)])
+EXPORT_TABLES = {
+    'sessions': ('start_time', [
+        ('id', 'int'),
+        ('start_time', 'text'),
+        ('end_time', 'text'),
+        ('duration_seconds', 'int'),
+        ('breaks_taken', 'int')
+    ]),
+    'breaks': ('start_time', [
+        ('id', 'int'),
+        ('session_id', 'int'),
+        ('start_time', 'text'),
+        ('duration_seconds', 'int'),
+        ('completed', 'bool')
+    ]),
+    'daily_stats': ('date', [
+        ('date', 'text'),
+        ('total_work_seconds', 'int'),
+        ('total_breaks', 'int'),
+        ('completed_breaks', 'int'),
+        ('longest_session_seconds', 'int')
+    ])
+}
+
+FORMATS = {
+    'csv': '.csv',
+    'ndjson': '.ndjson',
+    'parquet': '.parquet'
+}
+
+PAGE_SIZE = 1000  # rows fetched from SQLite at a time
+
+
+def parquet_available():
+    """Check whether Parquet export is possible (needs pyarrow)."""
+    return pyarrow is not None
+
+
+def iter_pages(db, table, start_date=None, end_date=None, page_size=PAGE_SIZE):
+    """Yield the rows of ``table`` as lists of at most ``page_size`` tuples.
+
+    Rows are ordered by their date column and limited to the dates from
+    ``start_date`` to ``end_date`` inclusive; None leaves a side open.
+    """
+    date_column, columns = EXPORT_TABLES[table]
+    lower, upper = db._date_bounds(start_date, end_date)
+    cursor = db.conn.cursor()
+    try:
+        cursor.execute(f'''
+        SELECT {", ".join(name for name, _ in columns)}
+        FROM {table}
+        WHERE {date_column} >= ? AND {date_column} < ?
+        ORDER BY {date_column}
+        ''', (lower, upper))
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
+            yield [tuple(row) for row in rows]
+    finally:
+        cursor.close()
+
+
+def _typed_rows(page, columns):
+    """Turn SQLite 0/1 flags into booleans for formats that have them."""
+    flags = [i for i, (_, kind) in enumerate(columns) if kind == 'bool']
+    if not flags:
+        return page
+    rows = []
+    for row in page:
+        row = list(row)
+        for i in flags:
+            if row[i] is not None:
+                row[i] = bool(row[i])
+        rows.append(row)
+    return rows
+
+
+def write_csv(pages, columns, fileobj):
+    """Write pages of rows as CSV with a header line; return the row count."""
+    writer = csv.writer(fileobj)
+    writer.writerow([name for name, _ in columns])
+    count = 0
+    for page in pages:
+        writer.writerows(page)
+        count += len(page)
+    return count
+
+
+def write_ndjson(pages, columns, fileobj):
+    """Write pages of rows as one JSON object per line; return the row count."""
+    names = [name for name, _ in columns]
+    count = 0
+    for page in pages:
+        fileobj.writelines(
+            json.dumps(dict(zip(names, row))) + '\n'
+            for row in _typed_rows(page, columns)
+        )
+        count += len(page)
+    return count
+
+
+def write_parquet(pages, columns, path):
+    """Write pages of rows to a Parquet file, one row group per page; return the row count."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    types = {'int': pyarrow.int64(), 'text': pyarrow.string(), 'bool': pyarrow.bool_()}
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        for page in pages:
+            rows = _typed_rows(page, columns)
+            arrays = [
+                pyarrow.array([row[i] for row in rows], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=schema))
+            count += len(rows)
+        if count == 0:
+            # Still write a valid, empty file with the schema
+            writer.write_table(schema.empty_table())
+    return count
+
+
+@contextmanager
+def _atomic_output(path):
+    """Yield a temp path next to ``path`` and move it into place on success."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".export-", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_table(db, table, path, fmt=None, start_date=None, end_date=None, page_size=PAGE_SIZE):
+    """Export one table to ``path``; return the number of rows written.
+
+    The format is taken from the file extension unless ``fmt`` is given.
+    The file only appears once it is complete.
+    """
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower()
+        fmt = next((name for name, ext in FORMATS.items() if ext == extension), None)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format for {path}: {fmt}")
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+
+    columns = EXPORT_TABLES[table][1]
+    pages = iter_pages(db, table, start_date, end_date, page_size)
+    with _atomic_output(path) as tmp_path:
+        if fmt == 'parquet':
+            return write_parquet(pages, columns, tmp_path)
+        with open(tmp_path, 'w', newline='' if fmt == 'csv' else None, encoding='utf-8') as f:
+            if fmt == 'csv':
+                return write_csv(pages, columns, f)
+            return write_ndjson(pages, columns, f)
+
+
+def export_history(db, directory, fmt='csv', tables=None, start_date=None, end_date=None, page_size=PAGE_SIZE):
+    """Export several tables into ``directory`` as ``<table>.<format>``.
+
+    All tables are read inside one read transaction, so they agree with
+    each other even while the app keeps writing. Returns
+    ``{table: (path, rows)}``.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet' and pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    os.makedirs(directory, exist_ok=True)
+    conn = db.conn
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute('BEGIN')
+    try:
+        results = {}
+        for table in tables or EXPORT_TABLES:
+            path = os.path.join(directory, table + FORMATS[fmt])
+            results[table] = (path, export_table(db, table, path, fmt, start_date, end_date, page_size))
+        return results
+    finally:
+        if own_transaction:
+            conn.rollback()
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m data.export",
+        description="Export OptiPause20 history without starting the UI."
+    )
+    parser.add_argument('--db', help="database file (default: the app's database)")
+    parser.add_argument('--out', default='.', help="output directory (default: current directory)")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv', help="output format (default: csv)")
+    parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES), help="tables to export (default: all)")
+    parser.add_argument('--from', dest='start_date', type=datetime.date.fromisoformat, help="first date, YYYY-MM-DD")
+    parser.add_argument('--to', dest='end_date', type=datetime.date.fromisoformat, help="last date, YYYY-MM-DD")
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help="rows fetched at a time")
+    args = parser.parse_args(argv)
+
+    from .database import Database
+
+    db = Database(args.db)
+    try:
+        results = export_history(
+            db, args.out, args.format, args.tables,
+            args.start_date, args.end_date, args.page_size
+        )
+    except Exception as e:
+        print(f"Error exporting history: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+    for table, (path, rows) in results.items():
+        print(f"{table}: {rows} rows -> {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+import os
+import datetime
+import threading
+
+
+class DatabaseMaintenance:
+    """
+    Keeps the history database from growing without bound.
+
+    Raw ``sessions`` and ``breaks`` rows older than the retention window
+    are deleted. Their totals already live in ``daily_stats`` and
+    ``hourly_rollup``, which the triggers keep current and which are never
+    purged. Per-minute activity past the window is folded into
+    ``activity_days``. Freed pages are then handed back to the file system
+    with ``incremental_vacuum``.
+
+    Databases created before incremental auto-vacuum need one full VACUUM
+    to switch over. It rewrites the whole file on the writer and holds up
+    every other write while it runs, so it is opt-in through
+    ``convert_vacuum`` (or ``convert_auto_vacuum()``, e.g. from a
+    command-line tool). Without it such databases are not vacuumed.
+
+    Everything runs on a background thread in small steps through the
+    database's writer, so the app's own writes are never held up for long.
+    The retention window comes from the ``retention_days`` setting unless
+    passed in; 0 keeps all history. Pass the profile's ``SettingsStore`` as
+    ``settings`` so a change that is still queued for the database already
+    counts; without one the setting is read from the database.
+    """
+    chunk_size = 500  # raw rows deleted per write transaction
+    fold_days = 7  # days of activity minutes folded per write transaction
+    vacuum_step_pages = 256  # pages released per incremental_vacuum step
+    step_pause = 0.05  # seconds between steps
+    start_delay = 60  # seconds after start() before the first run
+    run_interval = 24 * 60 * 60  # seconds between runs
+
+    def __init__(self, db, retention_days=None, convert_vacuum=False, settings=None):
+        self.db = db
+        self.retention_days = retention_days
+        self.settings = settings
+        self.convert_vacuum = convert_vacuum
+        self.is_running = False
+        self.maintenance_thread = None
+        self.last_report = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start periodic maintenance in the background."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self._stop_event.clear()
+        self.maintenance_thread = threading.Thread(target=self._maintenance_loop, daemon=True)
+        self.maintenance_thread.start()
+
+    def stop(self):
+        """Stop maintenance after the current step."""
+        self.is_running = False
+        self._stop_event.set()
+        if self.maintenance_thread:
+            self.maintenance_thread.join(timeout=5.0)
+
+    def _maintenance_loop(self):
+        """Run maintenance once after start_delay and then every run_interval."""
+        delay = self.start_delay
+        while not self._stop_event.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error in database maintenance: {e}")
+            delay = self.run_interval
+
+    def get_retention_days(self):
+        """Get the number of days of raw history to keep."""
+        if self.retention_days is not None:
+            return self.retention_days
+        if self.settings is not None:
+            return self.settings.get('retention_days')
+        try:
+            return int(self.db.get_setting('retention_days', 365))
+        except ValueError:
+            return 365
+
+    def get_size(self):
+        """Get the database size: pages, free pages and bytes on disk (including the WAL)."""
+        conn = self.db.conn
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+        file_bytes = 0
+        for path in (str(self.db.db_path), str(self.db.db_path) + '-wal'):
+            if os.path.exists(path):
+                file_bytes += os.path.getsize(path)
+
+        return {
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist_count,
+            "file_bytes": file_bytes
+        }
+
+    def run_once(self):
+        """Apply the retention policy, vacuum and return a report."""
+        before = self.get_size()
+        report = {
+            "retention_days": self.get_retention_days(),
+            "breaks_deleted": 0,
+            "sessions_deleted": 0,
+            "activity_minutes_folded": 0,
+            "pages_freed": 0,
+            "before": before
+        }
+
+        if report["retention_days"] > 0 and self.db.migrator.is_pending():
+            # Backfills still need the raw rows to build the rollups from
+            print("Skipping history retention until database migrations finish")
+        elif report["retention_days"] > 0:
+            cutoff = (datetime.date.today() - datetime.timedelta(days=report["retention_days"])).isoformat()
+            report["breaks_deleted"] = self._delete_before('breaks', cutoff)
+            report["sessions_deleted"] = self._delete_before('sessions', cutoff)
+            report["activity_minutes_folded"] = self._fold_activity_before(cutoff)
+
+        if not self._stop_event.is_set():
+            if self.convert_vacuum:
+                self.convert_auto_vacuum()
+            if self.is_incremental():
+                report["pages_freed"] = self._incremental_vacuum()
+            self.db.run_write(
+                lambda cursor: cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall(),
+                standalone=True
+            )
+
+        report["after"] = self.get_size()
+        self.last_report = report
+        print(
+            f"Database maintenance: {before['file_bytes'] / 1048576:.1f} MB -> "
+            f"{report['after']['file_bytes'] / 1048576:.1f} MB "
+            f"({report['sessions_deleted']} sessions, {report['breaks_deleted']} breaks, "
+            f"{report['activity_minutes_folded']} activity minutes removed)"
+        )
+        return report
+
+    def _delete_before(self, table, cutoff):
+        """Delete rows of ``table`` started before ``cutoff`` in chunks."""
+        sql = f'''
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM {table} WHERE start_time < ? ORDER BY start_time LIMIT ?
+        )
+        '''
+        deleted = 0
+        while not self._stop_event.is_set():
+            count = self.db.run_write(lambda cursor: cursor.execute(sql, (cutoff, self.chunk_size)).rowcount)
+            deleted += count or 0
+            if not count or count < self.chunk_size:
+                break
+            self._stop_event.wait(self.step_pause)
+        return deleted
+
+    def _fold_activity_before(self, cutoff):
+        """Fold activity minutes before ``cutoff`` into activity_days, a few days at a time."""
+        def fold(cursor):
+            cursor.execute('SELECT MIN(minute_start) FROM activity_minutes WHERE minute_start < ?', (cutoff,))
+            first = cursor.fetchone()[0]
+            if first is None:
+                return 0
+            first_day = datetime.date.fromisoformat(first[:10])
+            bound = min(cutoff, (first_day + datetime.timedelta(days=self.fold_days)).isoformat())
+
+            cursor.execute('''
+            INSERT INTO activity_days
+            (date, active_minutes, key_presses, mouse_clicks, mouse_scrolls, mouse_moves)
+            SELECT substr(minute_start, 1, 10), COUNT(*),
+                   SUM(key_presses), SUM(mouse_clicks), SUM(mouse_scrolls), SUM(mouse_moves)
+            FROM activity_minutes
+            WHERE minute_start < ?
+            GROUP BY 1
+            ON CONFLICT(date) DO UPDATE SET
+                active_minutes = active_minutes + excluded.active_minutes,
+                key_presses = key_presses + excluded.key_presses,
+                mouse_clicks = mouse_clicks + excluded.mouse_clicks,
+                mouse_scrolls = mouse_scrolls + excluded.mouse_scrolls,
+                mouse_moves = mouse_moves + excluded.mouse_moves
+            ''', (bound,))
+            cursor.execute('DELETE FROM activity_minutes WHERE minute_start < ?', (bound,))
+            return cursor.rowcount
+
+        folded = 0
+        while not self._stop_event.is_set():
+            count = self.db.run_write(fold)
+            if not count:
+                break
+            folded += count
+            self._stop_event.wait(self.step_pause)
+        return folded
+
+    def is_incremental(self):
+        """Check whether the database uses incremental auto-vacuum."""
+        # Asked on the writer: read connections may still see the mode from before a conversion
+        mode = self.db.run_write(lambda cursor: cursor.execute('PRAGMA auto_vacuum').fetchone()[0])
+        return mode == 2  # INCREMENTAL
+
+    def convert_auto_vacuum(self):
+        """Switch an older database to incremental auto-vacuum.
+
+        The mode only takes effect after a full VACUUM, which rewrites the
+        file once and blocks all other writes until it is done; afterwards
+        free pages can be released in small steps.
+        """
+        if self.is_incremental():
+            return
+
+        def convert(cursor):
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            cursor.execute('VACUUM')
+
+        print("Converting database to incremental auto-vacuum")
+        self.db.run_write(convert, standalone=True)
+
+    def _incremental_vacuum(self):
+        """Release free pages a step at a time; return how many were freed."""
+        freed = 0
+        while not self._stop_event.is_set():
+            free_pages = self.db.conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if free_pages == 0:
+                break
+            self.db.run_write(
+                lambda cursor: cursor.execute(f'PRAGMA incremental_vacuum({self.vacuum_step_pages})').fetchall(),
+                standalone=True
+            )
+            remaining = self.db.conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if remaining >= free_pages:
+                break
+            freed += free_pages - remaining
+            self._stop_event.wait(self.step_pause)
+        return freed
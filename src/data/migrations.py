@@ -0,0 +1,790 @@
+import datetime
+import threading
+
+# Upper bound used for open-ended date ranges
+END_OF_TIME = '9999-12-31'
+
+
+class Migration:
+    """
+    One step of the schema history, identified by the ``PRAGMA user_version``
+    it brings the database to.
+
+    ``upgrade(cursor)`` runs at startup inside the migration's transaction
+    and must stay cheap: DDL, triggers, small tables. Work that grows with
+    the size of the history goes into ``backfill(cursor, watermark, until)``.
+    BackgroundMigrator calls it once per transaction, with the watermark the
+    previous chunk returned (None at first), until it returns None. The
+    watermark is stored with the chunk, so a backfill resumes where it
+    stopped after a restart. ``until`` is the date the migration ran:
+    from then on the new schema maintains the data, so backfills only
+    cover the dates before it.
+    """
+    def __init__(self, version, description, upgrade=None, backfill=None):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+        self.backfill = backfill
+
+
+def _base_schema(cursor):
+    """Tables of the original, unversioned schema."""
+    # Sessions table - tracks each work session
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_time TIMESTAMP NOT NULL,
+        end_time TIMESTAMP,
+        duration_seconds INTEGER,
+        breaks_taken INTEGER DEFAULT 0
+    )
+    ''')
+    
+    # Breaks table - tracks each break
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS breaks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER,
+        start_time TIMESTAMP NOT NULL,
+        duration_seconds INTEGER,
+        completed BOOLEAN DEFAULT 0,
+        FOREIGN KEY (session_id) REFERENCES sessions(id)
+    )
+    ''')
+    
+    # Daily stats table - aggregated daily statistics
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS daily_stats (
+        date TEXT PRIMARY KEY,
+        total_work_seconds INTEGER DEFAULT 0,
+        total_breaks INTEGER DEFAULT 0,
+        completed_breaks INTEGER DEFAULT 0,
+        longest_session_seconds INTEGER DEFAULT 0
+    )
+    ''')
+    
+    # Activity minutes table - input intensity per wall-clock minute
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS activity_minutes (
+        minute_start TIMESTAMP PRIMARY KEY,
+        key_presses INTEGER DEFAULT 0,
+        mouse_clicks INTEGER DEFAULT 0,
+        mouse_scrolls INTEGER DEFAULT 0,
+        mouse_moves INTEGER DEFAULT 0
+    )
+    ''')
+    
+    # Settings table - user preferences
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )
+    ''')
+
+
+def _create_start_time_indexes(cursor, watermark, until):
+    """Build the start_time indexes one per chunk."""
+    statements = [
+        'CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time)',
+        'CREATE INDEX IF NOT EXISTS idx_breaks_start_time ON breaks(start_time)'
+    ]
+    done = int(watermark or 0)
+    if done >= len(statements):
+        return None
+    cursor.execute(statements[done])
+    return str(done + 1)
+
+
+def _daily_stats_triggers(cursor):
+    """Session checkpoints and the triggers that maintain daily_stats.
+
+    A session's duration is checkpointed while it runs, so work time only
+    ever grows by the delta. Deleting raw rows (retention) leaves the
+    aggregates alone on purpose.
+    """
+    cursor.execute('PRAGMA table_info(sessions)')
+    if 'last_checkpoint' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE sessions ADD COLUMN last_checkpoint TIMESTAMP')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS sessions_daily_stats_insert
+    AFTER INSERT ON sessions
+    BEGIN
+        INSERT INTO daily_stats (date, total_work_seconds, longest_session_seconds)
+        VALUES (
+            substr(NEW.start_time, 1, 10),
+            COALESCE(NEW.duration_seconds, 0),
+            COALESCE(NEW.duration_seconds, 0)
+        )
+        ON CONFLICT(date) DO UPDATE SET
+            total_work_seconds = total_work_seconds + excluded.total_work_seconds,
+            longest_session_seconds = MAX(longest_session_seconds, excluded.longest_session_seconds);
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS sessions_daily_stats_update
+    AFTER UPDATE OF duration_seconds ON sessions
+    BEGIN
+        UPDATE daily_stats SET
+            total_work_seconds = total_work_seconds
+                + COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0),
+            longest_session_seconds = MAX(longest_session_seconds, COALESCE(NEW.duration_seconds, 0))
+        WHERE date = substr(NEW.start_time, 1, 10);
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS breaks_daily_stats_insert
+    AFTER INSERT ON breaks
+    BEGIN
+        INSERT INTO daily_stats (date, total_breaks, completed_breaks)
+        VALUES (substr(NEW.start_time, 1, 10), 1, COALESCE(NEW.completed, 0))
+        ON CONFLICT(date) DO UPDATE SET
+            total_breaks = total_breaks + 1,
+            completed_breaks = completed_breaks + excluded.completed_breaks;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS breaks_daily_stats_complete
+    AFTER UPDATE OF completed ON breaks
+    WHEN NEW.completed IS NOT OLD.completed
+    BEGIN
+        UPDATE daily_stats SET
+            completed_breaks = completed_breaks
+                + COALESCE(NEW.completed, 0) - COALESCE(OLD.completed, 0)
+        WHERE date = substr(NEW.start_time, 1, 10);
+    END
+    ''')
+
+
+def rebuild_daily_stats(cursor, lower='', upper=END_OF_TIME):
+    """Set-based rebuild of the daily_stats dates in [lower, upper) from the raw rows.
+
+    A session's work time is taken to have ended at its last checkpoint
+    and is split over the days it covers, as the triggers do. Only dates
+    that still have raw rows are touched; dates whose raw rows were
+    already purged keep their stored totals.
+    """
+    cursor.execute('''
+    WITH RECURSIVE session_spans(day_start, work_start, work_end) AS (
+        SELECT (work_end - work_seconds) / 86400 * 86400, work_end - work_seconds, work_end
+        FROM (
+            SELECT CAST(strftime('%s', COALESCE(last_checkpoint, end_time, start_time)) AS INTEGER) AS work_end,
+                   COALESCE(duration_seconds, 0) AS work_seconds
+            FROM sessions
+            WHERE start_time < ? AND COALESCE(last_checkpoint, end_time, start_time) >= ?
+        )
+        UNION ALL
+        SELECT day_start + 86400, work_start, work_end
+        FROM session_spans
+        WHERE day_start + 86400 < work_end
+    )
+    INSERT INTO daily_stats 
+    (date, total_work_seconds, total_breaks, completed_breaks, longest_session_seconds)
+    SELECT date, SUM(work_seconds), SUM(breaks), SUM(completed), MAX(longest)
+    FROM (
+        SELECT date(day_start, 'unixepoch') AS date,
+               SUM(seconds) AS work_seconds,
+               0 AS breaks,
+               0 AS completed,
+               MAX(seconds) AS longest
+        FROM (
+            SELECT day_start, MIN(work_end, day_start + 86400) - MAX(work_start, day_start) AS seconds
+            FROM session_spans
+        )
+        GROUP BY 1
+        UNION ALL
+        SELECT substr(start_time, 1, 10), 0, COUNT(*), COALESCE(SUM(completed), 0), 0
+        FROM breaks
+        WHERE start_time >= ? AND start_time < ?
+        GROUP BY 1
+    )
+    WHERE date >= ? AND date < ?
+    GROUP BY date
+    ON CONFLICT(date) DO UPDATE SET
+        total_work_seconds = excluded.total_work_seconds,
+        total_breaks = excluded.total_breaks,
+        completed_breaks = excluded.completed_breaks,
+        longest_session_seconds = excluded.longest_session_seconds
+    ''', (upper, lower, lower, upper, lower, upper))
+
+
+def _next_chunk(cursor, watermark, until, days=30):
+    """Return the [lower, upper) date range of the next backfill chunk, or None."""
+    lower = watermark or ''
+    cursor.execute('''
+    SELECT MIN(start_time) FROM (
+        SELECT MIN(start_time) AS start_time FROM sessions WHERE start_time >= ?
+        UNION ALL
+        SELECT MIN(start_time) FROM breaks WHERE start_time >= ?
+    )
+    ''', (lower, lower))
+    first = cursor.fetchone()[0]
+    if first is None or first[:10] >= until:
+        return None
+    first_day = datetime.date.fromisoformat(first[:10])
+    return first[:10], min(until, (first_day + datetime.timedelta(days=days)).isoformat())
+
+
+def _backfill_daily_stats(cursor, watermark, until):
+    """Recompute daily_stats for history that predates the triggers."""
+    chunk = _next_chunk(cursor, watermark, until)
+    if chunk is None:
+        return None
+    rebuild_daily_stats(cursor, *chunk)
+    return chunk[1]
+
+
+def _hourly_rollup(cursor):
+    """The hour-of-day rollup and the triggers that maintain it.
+
+    One row per date and hour holds the work seconds and the breaks that
+    fell due, were completed or were skipped in that hour. ``weekday``
+    follows strftime('%w'): 0 is Sunday. Breaks count in the hour they
+    started. A session's work time counts in the hour of the checkpoint
+    that recorded it, with the part from before that hour started going to
+    the previous hour.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS hourly_rollup (
+        date TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,
+        work_seconds INTEGER DEFAULT 0,
+        breaks_due INTEGER DEFAULT 0,
+        breaks_completed INTEGER DEFAULT 0,
+        breaks_skipped INTEGER DEFAULT 0,
+        PRIMARY KEY (date, hour)
+    )
+    ''')
+    
+    # Work time of a checkpoint: the seconds since the checkpoint's hour
+    # began go to that hour, anything older to the hour before it
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS sessions_hourly_rollup_update
+    AFTER UPDATE OF duration_seconds ON sessions
+    WHEN COALESCE(NEW.duration_seconds, 0) != COALESCE(OLD.duration_seconds, 0)
+    BEGIN
+        INSERT INTO hourly_rollup (date, hour, weekday, work_seconds)
+        SELECT substr(t, 1, 10), CAST(substr(t, 12, 2) AS INTEGER), CAST(strftime('%w', t) AS INTEGER),
+               CASE WHEN delta > into_hour THEN into_hour ELSE delta END
+        FROM (
+            SELECT t, delta, CAST(strftime('%s', t) AS INTEGER) % 3600 AS into_hour
+            FROM (
+                SELECT datetime(COALESCE(NEW.last_checkpoint, NEW.end_time, NEW.start_time)) AS t,
+                       COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0) AS delta
+            )
+        )
+        WHERE true
+        ON CONFLICT(date, hour) DO UPDATE SET
+            work_seconds = work_seconds + excluded.work_seconds;
+        
+        INSERT INTO hourly_rollup (date, hour, weekday, work_seconds)
+        SELECT substr(p, 1, 10), CAST(substr(p, 12, 2) AS INTEGER), CAST(strftime('%w', p) AS INTEGER),
+               delta - into_hour
+        FROM (
+            SELECT datetime(t, '-1 hour') AS p, delta, CAST(strftime('%s', t) AS INTEGER) % 3600 AS into_hour
+            FROM (
+                SELECT datetime(COALESCE(NEW.last_checkpoint, NEW.end_time, NEW.start_time)) AS t,
+                       COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0) AS delta
+            )
+        )
+        WHERE delta > into_hour
+        ON CONFLICT(date, hour) DO UPDATE SET
+            work_seconds = work_seconds + excluded.work_seconds;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS breaks_hourly_rollup_insert
+    AFTER INSERT ON breaks
+    BEGIN
+        INSERT INTO hourly_rollup (date, hour, weekday, breaks_due, breaks_completed)
+        VALUES (
+            substr(datetime(NEW.start_time), 1, 10),
+            CAST(substr(datetime(NEW.start_time), 12, 2) AS INTEGER),
+            CAST(strftime('%w', NEW.start_time) AS INTEGER),
+            1,
+            COALESCE(NEW.completed, 0)
+        )
+        ON CONFLICT(date, hour) DO UPDATE SET
+            breaks_due = breaks_due + 1,
+            breaks_completed = breaks_completed + excluded.breaks_completed;
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS breaks_hourly_rollup_complete
+    AFTER UPDATE OF completed ON breaks
+    WHEN NEW.completed IS NOT OLD.completed
+    BEGIN
+        UPDATE hourly_rollup SET
+            breaks_completed = breaks_completed
+                + COALESCE(NEW.completed, 0) - COALESCE(OLD.completed, 0)
+        WHERE date = substr(datetime(NEW.start_time), 1, 10)
+          AND hour = CAST(substr(datetime(NEW.start_time), 12, 2) AS INTEGER);
+    END
+    ''')
+    
+    # A break that ends without being completed was skipped
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS breaks_hourly_rollup_skip
+    AFTER UPDATE OF duration_seconds ON breaks
+    WHEN OLD.duration_seconds IS NULL AND NEW.duration_seconds IS NOT NULL
+         AND COALESCE(NEW.completed, 0) = 0
+    BEGIN
+        UPDATE hourly_rollup SET breaks_skipped = breaks_skipped + 1
+        WHERE date = substr(datetime(NEW.start_time), 1, 10)
+          AND hour = CAST(substr(datetime(NEW.start_time), 12, 2) AS INTEGER);
+    END
+    ''')
+
+
+def _backfill_hourly_rollup(cursor, watermark, until):
+    """Rebuild the rollup of history from the raw rows.
+
+    Sessions recorded before the rollup existed count in the hour they
+    started. Rollup rows of the dates in the chunk are replaced.
+    """
+    chunk = _next_chunk(cursor, watermark, until)
+    if chunk is None:
+        return None
+    lower, upper = chunk
+    cursor.execute('''
+    DELETE FROM hourly_rollup WHERE date IN (
+        SELECT substr(start_time, 1, 10) FROM sessions WHERE start_time >= ? AND start_time < ?
+        UNION
+        SELECT substr(start_time, 1, 10) FROM breaks WHERE start_time >= ? AND start_time < ?
+    )
+    ''', (lower, upper, lower, upper))
+    cursor.execute('''
+    INSERT INTO hourly_rollup
+    (date, hour, weekday, work_seconds, breaks_due, breaks_completed, breaks_skipped)
+    SELECT substr(t, 1, 10), CAST(substr(t, 12, 2) AS INTEGER), CAST(strftime('%w', t) AS INTEGER),
+           SUM(work_seconds), SUM(due), SUM(done), SUM(skipped)
+    FROM (
+        SELECT datetime(start_time) AS t, COALESCE(duration_seconds, 0) AS work_seconds,
+               0 AS due, 0 AS done, 0 AS skipped
+        FROM sessions
+        WHERE start_time >= ? AND start_time < ?
+        UNION ALL
+        SELECT datetime(start_time), 0, 1, COALESCE(completed, 0),
+               CASE WHEN COALESCE(completed, 0) = 0 AND duration_seconds IS NOT NULL THEN 1 ELSE 0 END
+        FROM breaks
+        WHERE start_time >= ? AND start_time < ?
+    )
+    WHERE t IS NOT NULL
+    GROUP BY 1, 2
+    ON CONFLICT(date, hour) DO UPDATE SET
+        work_seconds = excluded.work_seconds,
+        breaks_due = excluded.breaks_due,
+        breaks_completed = excluded.breaks_completed,
+        breaks_skipped = excluded.breaks_skipped
+    ''', (lower, upper, lower, upper))
+    return upper
+
+
+def _activity_days(cursor):
+    """Daily activity totals for minutes past the retention window."""
+    # Activity days table - activity minutes past the retention window,
+    # folded into one row per day
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS activity_days (
+        date TEXT PRIMARY KEY,
+        active_minutes INTEGER DEFAULT 0,
+        key_presses INTEGER DEFAULT 0,
+        mouse_clicks INTEGER DEFAULT 0,
+        mouse_scrolls INTEGER DEFAULT 0,
+        mouse_moves INTEGER DEFAULT 0
+    )
+    ''')
+
+
+def _upload_state(cursor):
+    """Watermarks of the optional fleet uploader."""
+    # Upload state table - how far each stream has been uploaded
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS upload_state (
+        stream TEXT PRIMARY KEY,
+        watermark TEXT
+    )
+    ''')
+
+
+# Exact streak state from daily_stats: consecutive days with a completed
+# break share julianday(date) - row number (gaps and islands)
+_RECOMPUTE_STREAK = '''
+UPDATE streak_state SET
+    last_date = (SELECT MAX(date) FROM daily_stats WHERE completed_breaks > 0),
+    current_streak = COALESCE((
+        SELECT COUNT(*) FROM (
+            SELECT julianday(date) - ROW_NUMBER() OVER (ORDER BY date) AS island
+            FROM daily_stats WHERE completed_breaks > 0
+        )
+        GROUP BY island ORDER BY island DESC LIMIT 1
+    ), 0),
+    longest_streak = COALESCE((
+        SELECT MAX(days) FROM (
+            SELECT COUNT(*) AS days FROM (
+                SELECT julianday(date) - ROW_NUMBER() OVER (ORDER BY date) AS island
+                FROM daily_stats WHERE completed_breaks > 0
+            )
+            GROUP BY island
+        )
+    ), 0)
+WHERE id = 1
+'''
+
+# A date's first completed break either extends the streak ending the day
+# before or starts a new one; earlier dates need the exact recompute
+_ADVANCE_STREAK = '''
+UPDATE streak_state SET
+    current_streak = CASE WHEN last_date = date(NEW.date, '-1 day') THEN current_streak + 1 ELSE 1 END,
+    longest_streak = MAX(longest_streak,
+        CASE WHEN last_date = date(NEW.date, '-1 day') THEN current_streak + 1 ELSE 1 END),
+    last_date = NEW.date
+WHERE id = 1 AND (last_date IS NULL OR last_date < NEW.date);
+''' + _RECOMPUTE_STREAK + ''' AND last_date > NEW.date;
+'''
+
+
+def _streak_state(cursor):
+    """Current and longest streak, maintained by triggers on daily_stats.
+
+    ``current_streak`` is the run of days ending at ``last_date``; readers
+    treat it as broken once a whole day has passed without a completed
+    break, so nothing needs to run at midnight.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS streak_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_date TEXT,
+        current_streak INTEGER NOT NULL DEFAULT 0,
+        longest_streak INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO streak_state (id) VALUES (1)')
+
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS daily_stats_streak_insert
+    AFTER INSERT ON daily_stats
+    WHEN NEW.completed_breaks > 0
+    BEGIN
+        {_ADVANCE_STREAK}
+    END
+    ''')
+
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS daily_stats_streak_update
+    AFTER UPDATE OF completed_breaks ON daily_stats
+    WHEN OLD.completed_breaks <= 0 AND NEW.completed_breaks > 0
+    BEGIN
+        {_ADVANCE_STREAK}
+    END
+    ''')
+
+    # Rare: a day loses its completed breaks
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS daily_stats_streak_retract
+    AFTER UPDATE OF completed_breaks ON daily_stats
+    WHEN OLD.completed_breaks > 0 AND NEW.completed_breaks <= 0
+    BEGIN
+        {_RECOMPUTE_STREAK};
+    END
+    ''')
+
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS daily_stats_streak_delete
+    AFTER DELETE ON daily_stats
+    WHEN OLD.completed_breaks > 0
+    BEGIN
+        {_RECOMPUTE_STREAK};
+    END
+    ''')
+
+    # One row per day, so the initial state is cheap to compute here
+    cursor.execute(_RECOMPUTE_STREAK)
+
+
+# Longest stretch of work one checkpoint is spread over; anything older
+# goes to the earliest of these hours
+SPREAD_MAX_HOURS = 24 * 366
+
+
+def _spread_hourly_work(cursor):
+    """Credit a checkpoint's work time to every hour it covers.
+
+    The work time a checkpoint adds is taken to have ended at the
+    checkpoint, and each hour gets the part of it that falls inside the
+    hour. ``hour_offsets`` numbers the hours back from the checkpoint's
+    own. A negative correction goes to the checkpoint's hour.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS hour_offsets (
+        n INTEGER PRIMARY KEY
+    )
+    ''')
+    cursor.executemany(
+        'INSERT OR IGNORE INTO hour_offsets (n) VALUES (?)',
+        ((n,) for n in range(SPREAD_MAX_HOURS))
+    )
+
+    cursor.execute('DROP TRIGGER IF EXISTS sessions_hourly_rollup_update')
+    cursor.execute(f'''
+    CREATE TRIGGER sessions_hourly_rollup_update
+    AFTER UPDATE OF duration_seconds ON sessions
+    WHEN COALESCE(NEW.duration_seconds, 0) != COALESCE(OLD.duration_seconds, 0)
+    BEGIN
+        INSERT INTO hourly_rollup (date, hour, weekday, work_seconds)
+        SELECT substr(h, 1, 10), CAST(substr(h, 12, 2) AS INTEGER), CAST(strftime('%w', h) AS INTEGER), seconds
+        FROM (
+            SELECT datetime(hour_start, 'unixepoch') AS h,
+                   CASE WHEN delta <= 0 THEN delta
+                        ELSE MIN(t, hour_start + 3600) - CASE WHEN n = {SPREAD_MAX_HOURS - 1}
+                                                              THEN t - delta
+                                                              ELSE MAX(t - delta, hour_start) END
+                   END AS seconds
+            FROM (
+                SELECT t, delta, n, (t / 3600 - n) * 3600 AS hour_start
+                FROM (
+                    SELECT CAST(strftime('%s', COALESCE(NEW.last_checkpoint, NEW.end_time, NEW.start_time)) AS INTEGER) AS t,
+                           COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0) AS delta
+                ), hour_offsets
+                WHERE n <= CASE WHEN delta <= 0 THEN 0 ELSE t / 3600 - (t - delta) / 3600 END
+            )
+        )
+        WHERE seconds != 0
+        ON CONFLICT(date, hour) DO UPDATE SET
+            work_seconds = work_seconds + excluded.work_seconds;
+    END
+    ''')
+
+
+# The days a checkpoint's work time covers, split at midnight like the
+# hours of sessions_hourly_rollup_update; needs NEW and OLD of sessions
+_CHECKPOINT_DAYS = '''
+SELECT date(day_start, 'unixepoch') AS date, seconds
+FROM (
+    SELECT day_start,
+           CASE WHEN delta <= 0 THEN delta
+                ELSE MIN(t, day_start + 86400) - MAX(t - delta, day_start) END AS seconds
+    FROM (
+        SELECT t, delta, (t / 86400 - n) * 86400 AS day_start
+        FROM (
+            SELECT CAST(strftime('%s', COALESCE(NEW.last_checkpoint, NEW.end_time, NEW.start_time)) AS INTEGER) AS t,
+                   COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0) AS delta
+        ), hour_offsets
+        WHERE n <= CASE WHEN delta <= 0 THEN 0 ELSE t / 86400 - (t - delta) / 86400 END
+    )
+)
+WHERE seconds != 0
+'''
+
+
+def _daily_stats_by_checkpoint(cursor):
+    """Credit a session's work time to the days it was done on.
+
+    Work time used to go to the day the session started, so a session
+    running past midnight put everything on its first day. Now each
+    checkpoint's work time is split over the days it covers, the same way
+    hourly_rollup splits it over hours. ``session_days`` keeps each
+    session's work time per day, which is what a day's
+    ``longest_session_seconds`` is measured by.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS session_days (
+        session_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        work_seconds INTEGER DEFAULT 0,
+        PRIMARY KEY (session_id, date)
+    )
+    ''')
+
+    cursor.execute('DROP TRIGGER IF EXISTS sessions_daily_stats_update')
+    cursor.execute(f'''
+    CREATE TRIGGER sessions_daily_stats_update
+    AFTER UPDATE OF duration_seconds ON sessions
+    WHEN COALESCE(NEW.duration_seconds, 0) != COALESCE(OLD.duration_seconds, 0)
+    BEGIN
+        INSERT INTO session_days (session_id, date, work_seconds)
+        SELECT NEW.id, date, seconds FROM ({_CHECKPOINT_DAYS})
+        WHERE true
+        ON CONFLICT(session_id, date) DO UPDATE SET
+            work_seconds = work_seconds + excluded.work_seconds;
+
+        INSERT INTO daily_stats (date, total_work_seconds, longest_session_seconds)
+        SELECT days.date, days.seconds, session_days.work_seconds
+        FROM ({_CHECKPOINT_DAYS}) AS days
+        JOIN session_days ON session_days.session_id = NEW.id AND session_days.date = days.date
+        WHERE true
+        ON CONFLICT(date) DO UPDATE SET
+            total_work_seconds = total_work_seconds + excluded.total_work_seconds,
+            longest_session_seconds = MAX(longest_session_seconds, excluded.longest_session_seconds);
+    END
+    ''')
+
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS sessions_session_days_delete
+    AFTER DELETE ON sessions
+    BEGIN
+        DELETE FROM session_days WHERE session_id = OLD.id;
+    END
+    ''')
+
+
+MIGRATIONS = [
+    Migration(1, "Base schema", upgrade=_base_schema),
+    Migration(2, "start_time indexes", backfill=_create_start_time_indexes),
+    Migration(3, "Trigger-maintained daily_stats", upgrade=_daily_stats_triggers, backfill=_backfill_daily_stats),
+    Migration(4, "Hour-of-day rollup", upgrade=_hourly_rollup, backfill=_backfill_hourly_rollup),
+    Migration(5, "Downsampled activity days", upgrade=_activity_days),
+    Migration(6, "Fleet upload state", upgrade=_upload_state),
+    Migration(7, "Trigger-maintained streak", upgrade=_streak_state),
+    Migration(8, "Hourly work time spread over the hours it covers", upgrade=_spread_hourly_work),
+    Migration(9, "Daily work time credited to the days it was done on", upgrade=_daily_stats_by_checkpoint),
+]
+
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def migrate(conn):
+    """Bring the database up to SCHEMA_VERSION; return the versions applied.
+
+    ``conn`` must be in autocommit mode. Each migration commits together
+    with its new user_version, so an interrupted upgrade resumes at the
+    first migration that did not finish. Backfills are only registered
+    here; BackgroundMigrator runs them.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS migration_state (
+        version INTEGER PRIMARY KEY,
+        watermark TEXT,
+        until TEXT NOT NULL,
+        finished INTEGER DEFAULT 0
+    )
+    ''')
+
+    current = cursor.execute('PRAGMA user_version').fetchone()[0]
+    if current > SCHEMA_VERSION:
+        print(f"[WARNING] Database schema version {current} is newer than this app ({SCHEMA_VERSION})")
+        return []
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if migration.upgrade:
+                migration.upgrade(cursor)
+            if migration.backfill:
+                # The new schema maintains everything from today on; the
+                # part of today before the upgrade is left out rather than
+                # rebuilt under a backfill's coarser rules
+                until = datetime.date.today().isoformat()
+                cursor.execute('''
+                INSERT OR REPLACE INTO migration_state (version, watermark, until, finished)
+                VALUES (?, NULL, ?, 0)
+                ''', (migration.version, until))
+            cursor.execute(f'PRAGMA user_version = {migration.version}')
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+        print(f"Applied database migration {migration.version}: {migration.description}")
+        applied.append(migration.version)
+    return applied
+
+
+class BackgroundMigrator:
+    """
+    Runs the registered backfills in small chunks on a background thread.
+
+    Each chunk is one transaction on the database's writer, together with
+    its new watermark, so the app's own writes interleave with it and a
+    restart picks up after the last committed chunk.
+    """
+    step_pause = 0.05  # seconds between chunks
+
+    def __init__(self, db):
+        self.db = db
+        self.is_running = False
+        self.migrator_thread = None
+        self._stop_event = threading.Event()
+        self._migrations = {migration.version: migration for migration in MIGRATIONS}
+
+    def start(self):
+        """Start running pending backfills, if there are any."""
+        if self.is_running or not self.pending_versions():
+            return
+
+        self.is_running = True
+        self._stop_event.clear()
+        self.migrator_thread = threading.Thread(target=self._run, daemon=True)
+        self.migrator_thread.start()
+
+    def stop(self):
+        """Stop after the current chunk; the rest resumes on next start."""
+        self._stop_event.set()
+        if self.migrator_thread:
+            self.migrator_thread.join(timeout=5.0)
+        self.is_running = False
+
+    def pending_versions(self):
+        """Get the versions whose backfill has not finished yet."""
+        cursor = self.db.conn.cursor()
+        cursor.execute('SELECT version FROM migration_state WHERE finished = 0 ORDER BY version')
+        return [row['version'] for row in cursor.fetchall()]
+
+    def is_pending(self):
+        """Check whether any backfill is still outstanding."""
+        return bool(self.pending_versions())
+
+    def _run_chunk(self, version):
+        """Run one chunk of a backfill on the writer; True while more remain."""
+        migration = self._migrations[version]
+
+        def step(cursor):
+            cursor.execute(
+                'SELECT watermark, until FROM migration_state WHERE version = ? AND finished = 0',
+                (version,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            watermark = migration.backfill(cursor, row['watermark'], row['until'])
+            if watermark is None:
+                cursor.execute('UPDATE migration_state SET finished = 1 WHERE version = ?', (version,))
+                return False
+            cursor.execute('UPDATE migration_state SET watermark = ? WHERE version = ?', (watermark, version))
+            return True
+
+        return self.db.run_write(step)
+
+    def _run(self):
+        """Work through the pending backfills in version order."""
+        try:
+            for version in self.pending_versions():
+                chunks = 0
+                while not self._stop_event.is_set():
+                    try:
+                        more = self._run_chunk(version)
+                    except Exception as e:
+                        print(f"Database migration {version} failed, will retry on next start: {e}")
+                        return
+                    chunks += 1
+                    if not more:
+                        print(f"Finished database migration {version} in {chunks} chunks")
+                        break
+                    self._stop_event.wait(self.step_pause)
+                if self._stop_event.is_set():
+                    return
+        except Exception as e:
+            print(f"Error in background migration: {e}")
+        finally:
+            self.is_running = False
@@ -94,8 +94,40 @@ class DailyStats:
             return 0.0
         return (self.completed_breaks / self.total_breaks) * 100.0
 
+class TodayStats:
+    """Snapshot of what the dashboard shows: today's totals and the streak."""
+    def __init__(self, stats: DailyStats, current_streak: int = 0, longest_streak: int = 0):
+        self.stats = stats
+        self.current_streak = current_streak
+        self.longest_streak = longest_streak
+
+    @property
+    def date(self) -> date:
+        """The day the snapshot is for."""
+        return self.stats.date
+
 class Settings:
-    """Application settings."""
+    """Application settings.
+    
+    Instances handed out by SettingsStore are snapshots: they are replaced
+    on every update and must not be modified.
+    """
+    # Setting names and their types, in storage order
+    FIELDS = {
+        'work_duration': int,
+        'break_duration': int,
+        'inactivity_threshold': int,
+        'notification_style': str,
+        'sound_enabled': bool,
+        'selected_sound': str,
+        'start_with_system': bool,
+        'minimize_to_tray': bool,
+        'retention_days': int,
+        'fleet_url': str,
+        'stretch_interval': int,
+        'hydration_interval': int
+    }
+    
     def __init__(
         self,
         work_duration: int = 1200,  # 20 minutes in seconds
@@ -103,7 +135,13 @@ class Settings:
         inactivity_threshold: int = 300,  # 5 minutes in seconds
         notification_style: str = "center",
         sound_enabled: bool = False,
-        selected_sound: str = "none"
+        selected_sound: str = "none",
+        start_with_system: bool = False,
+        minimize_to_tray: bool = True,
+        retention_days: int = 365,  # days of raw history to keep, 0 keeps everything
+        fleet_url: str = "",  # fleet collector to upload statistics to, empty disables uploads
+        stretch_interval: int = 0,  # seconds between stretch reminders, 0 disables them
+        hydration_interval: int = 0  # seconds between hydration reminders, 0 disables them
     ):
         self.work_duration = work_duration
         self.break_duration = break_duration
@@ -111,26 +149,50 @@ class Settings:
         self.notification_style = notification_style
         self.sound_enabled = sound_enabled
         self.selected_sound = selected_sound
+        self.start_with_system = start_with_system
+        self.minimize_to_tray = minimize_to_tray
+        self.retention_days = retention_days
+        self.fleet_url = fleet_url
+        self.stretch_interval = stretch_interval
+        self.hydration_interval = hydration_interval
+        
+    @staticmethod
+    def parse_value(name: str, value: Any) -> Any:
+        """Convert a stored (string) or Python value to the type of setting ``name``."""
+        kind = Settings.FIELDS[name]
+        if kind is bool:
+            if isinstance(value, str):
+                return value.lower() == 'true'
+            return bool(value)
+        return kind(value)
         
     @classmethod
-    def from_dict(cls, settings_dict: Dict[str, str]) -> 'Settings':
-        """Create a Settings object from a dictionary of settings."""
-        return cls(
-            work_duration=int(settings_dict.get('work_duration', 1200)),
-            break_duration=int(settings_dict.get('break_duration', 20)),
-            inactivity_threshold=int(settings_dict.get('inactivity_threshold', 300)),
-            notification_style=settings_dict.get('notification_style', 'center'),
-            sound_enabled=settings_dict.get('sound_enabled', 'false').lower() == 'true',
-            selected_sound=settings_dict.get('selected_sound', 'none')
-        )
+    def from_dict(cls, settings_dict: Dict[str, Any]) -> 'Settings':
+        """Create a Settings object from a dictionary of settings.
+        
+        Unknown keys are ignored and values that do not parse fall back to
+        the default.
+        """
+        settings = cls()
+        for name in cls.FIELDS:
+            if name in settings_dict:
+                try:
+                    setattr(settings, name, cls.parse_value(name, settings_dict[name]))
+                except (TypeError, ValueError):
+                    print(f"Invalid value for setting {name}: {settings_dict[name]!r}")
+        return settings
         
     def to_dict(self) -> Dict[str, str]:
         """Convert the Settings object to a dictionary."""
-        return {
-            'work_duration': str(self.work_duration),
-            'break_duration': str(self.break_duration),
-            'inactivity_threshold': str(self.inactivity_threshold),
-            'notification_style': self.notification_style,
-            'sound_enabled': str(self.sound_enabled).lower(),
-            'selected_sound': self.selected_sound
-        }
\ No newline at end of file
+        result = {}
+        for name, kind in self.FIELDS.items():
+            value = getattr(self, name)
+            result[name] = str(value).lower() if kind is bool else str(value)
+        return result
+    
+    def replace(self, **changes) -> 'Settings':
+        """Return a copy with some settings changed."""
+        values = {name: getattr(self, name) for name in self.FIELDS}
+        for name, value in changes.items():
+            values[name] = self.parse_value(name, value)
+        return Settings(**values)
@@ -0,0 +1,199 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from .database import Database
+from .settings_store import SettingsStore
+
+
+class Profile:
+    """One person's history database and settings."""
+    def __init__(self, name, db, settings):
+        self.name = name
+        self.db = db
+        self.settings = settings
+
+
+class ProfileManager:
+    """
+    Separate histories for the people sharing a workstation.
+
+    Each profile has its own directory under ``<base_dir>/profiles`` with
+    its own database, which also holds its settings. The ``default``
+    profile is the app's original location, so existing installs keep
+    their history.
+
+    Opened profiles stay warm: their Database (writer thread, read
+    connections, statement caches) and settings snapshot are kept, so
+    switching back is a lookup. Past ``max_open`` profiles the least
+    recently used inactive one is closed.
+
+    ``get_aggregate_stats()`` reads daily stats across profiles by
+    attaching their database files read-only to one scratch connection.
+    """
+    DEFAULT = 'default'
+    max_open = 4  # profiles kept open at once
+    attach_limit = 10  # SQLite's default limit on attached databases
+
+    _name_pattern = re.compile(r'^[A-Za-z0-9][A-Za-z0-9 _.-]{0,63}$')
+
+    def __init__(self, base_dir=None):
+        self.base_dir = Path(base_dir or Path.home() / ".eyecare_app").expanduser().resolve()
+        self.profiles_dir = self.base_dir / "profiles"
+        self.active = None
+        self._open = OrderedDict()  # name -> Profile, least recently used first
+        self._lock = threading.RLock()
+        self._subscribers = []
+
+    def validate_name(self, name):
+        """Check that ``name`` is usable as a profile directory name."""
+        if not isinstance(name, str) or not self._name_pattern.match(name) or name.strip() != name:
+            raise ValueError(f"Invalid profile name: {name!r}")
+        return name
+
+    def get_profile_dir(self, name):
+        """Get the directory of a profile."""
+        if name == self.DEFAULT:
+            return self.base_dir
+        return self.profiles_dir / self.validate_name(name)
+
+    def get_db_path(self, name):
+        """Get the database file of a profile."""
+        return self.get_profile_dir(name) / "eyecare.db"
+
+    def list_profiles(self):
+        """Get the names of all profiles, the default one first."""
+        names = []
+        if self.profiles_dir.is_dir():
+            names = sorted(
+                entry.name for entry in self.profiles_dir.iterdir()
+                if (entry / "eyecare.db").exists() and self._name_pattern.match(entry.name)
+            )
+        return [self.DEFAULT] + [name for name in names if name != self.DEFAULT]
+
+    def open(self, name):
+        """Get a profile, opening (and creating) it if needed."""
+        with self._lock:
+            profile = self._open.get(name)
+            if profile is not None:
+                self._open.move_to_end(name)
+                return profile
+
+            db_path = self.get_db_path(name)
+            db = Database(db_path)
+            profile = Profile(name, db, SettingsStore(db))
+            self._open[name] = profile
+            self._evict()
+            return profile
+
+    def _evict(self):
+        """Close the least recently used profiles beyond max_open."""
+        while len(self._open) > self.max_open:
+            for name, profile in self._open.items():
+                if profile is not self.active:
+                    self.close(name)
+                    break
+            else:
+                return
+
+    def switch(self, name):
+        """Make ``name`` the active profile and notify subscribers."""
+        with self._lock:
+            previous = self.active
+            profile = self.open(name)
+            self.active = profile
+            subscribers = list(self._subscribers)
+
+        if profile is not previous:
+            for callback in subscribers:
+                try:
+                    callback(profile, previous)
+                except Exception as e:
+                    print(f"Error in profile subscriber: {e}")
+        return profile
+
+    def subscribe(self, callback):
+        """Call ``callback(profile, previous)`` after every profile switch."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop notifying ``callback``."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def close(self, name):
+        """Flush and close one open profile."""
+        with self._lock:
+            profile = self._open.pop(name, None)
+            if profile is self.active:
+                self.active = None
+        if profile is not None:
+            profile.db.close()
+
+    def close_all(self):
+        """Flush and close every open profile."""
+        with self._lock:
+            names = list(self._open)
+        for name in names:
+            self.close(name)
+
+    def get_aggregate_stats(self, start_date=None, end_date=None, names=None):
+        """Get daily stats summed over profiles, one dict per date.
+
+        Each date reports how many profiles have data for it. Open
+        profiles are flushed first so queued writes are included.
+        """
+        lower, upper = Database._date_bounds(start_date, end_date)
+        paths = []
+        for name in names or self.list_profiles():
+            path = Database.resolve_path(self.get_db_path(name))
+            if path.exists():
+                paths.append(path)
+        with self._lock:
+            open_profiles = list(self._open.values())
+        for profile in open_profiles:
+            if profile.db.db_path in paths:
+                profile.db.flush()
+
+        totals = {}
+        conn = sqlite3.connect('file::memory:', uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            for i in range(0, len(paths), self.attach_limit):
+                group = paths[i:i + self.attach_limit]
+                for n, path in enumerate(group):
+                    conn.execute(f'ATTACH DATABASE ? AS p{n}', (path.as_uri() + '?mode=ro',))
+                try:
+                    union = ' UNION ALL '.join(
+                        f'SELECT * FROM p{n}.daily_stats WHERE date >= ? AND date < ?'
+                        for n in range(len(group))
+                    )
+                    rows = conn.execute(f'''
+                    SELECT date, COUNT(*) AS profiles,
+                           SUM(total_work_seconds) AS total_work_seconds,
+                           SUM(total_breaks) AS total_breaks,
+                           SUM(completed_breaks) AS completed_breaks,
+                           MAX(longest_session_seconds) AS longest_session_seconds
+                    FROM ({union})
+                    GROUP BY date
+                    ''', (lower, upper) * len(group)).fetchall()
+                finally:
+                    conn.rollback()
+                    for n in range(len(group)):
+                        conn.execute(f'DETACH DATABASE p{n}')
+
+                for row in rows:
+                    day = totals.setdefault(row['date'], dict.fromkeys(row.keys(), 0))
+                    day['date'] = row['date']
+                    for key in ('profiles', 'total_work_seconds', 'total_breaks', 'completed_breaks'):
+                        day[key] += row[key] or 0
+                    day['longest_session_seconds'] = max(day['longest_session_seconds'], row['longest_session_seconds'] or 0)
+        finally:
+            conn.close()
+
+        return [totals[date] for date in sorted(totals)]
@@ -0,0 +1,108 @@
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from .models import Settings
+
+
+class SettingsStore:
+    """
+    The one place the app reads and writes settings.
+
+    Settings are loaded once into a typed ``Settings`` snapshot, so reading
+    one is an attribute access. ``update()`` (or several updates inside
+    ``batch()``) builds a new snapshot, queues one database write for the
+    settings that changed, and then calls every subscriber with the new
+    snapshot and the changed names. The write goes through the database's
+    write-behind journal, so updating never waits on the disk.
+
+    The database's settings table is the only copy of the settings.
+
+    Subscribers run on the thread that made the update; UI code should
+    hop to the GUI thread itself.
+    """
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.RLock()
+        self._subscribers: List[Callable] = []
+        self._batch = None
+        self._settings = Settings.from_dict(db.get_all_settings())
+
+    @property
+    def settings(self) -> Settings:
+        """The current settings snapshot."""
+        return self._settings
+
+    def get(self, name):
+        """Get the current value of one setting."""
+        return getattr(self._settings, name)
+
+    def subscribe(self, callback: Callable[[Settings, List[str]], None]):
+        """Call ``callback(settings, changed_names)`` after every change."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop notifying ``callback``."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def update(self, **changes):
+        """Change one or more settings.
+
+        Inside ``batch()`` the changes are collected and applied when the
+        batch ends. Values are validated right away either way.
+        """
+        for name, value in changes.items():
+            Settings.parse_value(name, value)
+        with self._lock:
+            if self._batch is not None:
+                self._batch.update(changes)
+                return
+        self._apply(changes)
+
+    @contextmanager
+    def batch(self):
+        """Group updates into a single write and notification.
+
+        Nothing is applied if the block raises.
+        """
+        with self._lock:
+            outer = self._batch is None
+            if outer:
+                self._batch = {}
+        try:
+            yield self
+        except BaseException:
+            if outer:
+                with self._lock:
+                    self._batch = None
+            raise
+        if outer:
+            with self._lock:
+                changes, self._batch = self._batch, None
+            self._apply(changes)
+
+    def _apply(self, changes: Dict):
+        """Persist a set of changes and notify subscribers."""
+        if not changes:
+            return
+        with self._lock:
+            old = self._settings
+            new = old.replace(**changes)
+            old_values, new_values = old.to_dict(), new.to_dict()
+            changed = [name for name in Settings.FIELDS if new_values[name] != old_values[name]]
+            if not changed:
+                return
+
+            self.db.set_settings({name: new_values[name] for name in changed})
+            self._settings = new
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(new, changed)
+            except Exception as e:
+                print(f"Error in settings subscriber: {e}")
@@ -0,0 +1,79 @@
+import datetime
+import threading
+
+from .models import DailyStats, TodayStats
+
+
+class TodayStatsModel:
+    """
+    Today's totals and the current streak, kept in memory for the dashboard.
+
+    The model reloads after every write batch the database commits and
+    publishes the new ``TodayStats`` snapshot to its subscribers, so
+    readers take ``snapshot`` and never query. With no writes there are no
+    queries; the only other reload is the first one after midnight, which
+    the owner triggers when ``is_stale()`` says so.
+
+    Subscribers are called with the snapshot on the thread that reloaded,
+    usually the database's writer thread.
+    """
+    def __init__(self, db, today=None):
+        self.db = db
+        self.today = today or datetime.date.today
+        self.reload_count = 0
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._snapshot = None
+        self.db.add_commit_listener(self.reload)
+        self.reload()
+
+    @property
+    def snapshot(self) -> TodayStats:
+        """The latest snapshot."""
+        return self._snapshot
+
+    def is_stale(self):
+        """Check whether the snapshot is for a day that has ended."""
+        return self._snapshot.date != self.today()
+
+    def set_database(self, db):
+        """Follow another database, e.g. after a profile switch."""
+        self.db.remove_commit_listener(self.reload)
+        self.db = db
+        self.db.add_commit_listener(self.reload)
+        self.reload()
+
+    def close(self):
+        """Stop following the database."""
+        self.db.remove_commit_listener(self.reload)
+
+    def subscribe(self, callback):
+        """Call ``callback(snapshot)`` after every reload."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop notifying ``callback``."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def reload(self):
+        """Read today's stats and the streak and publish them."""
+        day = self.today()
+        row = self.db.get_daily_stats(day.isoformat())
+        stats = DailyStats.from_db_row(row) if row else DailyStats(day)
+        streak = self.db.get_streak(day)
+        snapshot = TodayStats(stats, streak['current_streak'], streak['longest_streak'])
+
+        with self._lock:
+            self._snapshot = snapshot
+            self.reload_count += 1
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error in today stats subscriber: {e}")
+        return snapshot
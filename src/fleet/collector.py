@@ -0,0 +1,371 @@
+"""
+Fleet statistics collector.
+
+A small HTTP server that receives the uploads of ``FleetUploader`` from
+many workstations and stores them in its own SQLite database. Request
+threads only decode and validate; one ingest thread writes whatever has
+arrived in a single transaction and then acknowledges every upload in it
+(group commit), so thousands of clients a minute cost a handful of
+commits per second.
+
+Runs entirely on one machine, e.g. for a load test::
+
+    python -m fleet.collector --db fleet.db --port 8765
+    python -m fleet.loadtest --url http://127.0.0.1:8765/upload --clients 2000
+"""
+import sys
+import json
+import zlib
+import queue
+import sqlite3
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from .uploader import PROTOCOL_VERSION
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # listen backlog; the default of 5 drops bursts
+
+
+class _Upload:
+    """One decoded upload waiting for the ingest thread."""
+    def __init__(self, payload):
+        self.payload = payload
+        self.done = threading.Event()
+        self.error = None
+
+
+class CollectorStore:
+    """The collector's SQLite database."""
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = self._open()
+        self.conn.executescript('''
+        CREATE TABLE IF NOT EXISTS clients (
+            client_id TEXT PRIMARY KEY,
+            first_seen TEXT NOT NULL,
+            last_seen TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS client_breaks (
+            client_id TEXT NOT NULL,
+            break_id INTEGER NOT NULL,
+            start_time TEXT NOT NULL,
+            duration_seconds INTEGER,
+            completed BOOLEAN DEFAULT 0,
+            PRIMARY KEY (client_id, break_id)
+        );
+        CREATE TABLE IF NOT EXISTS client_daily_stats (
+            client_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total_work_seconds INTEGER DEFAULT 0,
+            total_breaks INTEGER DEFAULT 0,
+            completed_breaks INTEGER DEFAULT 0,
+            longest_session_seconds INTEGER DEFAULT 0,
+            PRIMARY KEY (client_id, date)
+        );
+        CREATE INDEX IF NOT EXISTS idx_client_daily_stats_date ON client_daily_stats(date);
+        ''')
+
+    def _open(self):
+        """Open a connection in WAL mode."""
+        conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def ingest(self, payloads):
+        """Write a group of uploads in one transaction."""
+        clients, breaks, stats = [], [], []
+        for payload in payloads:
+            client_id = payload['client_id']
+            clients.append((client_id, payload['sent_at'], payload['sent_at']))
+            breaks.extend(
+                (client_id, b['id'], b['start_time'], b['duration_seconds'], int(bool(b['completed'])))
+                for b in payload['breaks']
+            )
+            stats.extend(
+                (client_id, s['date'], s['total_work_seconds'], s['total_breaks'],
+                 s['completed_breaks'], s['longest_session_seconds'])
+                for s in payload['daily_stats']
+            )
+
+        cursor = self.conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            cursor.executemany('''
+            INSERT INTO clients (client_id, first_seen, last_seen) VALUES (?, ?, ?)
+            ON CONFLICT(client_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)
+            ''', clients)
+            cursor.executemany('''
+            INSERT OR REPLACE INTO client_breaks
+            (client_id, break_id, start_time, duration_seconds, completed)
+            VALUES (?, ?, ?, ?, ?)
+            ''', breaks)
+            cursor.executemany('''
+            INSERT OR REPLACE INTO client_daily_stats
+            (client_id, date, total_work_seconds, total_breaks, completed_breaks, longest_session_seconds)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', stats)
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+
+    def get_compliance(self, start_date=None, end_date=None, conn=None):
+        """Get organization-level break compliance for a date range."""
+        conn = conn or self.conn
+        lower = start_date or ''
+        upper = end_date or '9999-12-31'
+        row = conn.execute('''
+        SELECT COUNT(DISTINCT client_id) AS clients,
+               COALESCE(SUM(total_work_seconds), 0) AS work_seconds,
+               COALESCE(SUM(total_breaks), 0) AS breaks,
+               COALESCE(SUM(completed_breaks), 0) AS completed_breaks
+        FROM client_daily_stats
+        WHERE date >= ? AND date <= ?
+        ''', (lower, upper)).fetchone()
+        result = dict(row)
+        result['compliance'] = result['completed_breaks'] / result['breaks'] if result['breaks'] else None
+        return result
+
+    def close(self):
+        """Close the database."""
+        self.conn.close()
+
+
+def validate_payload(payload):
+    """Check the shape of an upload; raise ValueError if it is malformed."""
+    if not isinstance(payload, dict) or payload.get('version') != PROTOCOL_VERSION:
+        raise ValueError("unsupported payload version")
+    if not isinstance(payload.get('client_id'), str) or not payload['client_id']:
+        raise ValueError("missing client_id")
+    if not isinstance(payload.get('sent_at'), str):
+        raise ValueError("missing sent_at")
+    for key, fields in (
+        ('breaks', ('id', 'start_time', 'duration_seconds', 'completed')),
+        ('daily_stats', ('date', 'total_work_seconds', 'total_breaks', 'completed_breaks', 'longest_session_seconds'))
+    ):
+        rows = payload.get(key)
+        if not isinstance(rows, list):
+            raise ValueError(f"missing {key}")
+        for row in rows:
+            if not isinstance(row, dict) or any(field not in row for field in fields):
+                raise ValueError(f"malformed {key} row")
+
+
+class FleetCollector:
+    """
+    HTTP collector with a group-committing ingest thread.
+
+    ``POST /upload`` takes a (optionally gzip-compressed) JSON upload and
+    answers 200 once it is committed, so the uploader only advances its
+    watermarks for data that is safely stored. ``GET /stats`` returns the
+    compliance numbers for ``?from=YYYY-MM-DD&to=YYYY-MM-DD``.
+    """
+    max_body_bytes = 8 * 1024 * 1024  # compressed request size limit
+    max_payload_bytes = 64 * 1024 * 1024  # decompressed size limit
+    max_batch = 1000  # uploads per ingest transaction
+    queue_size = 10000  # uploads waiting for ingest before clients get 503
+    ack_timeout = 30.0  # seconds a request waits for its commit
+
+    def __init__(self, db_path, host='127.0.0.1', port=8765):
+        self.store = CollectorStore(db_path)
+        self.uploads_ingested = 0
+        self.batches_committed = 0
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._stop_event = threading.Event()
+        self._local = threading.local()
+        self.server = _Server((host, port), self._make_handler())
+        self.ingest_thread = None
+        self.server_thread = None
+
+    @property
+    def address(self):
+        """(host, port) the server is listening on."""
+        return self.server.server_address[:2]
+
+    def start(self):
+        """Serve in background threads."""
+        self._stop_event.clear()
+        self.ingest_thread = threading.Thread(target=self._ingest_loop, daemon=True)
+        self.ingest_thread.start()
+        self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_thread.start()
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._stop_event.clear()
+        self.ingest_thread = threading.Thread(target=self._ingest_loop, daemon=True)
+        self.ingest_thread.start()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop serving, ingest what is queued and close the store."""
+        if self._stop_event.is_set():
+            return
+        if self.server_thread:
+            self.server.shutdown()
+        self.server.server_close()
+        self._stop_event.set()
+        if self.ingest_thread:
+            self.ingest_thread.join(timeout=self.ack_timeout)
+        self.store.close()
+
+    def submit(self, payload):
+        """Queue a validated upload and wait until it is committed."""
+        upload = _Upload(payload)
+        self._queue.put_nowait(upload)  # queue.Full when overloaded
+        if not upload.done.wait(self.ack_timeout):
+            raise TimeoutError("ingest timed out")
+        if upload.error is not None:
+            raise upload.error
+
+    def _ingest_loop(self):
+        """Commit everything that has arrived in one transaction, then acknowledge it."""
+        while True:
+            try:
+                first = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                continue
+
+            group = [first]
+            while len(group) < self.max_batch:
+                try:
+                    group.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self.store.ingest([upload.payload for upload in group])
+                self.uploads_ingested += len(group)
+                self.batches_committed += 1
+            except Exception as e:
+                # Replay one by one so a bad upload only fails itself
+                print(f"Error ingesting fleet uploads, retrying individually: {e}")
+                for upload in group:
+                    try:
+                        self.store.ingest([upload.payload])
+                        self.uploads_ingested += 1
+                        self.batches_committed += 1
+                    except Exception as e:
+                        upload.error = e
+            for upload in group:
+                upload.done.set()
+
+    def _read_conn(self):
+        """A read connection private to the calling request thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.store._open()
+            conn.execute('PRAGMA query_only = ON')
+            self._local.conn = conn
+        return conn
+
+    def _decode(self, body, encoding):
+        """Decompress and parse a request body."""
+        if encoding == 'gzip':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            body = decompressor.decompress(body, self.max_payload_bytes)
+            if decompressor.unconsumed_tail:
+                raise ValueError("payload too large")
+        elif encoding not in (None, '', 'identity'):
+            raise ValueError(f"unsupported encoding {encoding}")
+        payload = json.loads(body)
+        validate_payload(payload)
+        return payload
+
+    def _make_handler(self):
+        """Build the request handler class bound to this collector."""
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass  # one line per upload would drown everything else
+
+            def _reply(self, status, body=None):
+                data = json.dumps(body if body is not None else {}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if urlparse(self.path).path != '/upload':
+                    return self._reply(404, {'error': 'not found'})
+                length = int(self.headers.get('Content-Length') or 0)
+                if length <= 0 or length > collector.max_body_bytes:
+                    self.close_connection = True
+                    return self._reply(413, {'error': 'body missing or too large'})
+                body = self.rfile.read(length)
+
+                try:
+                    payload = collector._decode(body, self.headers.get('Content-Encoding'))
+                except (ValueError, zlib.error) as e:
+                    return self._reply(400, {'error': str(e)})
+
+                try:
+                    collector.submit(payload)
+                except queue.Full:
+                    return self._reply(503, {'error': 'overloaded'})
+                except Exception as e:
+                    return self._reply(500, {'error': str(e)})
+                self._reply(200, {
+                    'breaks': len(payload['breaks']),
+                    'daily_stats': len(payload['daily_stats'])
+                })
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == '/health':
+                    return self._reply(200, {
+                        'status': 'ok',
+                        'queued': collector._queue.qsize(),
+                        'uploads_ingested': collector.uploads_ingested,
+                        'batches_committed': collector.batches_committed
+                    })
+                if url.path == '/stats':
+                    query = parse_qs(url.query)
+                    stats = collector.store.get_compliance(
+                        query.get('from', [None])[0],
+                        query.get('to', [None])[0],
+                        conn=collector._read_conn()
+                    )
+                    return self._reply(200, stats)
+                self._reply(404, {'error': 'not found'})
+
+        return Handler
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m fleet.collector", description="Run the fleet statistics collector.")
+    parser.add_argument('--db', default='fleet.db', help="collector database file (default: fleet.db)")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    args = parser.parse_args(argv)
+
+    collector = FleetCollector(args.db, args.host, args.port)
+    host, port = collector.address
+    print(f"Fleet collector listening on http://{host}:{port}/upload")
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Load test for the fleet collector.
+
+Sends one synthetic upload per simulated workstation, from a pool of
+concurrent senders, and reports throughput and latency::
+
+    python -m fleet.loadtest --url http://127.0.0.1:8765/upload --clients 2000
+"""
+import sys
+import time
+import uuid
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .uploader import PROTOCOL_VERSION, encode_payload, post_payload
+
+
+def make_payload(days=7, breaks_per_day=24):
+    """Build a plausible upload for one workstation."""
+    today = datetime.date.today()
+    breaks, daily_stats = [], []
+    break_id = 0
+    for offset in range(days, 0, -1):
+        day = today - datetime.timedelta(days=offset)
+        completed = 0
+        for n in range(breaks_per_day):
+            break_id += 1
+            done = n % 4 != 0
+            completed += done
+            breaks.append({
+                'id': break_id,
+                'start_time': f"{day.isoformat()}T{8 + n // 3:02d}:{(n % 3) * 20:02d}:00",
+                'duration_seconds': 20 if done else 5,
+                'completed': done
+            })
+        daily_stats.append({
+            'date': day.isoformat(),
+            'total_work_seconds': breaks_per_day * 1200,
+            'total_breaks': breaks_per_day,
+            'completed_breaks': completed,
+            'longest_session_seconds': 3600
+        })
+    return {
+        'version': PROTOCOL_VERSION,
+        'client_id': uuid.uuid4().hex,
+        'sent_at': datetime.datetime.now().isoformat(),
+        'breaks': breaks,
+        'daily_stats': daily_stats
+    }
+
+
+def run(url, clients, concurrency=32, days=7):
+    """Send ``clients`` uploads and return (seconds, latencies, failures)."""
+    bodies = [encode_payload(make_payload(days)) for _ in range(clients)]
+
+    def send(body):
+        start = time.perf_counter()
+        try:
+            ok = post_payload(url, body) == 200
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, bodies))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for ok, latency in results if ok)
+    return elapsed, latencies, sum(1 for ok, _ in results if not ok)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m fleet.loadtest", description="Load test a fleet collector.")
+    parser.add_argument('--url', default='http://127.0.0.1:8765/upload', help="collector upload URL")
+    parser.add_argument('--clients', type=int, default=1000, help="simulated workstations (default: 1000)")
+    parser.add_argument('--concurrency', type=int, default=32, help="concurrent senders (default: 32)")
+    parser.add_argument('--days', type=int, default=7, help="days of history per upload (default: 7)")
+    args = parser.parse_args(argv)
+
+    elapsed, latencies, failures = run(args.url, args.clients, args.concurrency, args.days)
+    print(f"{args.clients} uploads in {elapsed:.2f}s ({args.clients / elapsed * 60:.0f} per minute), {failures} failed")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"latency p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
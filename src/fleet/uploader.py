@@ -0,0 +1,200 @@
+import gzip
+import json
+import time
+import uuid
+import random
+import datetime
+import threading
+import urllib.request
+
+
+PROTOCOL_VERSION = 1
+
+
+def encode_payload(payload):
+    """Serialize an upload payload to gzip-compressed JSON."""
+    return gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+
+
+def post_payload(url, body, timeout=10.0):
+    """POST a compressed payload; return the HTTP status."""
+    request = urllib.request.Request(
+        url,
+        data=body,
+        method='POST',
+        headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip'
+        }
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read()
+        return response.status
+
+
+class FleetUploader:
+    """
+    Ships this workstation's statistics to a fleet collector.
+
+    Daily stats and finished breaks that have not been uploaded yet are
+    read in batches, sent as one gzip-compressed JSON document and only
+    marked as uploaded once the collector confirms the write. Watermarks
+    live in the ``upload_state`` table, so nothing is sent twice or lost
+    across restarts:
+
+    - breaks are sent in id order; a break is held back until it has
+      finished, or is older than ``settle_seconds`` (the app may have
+      exited during it)
+    - daily stats are re-sent from the last uploaded date on, since the
+      current day keeps changing, and so are the last ``resend_days``
+      days: a session running past midnight or a break finished after it
+      still changes the days before; the collector replaces them
+
+    Failed uploads are retried with exponential backoff and jitter,
+    starting at ``retry_delay`` and capped at ``max_retry_delay``.
+    """
+    upload_interval = 15 * 60  # seconds between uploads
+    batch_size = 500  # rows per stream in one upload
+    settle_seconds = 60 * 60  # age after which an unfinished break is sent anyway
+    resend_days = 7  # past days of daily stats sent again with every upload
+    retry_delay = 5.0  # seconds before the first retry
+    max_retry_delay = 30 * 60  # seconds
+    request_timeout = 10.0  # seconds
+
+    def __init__(self, db, url, client_id=None):
+        self.db = db
+        self.url = url
+        self.client_id = client_id
+        self.is_running = False
+        self.upload_thread = None
+        self.failures = 0
+        self.last_upload = None  # (time, breaks, daily stats) of the last successful upload
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start uploading in the background."""
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self._stop_event.clear()
+        self.upload_thread = threading.Thread(target=self._upload_loop, daemon=True)
+        self.upload_thread.start()
+
+    def stop(self):
+        """Stop after the current upload."""
+        self.is_running = False
+        self._stop_event.set()
+        if self.upload_thread:
+            self.upload_thread.join(timeout=self.request_timeout + 1.0)
+
+    def _upload_loop(self):
+        """Upload until caught up, then every upload_interval; back off on failures."""
+        while not self._stop_event.is_set():
+            try:
+                sent = self.upload_once()
+                self.failures = 0
+                # A full batch means there is more waiting
+                delay = 0 if sent >= self.batch_size else self.upload_interval
+            except Exception as e:
+                self.failures += 1
+                delay = self._retry_delay()
+                print(f"Fleet upload failed (attempt {self.failures}, retrying in {delay:.0f}s): {e}")
+            self._stop_event.wait(delay)
+
+    def _retry_delay(self):
+        """Exponential backoff with full jitter."""
+        ceiling = min(self.retry_delay * 2 ** (self.failures - 1), self.max_retry_delay)
+        return random.uniform(self.retry_delay, max(self.retry_delay, ceiling))
+
+    def _get_state(self, stream):
+        """Get the watermark of an upload stream."""
+        row = self.db.conn.execute(
+            'SELECT watermark FROM upload_state WHERE stream = ?', (stream,)
+        ).fetchone()
+        return row['watermark'] if row else None
+
+    def _get_client_id(self):
+        """Get this workstation's client id, creating it on first use."""
+        if self.client_id is None:
+            self.client_id = self._get_state('client_id')
+        if self.client_id is None:
+            self.client_id = uuid.uuid4().hex
+            self.db.run_write(lambda cursor: cursor.execute(
+                'INSERT OR IGNORE INTO upload_state (stream, watermark) VALUES (?, ?)',
+                ('client_id', self.client_id)
+            ))
+        return self.client_id
+
+    def collect(self):
+        """Read the next batch; return (payload, new watermarks)."""
+        conn = self.db.conn
+        break_watermark = int(self._get_state('breaks') or 0)
+        stats_watermark = self._get_state('daily_stats') or ''
+        resend_from = (datetime.date.today() - datetime.timedelta(days=self.resend_days)).isoformat()
+        stats_watermark = min(stats_watermark, resend_from)
+        settle_cutoff = (datetime.datetime.now() - datetime.timedelta(seconds=self.settle_seconds)).isoformat()
+
+        breaks = []
+        rows = conn.execute('''
+        SELECT id, start_time, duration_seconds, completed
+        FROM breaks
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+        ''', (break_watermark, self.batch_size)).fetchall()
+        for row in rows:
+            if row['duration_seconds'] is None and row['start_time'] >= settle_cutoff:
+                break  # still running; later breaks wait for it
+            breaks.append({
+                'id': row['id'],
+                'start_time': row['start_time'],
+                'duration_seconds': row['duration_seconds'],
+                'completed': bool(row['completed'])
+            })
+
+        daily_stats = [
+            dict(row) for row in conn.execute('''
+            SELECT date, total_work_seconds, total_breaks, completed_breaks, longest_session_seconds
+            FROM daily_stats
+            WHERE date >= ?
+            ORDER BY date
+            LIMIT ?
+            ''', (stats_watermark, self.batch_size)).fetchall()
+        ]
+
+        payload = {
+            'version': PROTOCOL_VERSION,
+            'client_id': self._get_client_id(),
+            'sent_at': datetime.datetime.now().isoformat(),
+            'breaks': breaks,
+            'daily_stats': daily_stats
+        }
+        watermarks = {}
+        if breaks:
+            watermarks['breaks'] = str(breaks[-1]['id'])
+        if daily_stats:
+            watermarks['daily_stats'] = daily_stats[-1]['date']
+        return payload, watermarks
+
+    def upload_once(self):
+        """Upload one batch; return the row count of the larger stream.
+
+        Raises on network or server errors, leaving the watermarks alone.
+        """
+        payload, watermarks = self.collect()
+        if not payload['breaks'] and not payload['daily_stats']:
+            return 0
+
+        status = post_payload(self.url, encode_payload(payload), self.request_timeout)
+        if not 200 <= status < 300:
+            raise RuntimeError(f"Collector answered with HTTP {status}")
+
+        def advance(cursor):
+            cursor.executemany('''
+            INSERT OR REPLACE INTO upload_state (stream, watermark) VALUES (?, ?)
+            ''', list(watermarks.items()))
+        self.db.run_write(advance)
+
+        self.last_upload = (time.time(), len(payload['breaks']), len(payload['daily_stats']))
+        return max(len(payload['breaks']), len(payload['daily_stats']))
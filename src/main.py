@@ -1,59 +1,143 @@
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer
+import datetime
+import threading
 
+from core.clock import get_default_clock
 from core.timer import EyeCareTimer
+from core.scheduler import ReminderScheduler
 from core.activity_tracker import ActivityTracker
 from core.system_monitor import SystemMonitor
-from data.database import Database
-from ui.main_window import MainWindow
+from data.maintenance import DatabaseMaintenance
+from data.models import Settings
+from data.profiles import ProfileManager
+from data.settings_store import SettingsStore
+from data.today_stats import TodayStatsModel
+from fleet.uploader import FleetUploader
 
 class EyeCareApp:
-    """Main application class that coordinates all components."""
+    """Main application class that coordinates all components.
     
-    def __init__(self):
-        # Initialize database
-        self.db = Database()
+    Pass a ``VirtualClock`` with ``headless=True`` to drive the controller
+    without Qt, e.g. to replay a simulated workday. Qt and the input
+    listeners are only imported by the GUI, so a headless controller
+    needs neither them nor a display.
+    
+    History and settings belong to a profile (``profile``, else the
+    ``OPTIPAUSE_PROFILE`` environment variable, else ``default``), which
+    can be changed at runtime with ``switch_profile``. A database passed
+    in replaces the profile layer, e.g. for a simulation.
+    """
+    
+    # Optional reminders: seconds each break lasts; the interval comes from
+    # the <name>_interval setting
+    reminder_breaks = {
+        'stretch': 60,
+        'hydration': 10
+    }
+    
+    def __init__(self, clock=None, db=None, headless=False, profile=None):
+        self.clock = clock or get_default_clock()
+        self.headless = headless
+        
+        # Initialize database and load settings once
+        self.profiles = None
+        if db is None:
+            self.profiles = ProfileManager()
+            active = self.profiles.switch(profile or os.environ.get('OPTIPAUSE_PROFILE') or ProfileManager.DEFAULT)
+            self.db = active.db
+            self.settings = active.settings
+        else:
+            self.db = db
+            self.settings = SettingsStore(db)
+        settings = self.settings.settings
+        
+        # Today's totals for the dashboard, reloaded after database commits
+        self.today_stats = TodayStatsModel(self.db, today=lambda: self.clock.datetime_now().date())
+        
+        work_duration = settings.work_duration
+        break_duration = settings.break_duration
+        inactivity_threshold = settings.inactivity_threshold
+        
+        # Initialize activity tracker; the timers read its coalesced
+        # last-activity timestamp and only get called on idle -> active edges
+        self.activity_tracker = ActivityTracker(
+            on_activity=self.on_user_activity,
+            clock=self.clock
+        )
         
-        # Load settings
-        work_duration = int(self.db.get_setting('work_duration', 1200))
-        break_duration = int(self.db.get_setting('break_duration', 20))
-        inactivity_threshold = int(self.db.get_setting('inactivity_threshold', 300))
+        # Every reminder runs on this scheduler's thread: the optional
+        # schedules (stretching, hydration) and, attached to it, the
+        # eye-break timer
+        self.reminders = ReminderScheduler(
+            clock=self.clock,
+            inactivity_threshold=inactivity_threshold,
+            activity_source=self.activity_tracker.get_last_activity_time
+        )
+        self.apply_reminder_schedules(settings)
         
         # Initialize core components
         self.timer = EyeCareTimer(
             work_duration=work_duration,
             break_duration=break_duration,
             on_break_start=self.on_break_start,
-            on_break_end=self.on_break_end
+            on_break_end=self.on_break_end,
+            clock=self.clock,
+            activity_source=self.activity_tracker.get_last_activity_time,
+            scheduler=self.reminders
         )
         
-        # Set inactivity threshold
-        self.timer.inactivity_threshold = inactivity_threshold
-        
-        # Initialize activity tracker
-        self.activity_tracker = ActivityTracker(on_activity=self.on_user_activity)
-        
         # Initialize system monitor
         self.system_monitor = SystemMonitor(
             on_system_idle=self.on_system_idle,
-            on_system_active=self.on_system_active
+            on_system_active=self.on_system_active,
+            clock=self.clock,
+            activity_source=self.activity_tracker.get_last_activity_time,
+            idle_threshold=inactivity_threshold
         )
         
+        # Push setting changes to the running components
+        self.settings.subscribe(self.on_settings_changed)
+        
+        # Retention and vacuuming of the history database
+        self.maintenance = DatabaseMaintenance(self.db, settings=self.settings)
+        
+        # Optional upload of statistics to a fleet collector
+        self.uploader = FleetUploader(self.db, settings.fleet_url) if settings.fleet_url else None
+        
         # Initialize UI
-        self.app = QApplication(sys.argv)
-        self.main_window = MainWindow(self)
+        self.app = None
+        self.main_window = None
+        if not headless:
+            from PyQt6.QtWidgets import QApplication
+            from PyQt6.QtCore import QTimer
+            from ui.main_window import MainWindow
+            
+            self.app = QApplication(sys.argv)
+            self.main_window = MainWindow(self)
+            
+            # Flush per-minute activity buckets well before the ring wraps
+            self.activity_flush_timer = QTimer()
+            self.activity_flush_timer.timeout.connect(self.flush_activity)
+            self.activity_flush_timer.start(5 * 60 * 1000)
         
         # Current session tracking
         self.current_session_id = None
         self.current_break_id = None
+        self.session_work_seconds = 0  # Work time of the session up to the last break
+        self.break_work_seconds = 0  # Work time of the period the current break ended
+        # The break is finished from the scheduler thread (it ended) or the
+        # Qt thread (skipped); this lock lets only one of them record it
+        self._break_lock = threading.Lock()
         
     def start(self):
         """Start the application."""
         # Start core components
         self.activity_tracker.start()
         self.system_monitor.start()
+        self.maintenance.start()
+        if self.uploader:
+            self.uploader.start()
         
         # Show main window
         self.main_window.show()
@@ -67,77 +151,79 @@ class EyeCareApp:
     def start_timer(self):
         """Start the eye care timer and record a new session."""
         if not self.timer.is_running:
+            # The scheduler thread also drives the timer
+            self.reminders.start()
             self.timer.start()
-            import datetime
             # Record session start
             self.current_session_id = self.db.start_session(
-                datetime.datetime.now().isoformat()
+                self.clock.datetime_now().isoformat()
             )
             print(f"Started new session: {self.current_session_id}")
-        
-            # Start tracking screen time immediately
-            today = datetime.date.today().isoformat()
-            self.db.update_daily_stats(
-                today,
-                0,  # Will be updated when session ends
-                0,  # Will be updated when breaks occur
-                0,  # Will be updated when breaks complete
-                0   # Will be updated when session ends
-            )
+            # daily_stats follows the session row through its triggers
+            self.session_work_seconds = 0
     
     def stop_timer(self):
         """Stop the eye care timer and record session end."""
         if self.timer.is_running:
             stats = self.timer.get_session_stats()
+            work_time = self._work_period_seconds()
+            # A break still open belongs to the session being ended
+            self._abandon_break()
             self.timer.stop()
             
             if self.current_session_id:
-                import datetime
-                # Record session end
+                # Record session end; the triggers update daily stats
                 self.db.end_session(
                     self.current_session_id,
-                    datetime.datetime.now().isoformat(),
-                    stats['session_duration'],
+                    self.clock.datetime_now().isoformat(),
+                    self.session_work_seconds + work_time,
                     stats['breaks_taken']
                 )
                 
-                # Update daily stats
-                today = datetime.date.today().isoformat()
-                self.db.update_daily_stats(
-                    today,
-                    stats['session_duration'],
-                    stats['breaks_taken'],
-                    stats['breaks_taken'],  # Simplification, assuming all breaks completed
-                    stats['session_duration']
-                )
-                
                 self.current_session_id = None
     
     def pause_timer(self):
         """Pause the eye care timer."""
         if self.timer.is_running and not self.timer.is_paused:
-            self.timer.manually_pause()
+            # Pauses the eye-break timer together with the other reminders
+            self.reminders.manually_pause()
     
     def resume_timer(self):
         """Resume the eye care timer."""
         if self.timer.is_running and self.timer.is_paused:
-            self.timer.resume()
+            self.reminders.resume()
+    
+    def _work_period_seconds(self):
+        """Work time of the current work period, without pauses and breaks."""
+        state = self.timer.snapshot()
+        if state.work_start_time is None:
+            return 0
+        if state.is_in_break:
+            end = state.break_start_time
+        elif state.is_paused:
+            end = state.pause_time
+        else:
+            end = self.clock.now()
+        return int(max(0, end - state.work_start_time))
     
     def on_break_start(self):
         """Handler for when a break starts."""
         print("Break started")
         try:
-            import datetime
-
-            # Record break start
-            if self.current_session_id and not self.current_break_id:
-                self.current_break_id = self.db.record_break(
-                    self.current_session_id,
-                    datetime.datetime.now().isoformat()
-                )
+            with self._break_lock:
+                # The timer restarts its work period when the break ends, so
+                # the period that led up to this break is measured now
+                self.break_work_seconds = self._work_period_seconds()
+                
+                # Record break start
+                if self.current_session_id and not self.current_break_id:
+                    self.current_break_id = self.db.record_break(
+                        self.current_session_id,
+                        self.clock.datetime_now().isoformat()
+                    )
             
             # Trigger notification via signal
-            if hasattr(self, 'main_window') and self.main_window:
+            if self.main_window:
                 self.main_window.trigger_break_notification()
         except Exception as e:
             print(f"Error on break start: {e}")
@@ -145,72 +231,199 @@ class EyeCareApp:
     def on_break_end(self):
         """Handler for when a break ends."""
         print("Break ended")
+        self._finish_break(completed=True)
+    
+    def on_break_skip(self):
+        """Handler for when the user skips a break."""
+        print("Break skipped")
+        self._finish_break(completed=False)
+    
+    def _finish_break(self, completed):
+        """Record the end of the current break and return to work."""
         try:
-            import datetime
-        
+            # Take the break over; a concurrent end or skip finds nothing left
+            with self._break_lock:
+                break_id = self.current_break_id
+                # Work time since the last break, measured when this one started
+                work_time = self.break_work_seconds
+                self.current_break_id = None
+                self.break_work_seconds = 0
+            if break_id is None:
+                return
+            
             # Record break completion in database
-            if self.current_break_id:
-                self.db.complete_break(
-                    self.current_break_id,
-                    self.timer.break_duration
-                )
-                
-                # Calculate work time since last break
-                work_time = 0
-                if self.timer.work_start_time:
-                    work_time = int(datetime.datetime.now().timestamp() - self.timer.work_start_time)
-                
-                # Update daily stats for completed break and work time
-                today = datetime.date.today().isoformat()
-                self.db.update_daily_stats(
-                    today,
-                    work_time,  # Add work time since last break
-                    1,  # One break taken
-                    1,  # One completed break
-                    work_time  # Update longest session if applicable
+            if completed:
+                self.db.complete_break(break_id, self.timer.break_duration)
+            else:
+                skipped_after = 0
+                if self.timer.break_start_time is not None:
+                    skipped_after = int(self.clock.now() - self.timer.break_start_time)
+                self.db.skip_break(break_id, skipped_after)
+            
+            # Checkpoint the session so today's work time stays current
+            self.session_work_seconds += work_time
+            if self.current_session_id:
+                self.db.checkpoint_session(
+                    self.current_session_id,
+                    self.session_work_seconds,
+                    self.timer.breaks_taken,
+                    self.clock.datetime_now().isoformat()
                 )
-                
-                self.current_break_id = None
-                print(f"Break completion recorded with {work_time} seconds of work time")
+            print(f"Break {'completion' if completed else 'skip'} recorded with {work_time} seconds of work time")
             
             # Hide notification if it exists
-            if hasattr(self, 'main_window') and self.main_window:
+            if self.main_window:
+                from PyQt6.QtCore import QTimer
+                
                 # Use QTimer.singleShot to avoid potential recursion
                 QTimer.singleShot(0, self.main_window.hide_break_notification)
                 print("Break notification hide scheduled")
         
             # End break in timer if still in break
             if self.timer.is_in_break:
-                self.timer.is_in_break = False
-                self.timer.work_start_time = datetime.datetime.now().timestamp()
+                self.timer.end_break(notify=False)
                 print("Break ended in timer")
         except Exception as e:
             print(f"Error on break end: {e}")
 
+    def _abandon_break(self):
+        """Record the open break as skipped because the session ends during it.
+        
+        The work period before the break is part of the session's final
+        duration, so nothing is checkpointed here.
+        """
+        try:
+            with self._break_lock:
+                break_id = self.current_break_id
+                self.current_break_id = None
+                self.break_work_seconds = 0
+            if break_id is not None:
+                skipped_after = 0
+                if self.timer.break_start_time is not None:
+                    skipped_after = int(self.clock.now() - self.timer.break_start_time)
+                self.db.skip_break(break_id, skipped_after)
+            
+            if self.main_window:
+                from PyQt6.QtCore import QTimer
+                QTimer.singleShot(0, self.main_window.hide_break_notification)
+        except Exception as e:
+            print(f"Error closing the open break: {e}")
+    
+    def on_settings_changed(self, settings, changed):
+        """Apply changed settings to the timer and reminders."""
+        timing = {'work_duration', 'break_duration', 'inactivity_threshold'}
+        if timing.intersection(changed):
+            self.timer.update_durations(
+                work_duration=settings.work_duration,
+                break_duration=settings.break_duration
+            )
+            self.reminders.set_inactivity_threshold(settings.inactivity_threshold)
+            self.system_monitor.set_idle_threshold(settings.inactivity_threshold)
+        if {'stretch_interval', 'hydration_interval'}.intersection(changed):
+            self.apply_reminder_schedules(settings)
+    
+    def apply_reminder_schedules(self, settings):
+        """Add, update or remove the optional reminder schedules to match the settings."""
+        for name, break_duration in self.reminder_breaks.items():
+            interval = getattr(settings, f'{name}_interval')
+            if interval <= 0:
+                self.reminders.remove_schedule(name)
+            elif self.reminders.get_schedule(name) is None:
+                self.reminders.add_schedule(
+                    name, interval, break_duration,
+                    on_break_start=lambda name=name: self.on_reminder(name)
+                )
+            else:
+                self.reminders.update_schedule(name, work_duration=interval)
+    
+    def on_reminder(self, name):
+        """Handler for when an optional reminder falls due."""
+        print(f"Time for a {name} break")
+        if self.main_window:
+            self.main_window.trigger_reminder(name)
+    
+    def switch_profile(self, name):
+        """Switch to another profile's history and settings.
+        
+        The running session, and a break that is still open, are ended in
+        the old profile and a new session is started in the new profile.
+        """
+        if self.profiles is None:
+            print("Profiles are not available with an explicit database")
+            return
+        if self.profiles.active is not None and self.profiles.active.name == name:
+            return
+        
+        was_running = self.timer.is_running
+        maintenance_running = self.maintenance.is_running
+        self.stop_timer()
+        self.flush_activity()
+        self.maintenance.stop()
+        if self.uploader:
+            self.uploader.stop()
+        self.settings.unsubscribe(self.on_settings_changed)
+        
+        profile = self.profiles.switch(name)
+        self.db = profile.db
+        self.today_stats.set_database(self.db)
+        self.settings = profile.settings
+        self.settings.subscribe(self.on_settings_changed)
+        settings = self.settings.settings
+        self.on_settings_changed(settings, list(Settings.FIELDS))
+        
+        self.maintenance = DatabaseMaintenance(self.db, settings=self.settings)
+        self.uploader = FleetUploader(self.db, settings.fleet_url) if settings.fleet_url else None
+        if maintenance_running:
+            self.maintenance.start()
+            if self.uploader:
+                self.uploader.start()
+        print(f"Switched to profile: {profile.name}")
+        
+        if was_running:
+            self.start_timer()
+    
     def on_user_activity(self):
-        """Handler for user activity events."""
-        self.timer.update_activity()
+        """Handler for user activity after an idle period."""
+        self.reminders.update_activity()
+    
+    def flush_activity(self):
+        """Write completed per-minute activity buckets to the database."""
+        try:
+            rows = [
+                (datetime.datetime.fromtimestamp(minute_start).isoformat(), keys, clicks, scrolls, moves)
+                for minute_start, keys, clicks, scrolls, moves
+                in self.activity_tracker.drain_minute_buckets()
+            ]
+            self.db.record_activity_minutes(rows)
+        except Exception as e:
+            print(f"Error flushing activity: {e}")
     
     def on_system_idle(self):
         """Handler for when system becomes idle."""
         print("System idle detected")
-        if self.timer.is_running and not self.timer.is_paused:
-            self.timer.pause()
+        self.reminders.pause()
     
     def on_system_active(self):
         """Handler for when system becomes active again."""
         print("System active detected")
-        if self.timer.is_running and self.timer.is_paused:
-            # Only resume if the pause wasn't manual
-            if not getattr(self.timer, '_manual_pause', False):
-                self.timer.resume()
+        # Only resumes if the pause wasn't manual
+        self.reminders.resume_from_idle()
     
     def cleanup(self):
         """Clean up resources before exit."""
         self.stop_timer()
         self.activity_tracker.stop()
+        self.flush_activity()
         self.system_monitor.stop()
-        self.db.close()
+        self.reminders.stop()
+        self.maintenance.stop()
+        if self.uploader:
+            self.uploader.stop()
+        self.today_stats.close()
+        if self.profiles:
+            self.profiles.close_all()
+        else:
+            self.db.close()
 
 if __name__ == "__main__":
     app = EyeCareApp()
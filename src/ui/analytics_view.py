@@ -8,11 +8,14 @@ import calendar
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
-    QTabWidget, QScrollArea, QFrame, QGridLayout, QPushButton
+    QTabWidget, QScrollArea, QFrame, QGridLayout, QPushButton,
+    QFileDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QFont
 
+from data import export
+
 class MatplotlibCanvas(FigureCanvas):
     """Canvas for matplotlib plots."""
     def __init__(self, parent=None, width=5, height=4, dpi=100):
@@ -24,16 +27,23 @@ class MatplotlibCanvas(FigureCanvas):
         
         # Set figure background to transparent
         self.fig.patch.set_alpha(0.0)
-        
-        # Apply some styling to plots
-        plt.style.use('seaborn-v0_8-whitegrid')
 
 class AnalyticsView(QWidget):
-    """Analytics view showing statistics and charts."""
+    """Analytics view showing statistics and charts.
     
-    def __init__(self, db):
+    With an ``async_db`` the queries run on its worker pool and the charts
+    are drawn when the results arrive; a newer refresh (e.g. another range
+    selection) supersedes one still in flight.
+    """
+    
+    def __init__(self, db, async_db=None):
         super().__init__()
         self.db = db
+        self.async_db = async_db
+        
+        # Apply some styling to plots, once for all canvases
+        plt.style.use('seaborn-v0_8-whitegrid')
+        
         self.setup_ui()
     
     def setup_ui(self):
@@ -52,6 +62,18 @@ class AnalyticsView(QWidget):
         
         range_layout.addStretch()
         
+        # Export of the selected range
+        self.export_format = QComboBox()
+        self.export_format.addItem("CSV", 'csv')
+        self.export_format.addItem("NDJSON", 'ndjson')
+        if export.parquet_available():
+            self.export_format.addItem("Parquet", 'parquet')
+        range_layout.addWidget(self.export_format)
+        
+        self.export_button = QPushButton("Export...")
+        self.export_button.clicked.connect(self.export_history)
+        range_layout.addWidget(self.export_button)
+        
         main_layout.addLayout(range_layout)
         
         # Tabs for different analytics views
@@ -110,6 +132,11 @@ class AnalyticsView(QWidget):
         self.max_screen_time.setFont(QFont("Arial", 12, QFont.Weight.Bold))
         summary_layout.addWidget(self.max_screen_time, 2, 1)
         
+        summary_layout.addWidget(QLabel("Active Input Time:"), 3, 0)
+        self.active_input_time = QLabel("0 hours")
+        self.active_input_time.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+        summary_layout.addWidget(self.active_input_time, 3, 1)
+        
         layout.addWidget(summary_frame)
         
         # Screen time chart
@@ -229,12 +256,76 @@ class AnalyticsView(QWidget):
     
     def refresh_analytics(self):
         """Refresh all analytics data and charts."""
+        # Get date range based on selection
+        start_date, end_date = self._get_selected_date_range()
+        
+        if self.async_db is None:
+            try:
+                self._show_analytics(self._load_analytics(start_date, end_date))
+            except Exception as e:
+                self._on_refresh_error(e)
+            return
+        
+        self.async_db.submit(
+            self._load_analytics, start_date, end_date,
+            key='analytics',
+            on_result=self._show_analytics,
+            on_error=self._on_refresh_error
+        )
+    
+    def export_history(self):
+        """Export sessions, breaks and daily stats for the selected range."""
+        directory = QFileDialog.getExistingDirectory(self, "Export History To")
+        if not directory:
+            return
+        
+        start_date, end_date = self._get_selected_date_range()
+        fmt = self.export_format.currentData()
+        if self.async_db is None:
+            try:
+                self._on_export_done(export.export_history(self.db, directory, fmt, start_date=start_date, end_date=end_date))
+            except Exception as e:
+                self._on_export_error(e)
+            return
+        
+        self.export_button.setEnabled(False)
+        self.async_db.submit(
+            export.export_history, self.db, directory, fmt,
+            start_date=start_date, end_date=end_date,
+            key='export',
+            on_result=self._on_export_done,
+            on_error=self._on_export_error
+        )
+    
+    def _on_export_done(self, results):
+        """Report a finished export."""
+        self.export_button.setEnabled(True)
+        lines = [f"{table}: {rows} rows" for table, (_, rows) in results.items()]
+        QMessageBox.information(self, "Export Complete", "\n".join(lines))
+    
+    def _on_export_error(self, error):
+        """Report a failed export."""
+        self.export_button.setEnabled(True)
+        print(f"Error exporting history: {error}")
+        QMessageBox.warning(self, "Export Failed", str(error))
+    
+    def _load_analytics(self, start_date, end_date):
+        """Run the analytics queries (on a worker thread when async)."""
+        return {
+            'stats': self.db.get_stats_between(start_date, end_date),
+            'activity': self.db.get_activity_by_day(start_date, end_date),
+            'streak': self.db.get_streak_data(days=90),  # Up to 90 days
+            'streak_state': self.db.get_streak()
+        }
+    
+    def _on_refresh_error(self, error):
+        """Report a failed analytics refresh."""
+        print(f"Error refreshing analytics: {error}")
+    
+    def _show_analytics(self, data):
+        """Update all tabs from the results of _load_analytics."""
         try:
-            # Get date range based on selection
-            date_range = self._get_selected_date_range()
-            
-            # Get data from database
-            stats_data = self.db.get_screen_time_stats(days=date_range)
+            stats_data = data['stats']
             
             # Convert to pandas DataFrame for easier analysis
             if stats_data:
@@ -255,12 +346,13 @@ class AnalyticsView(QWidget):
                     
                     # Update screen time tab
                     self._update_screen_time_analytics(df)
+                    self._update_active_time(data['activity'])
                     
                     # Update breaks tab
                     self._update_breaks_analytics(df)
                     
                     # Get streak data and update streak tab
-                    self._update_streak_analytics()
+                    self._update_streak_analytics(data['streak'], data['streak_state'])
                     
                     # Update eye health tab
                     self._update_eye_health_analytics(df)
@@ -274,20 +366,19 @@ class AnalyticsView(QWidget):
             traceback.print_exc()
     
     def _get_selected_date_range(self):
-        """Get the number of days to look back based on selection."""
+        """Get the inclusive (start, end) dates of the selection; None means unbounded."""
         selection = self.range_selector.currentText()
+        today = date.today()
         
         if selection == "Last 7 Days":
-            return 7
+            return today - timedelta(days=6), today
         elif selection == "Last 30 Days":
-            return 30
+            return today - timedelta(days=29), today
         elif selection == "Current Month":
-            # Calculate days in current month
-            today = datetime.now()
             _, days_in_month = calendar.monthrange(today.year, today.month)
-            return days_in_month
+            return today.replace(day=1), today.replace(day=days_in_month)
         else:  # All Time
-            return 365  # Just return a large number
+            return None, today
     
     def _update_screen_time_analytics(self, df):
         """Update screen time analytics tab."""
@@ -325,6 +416,11 @@ class AnalyticsView(QWidget):
         self.screen_time_chart.fig.tight_layout()
         self.screen_time_chart.draw()
     
+    def _update_active_time(self, activity):
+        """Update the active input time measured by the activity tracker."""
+        active_hours = sum(row['active_minutes'] for row in activity) / 60.0
+        self.active_input_time.setText(f"{active_hours:.1f} hours")
+    
     def _update_breaks_analytics(self, df):
         """Update breaks analytics tab."""
         if df.empty:
@@ -365,10 +461,11 @@ class AnalyticsView(QWidget):
         self.breaks_chart.fig.tight_layout()
         self.breaks_chart.draw()
     
-    def _update_streak_analytics(self):
+    def _update_streak_analytics(self, streak_data, streak_state):
         """Update streak analytics tab."""
-        # Get streak data
-        streak_data = self.db.get_streak_data(days=90)  # Up to 90 days
+        # Streak lengths come from the maintained streak state
+        self.current_streak_label.setText(f"Current Streak: {streak_state['current_streak']} days")
+        self.longest_streak_label.setText(f"Longest Streak: {streak_state['longest_streak']} days")
         
         if not streak_data:
             return
@@ -389,13 +486,6 @@ class AnalyticsView(QWidget):
             df['date'] = pd.to_datetime(df['date'])
             df = df.sort_values('date')
             
-            # Calculate current streak
-            current_streak, longest_streak = self._calculate_streaks(df)
-            
-            # Update streak labels
-            self.current_streak_label.setText(f"Current Streak: {current_streak} days")
-            self.longest_streak_label.setText(f"Longest Streak: {longest_streak} days")
-            
             # Update streak calendar
             self._draw_streak_calendar(df)
             
@@ -479,47 +569,6 @@ class AnalyticsView(QWidget):
         self.eye_strain_chart.fig.tight_layout()
         self.eye_strain_chart.draw()
     
-    def _calculate_streaks(self, df):
-        """Calculate current and longest streaks."""
-        # A day is considered part of streak if user took at least one break
-        df['in_streak'] = df['has_activity'] & (df['completed_breaks'] > 0)
-        
-        # Ensure data is sorted by date
-        df = df.sort_values('date')
-        
-        # Fill in missing dates with False values
-        if len(df) >= 2:
-            date_range = pd.date_range(start=df['date'].min(), end=df['date'].max())
-            df = df.set_index('date').reindex(date_range).fillna({'in_streak': False}).reset_index()
-            df = df.rename(columns={'index': 'date'})
-        
-        # Calculate current streak
-        current_streak = 0
-        # Start from the most recent day and count backwards
-        for i in range(len(df)-1, -1, -1):
-            if df.iloc[i]['in_streak']:
-                current_streak += 1
-            else:
-                break
-        
-        # Calculate longest streak
-        streak_lengths = []
-        current_length = 0
-        
-        for _, row in df.iterrows():
-            if row['in_streak']:
-                current_length += 1
-            else:
-                streak_lengths.append(current_length)
-                current_length = 0
-        
-        # Add the last streak
-        streak_lengths.append(current_length)
-        
-        longest_streak = max(streak_lengths) if streak_lengths else 0
-        
-        return current_streak, longest_streak
-    
     def _draw_streak_calendar(self, df):
         """Draw a GitHub-style streak calendar."""
         self.streak_calendar.axes.clear()
@@ -637,6 +686,7 @@ class AnalyticsView(QWidget):
         self.total_screen_time.setText("0 hours")
         self.avg_screen_time.setText("0 hours per day")
         self.max_screen_time.setText("0 hours (N/A)")
+        self.active_input_time.setText("0 hours")
         
         self.screen_time_chart.axes.clear()
         self.screen_time_chart.axes.text(0.5, 0.5, "No data available", 
@@ -0,0 +1,112 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class AsyncRequest:
+    """Handle for a query submitted to AsyncDatabase."""
+    def __init__(self, key, on_result=None, on_error=None):
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Drop the request; its callbacks will not run."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class AsyncDatabase(QObject):
+    """
+    Runs database reads on a small worker pool and hands the results back
+    on the GUI thread, so the UI never waits on the disk.
+
+    ``submit(fn, ..., key=...)`` supersedes any request still pending under
+    the same key: the older request is cancelled if it has not started,
+    and its result is discarded if it has. This keeps only the latest
+    dashboard refresh or analytics range in flight.
+
+    Workers use the database's per-thread read connections; writes are
+    already queued to the write-behind journal and never need the pool.
+    """
+    # request, result, error; emitted from a worker, delivered on the GUI thread
+    _finished = pyqtSignal(object, object, object)
+
+    def __init__(self, db, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-read")
+        self._pending = {}  # key -> latest AsyncRequest
+        self._lock = threading.Lock()
+        self._closed = False
+        self._finished.connect(self._deliver)
+
+    def submit(self, fn, *args, on_result=None, on_error=None, key=None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a worker and pass the result to ``on_result``."""
+        request = AsyncRequest(key, on_result, on_error)
+        if self._closed:
+            request.cancelled = True
+            return request
+
+        with self._lock:
+            if key is not None:
+                previous = self._pending.get(key)
+                if previous is not None:
+                    previous.cancel()
+                self._pending[key] = request
+        request.future = self._executor.submit(self._run, request, fn, args, kwargs)
+        return request
+
+    def call(self, method, *args, on_result=None, on_error=None, key=None, **kwargs):
+        """Call the Database method named ``method`` on a worker."""
+        return self.submit(
+            getattr(self.db, method), *args,
+            on_result=on_result, on_error=on_error, key=key, **kwargs
+        )
+
+    def cancel(self, key):
+        """Cancel the pending request submitted under ``key``, if any."""
+        with self._lock:
+            request = self._pending.pop(key, None)
+        if request is not None:
+            request.cancel()
+
+    def _run(self, request, fn, args, kwargs):
+        """Worker side: run the query unless it was superseded meanwhile."""
+        if request.cancelled:
+            return
+        try:
+            result, error = fn(*args, **kwargs), None
+        except Exception as e:
+            result, error = None, e
+        if not request.cancelled and not self._closed:
+            self._finished.emit(request, result, error)
+
+    def _deliver(self, request, result, error):
+        """GUI side: pass the result on unless the request was superseded."""
+        with self._lock:
+            if request.key is not None and self._pending.get(request.key) is request:
+                del self._pending[request.key]
+        if request.cancelled:
+            return
+
+        if error is not None:
+            if request.on_error:
+                request.on_error(error)
+            else:
+                print(f"Error in background query: {error}")
+        elif request.on_result:
+            request.on_result(result)
+
+    def shutdown(self):
+        """Cancel pending requests and stop the workers."""
+        self._closed = True
+        with self._lock:
+            pending, self._pending = list(self._pending.values()), {}
+        for request in pending:
+            request.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
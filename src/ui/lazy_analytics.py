@@ -0,0 +1,90 @@
+import importlib
+import threading
+
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtCore import Qt, QTimer
+
+
+# Heavy modules the analytics view needs; importing them is most of its cost
+PREWARM_MODULES = ('pandas', 'matplotlib.figure', 'matplotlib.pyplot')
+
+
+class LazyAnalyticsView(QWidget):
+    """
+    Stand-in for AnalyticsView until the analytics tab is first opened.
+
+    pandas, matplotlib and the view's figures are only imported and built
+    by ``ensure_loaded()``, so they cost nothing at startup. With
+    ``prewarm_delay`` (ms) set, the heavy modules are imported on a
+    background thread once startup has settled, which makes the first
+    opening quick as well.
+
+    ``db`` and ``refresh_analytics()`` are forwarded to the real view
+    once it exists.
+    """
+    def __init__(self, db, async_db=None, prewarm_delay=None, parent=None):
+        super().__init__(parent)
+        self._db = db
+        self.async_db = async_db
+        self.view = None
+
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = QLabel("Loading analytics...")
+        self._placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._layout.addWidget(self._placeholder)
+
+        if prewarm_delay is not None:
+            QTimer.singleShot(prewarm_delay, self.prewarm)
+
+    @property
+    def db(self):
+        return self._db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+        if self.view is not None:
+            self.view.db = db
+
+    @property
+    def is_loaded(self):
+        """Whether the real view has been built."""
+        return self.view is not None
+
+    def prewarm(self):
+        """Import the heavy modules on a background thread."""
+        if self.view is None:
+            threading.Thread(target=self._import_modules, daemon=True).start()
+
+    @staticmethod
+    def _import_modules():
+        """Import PREWARM_MODULES; failures are left for ensure_loaded to report."""
+        for name in PREWARM_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Could not prewarm {name}: {e}")
+                return
+
+    def ensure_loaded(self):
+        """Build the real view if it does not exist yet; return it (or None)."""
+        if self.view is not None:
+            return self.view
+        try:
+            from .analytics_view import AnalyticsView
+            self.view = AnalyticsView(self._db, async_db=self.async_db)
+        except Exception as e:
+            print(f"Error loading analytics: {e}")
+            self._placeholder.setText(f"Analytics unavailable: {e}")
+            return None
+
+        self._layout.removeWidget(self._placeholder)
+        self._placeholder.deleteLater()
+        self._layout.addWidget(self.view)
+        return self.view
+
+    def refresh_analytics(self):
+        """Refresh the real view; nothing to do before it is built."""
+        if self.view is not None:
+            self.view.refresh_analytics()
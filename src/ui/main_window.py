@@ -1,4 +1,4 @@
-from PyQt6.QtCore import pyqtSignal, QMetaObject, Qt, QTimer
+from PyQt6.QtCore import pyqtSignal, QEvent, QMetaObject, Qt, QTimer
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QSystemTrayIcon, QMenu,
@@ -9,12 +9,35 @@ from PyQt6.QtGui import QIcon, QAction
 import os
 
 from .notification import NotificationWindow
-from .analytics_view import AnalyticsView
+from .lazy_analytics import LazyAnalyticsView
+from .async_db import AsyncDatabase
+from .view_model import DashboardViewModel
+
+# Dashboard styles, parsed once; the status label picks its colour through
+# its "state" property
+DASHBOARD_STYLE = """
+QLabel#statusLabel { font-size: 16px; font-weight: bold; }
+QLabel#statusLabel[state="break"] { color: green; }
+QLabel#statusLabel[state="paused"] { color: orange; }
+QLabel#statusLabel[state="stopped"] { color: red; }
+QLabel#timeLabel { font-size: 36px; font-weight: bold; }
+"""
 class MainWindow(QMainWindow):
     """Main application window with settings and dashboard."""
         
     # Define the signal as a class attribute
     break_notification_signal = pyqtSignal()
+    # Name of an optional reminder (stretch, hydration) that fell due
+    reminder_signal = pyqtSignal(str)
+    # Settings snapshot; changes can be made from any thread
+    settings_changed_signal = pyqtSignal(object)
+    # TodayStats snapshot, published from the database writer thread
+    today_stats_signal = pyqtSignal(object)
+    
+    # Refresh cadence
+    ui_refresh_interval = 1000  # ms, only while the window is visible
+    tray_refresh_interval = 60 * 1000  # ms, longest wait between tooltip updates
+    analytics_prewarm_delay = 15 * 1000  # ms after startup to preload analytics modules, None to skip
 
     def __init__(self, app_controller):
         super().__init__()
@@ -22,11 +45,15 @@ class MainWindow(QMainWindow):
         self.app_controller = app_controller
         self.notification = None
         
+        # Database reads run on worker threads, results arrive as signals
+        self.async_db = AsyncDatabase(app_controller.db, parent=self)
+        
         self.setWindowTitle("OptiPause20")
         self.setMinimumSize(600, 400)
         
         # Connect the signal to the slot
         self.break_notification_signal.connect(self.show_break_notification)
+        self.reminder_signal.connect(self.show_reminder)
 
         # Step 1: Create tray_icon BEFORE using it
         self.tray_icon = QSystemTrayIcon(self)
@@ -46,25 +73,78 @@ class MainWindow(QMainWindow):
         # Set up UI
         self.setup_ui()
         
+        # Dashboard widgets are only touched when what they show changes
+        self.view_model = DashboardViewModel(app_controller.timer)
+        self.view_model.bind('status', self._set_status_style)
+        self.view_model.bind('status_text', self.status_label.setText)
+        self.view_model.bind('time_text', self.time_label.setText)
+        self.view_model.bind('pause_text', self.start_pause_button.setText)
+        self.view_model.bind('screen_time_text', self.screen_time_label.setText)
+        self.view_model.bind('breaks_text', self.breaks_taken_label.setText)
+        self.view_model.bind('streak_text', self.streak_label.setText)
+        
+        # Keep the settings tab in step with the settings store
+        self.apply_settings(app_controller.settings.settings)
+        self.settings_changed_signal.connect(self.apply_settings)
+        self._settings_listener = lambda settings, changed: self.settings_changed_signal.emit(settings)
+        app_controller.settings.subscribe(self._settings_listener)
+        
+        # Dashboard statistics are pushed by the today stats model
+        self._show_dashboard_stats(app_controller.today_stats.snapshot)
+        self.today_stats_signal.connect(self._show_dashboard_stats)
+        app_controller.today_stats.subscribe(self.today_stats_signal.emit)
+        
+        # Follow profile switches
+        if app_controller.profiles:
+            app_controller.profiles.subscribe(self.on_profile_switched)
+        
         # Set up system tray
         self.setup_tray()
         
-        # Update timer for UI refresh
+        # UI refresh, running only while the window is shown (see showEvent)
         self.update_timer = QTimer(self)
+        self.update_timer.setInterval(self.ui_refresh_interval)
         self.update_timer.timeout.connect(self.update_ui)
-        self.update_timer.start(1000)  # Update every second
+        
+        # Tray tooltip refresh, rescheduled for when its text would change
+        self.tray_refresh_timer = QTimer(self)
+        self.tray_refresh_timer.setSingleShot(True)
+        self.tray_refresh_timer.setTimerType(Qt.TimerType.VeryCoarseTimer)
+        self.tray_refresh_timer.timeout.connect(self.update_tray_tooltip)
+        self.update_tray_tooltip()
     
     def trigger_break_notification(self):
         """Emit signal to show break notification in main thread."""
         print("Triggering break notification signal")
         self.break_notification_signal.emit()
     
+    def trigger_reminder(self, name):
+        """Emit signal to show a reminder in main thread."""
+        self.reminder_signal.emit(name)
+    
+    def show_reminder(self, name):
+        """Show an optional reminder as a tray message."""
+        messages = {
+            'stretch': "Time to stand up and stretch.",
+            'hydration': "Time for a glass of water."
+        }
+        self.tray_icon.showMessage("OptiPause20", messages.get(name, f"Time for a {name} break."))
+    
     def refresh_analytics(self):
         """Refresh analytics data."""
         if hasattr(self, 'analytics_view'):
-            self.analytics_view.refresh_analytics()
+            # Builds the view on first use, which loads its data
+            if self.analytics_view.is_loaded:
+                self.analytics_view.refresh_analytics()
+            else:
+                self.analytics_view.ensure_loaded()
             print("Analytics refreshed")
     
+    def on_tab_changed(self, index):
+        """Build the analytics view when its tab is first opened."""
+        if self.tabs.widget(index) is self.analytics_view:
+            self.analytics_view.ensure_loaded()
+    
     def setup_ui(self):
         """Set up the main window UI."""
         # Central widget and main layout
@@ -76,17 +156,19 @@ class MainWindow(QMainWindow):
         
         # Dashboard tab
         dashboard_tab = QWidget()
+        dashboard_tab.setStyleSheet(DASHBOARD_STYLE)
         dashboard_layout = QVBoxLayout(dashboard_tab)
         
         # Timer display
         timer_layout = QHBoxLayout()
         
         self.status_label = QLabel("Working")
-        self.status_label.setStyleSheet("font-size: 16px; font-weight: bold;")
+        self.status_label.setObjectName("statusLabel")
+        self.status_label.setProperty("state", "working")
         timer_layout.addWidget(self.status_label)
         
         self.time_label = QLabel("20:00")
-        self.time_label.setStyleSheet("font-size: 36px; font-weight: bold;")
+        self.time_label.setObjectName("timeLabel")
         self.time_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         timer_layout.addWidget(self.time_label, 1)
         
@@ -206,6 +288,24 @@ class MainWindow(QMainWindow):
         save_button.clicked.connect(self.save_settings)
         settings_layout.addWidget(save_button)
         
+        # Profile selection; typing a new name creates a profile
+        profiles = self.app_controller.profiles
+        if profiles:
+            profile_layout = QHBoxLayout()
+            profile_layout.addWidget(QLabel("Profile:"))
+            
+            self.profile_selector = QComboBox()
+            self.profile_selector.setEditable(True)
+            self.profile_selector.addItems(profiles.list_profiles())
+            self.profile_selector.setCurrentText(profiles.active.name)
+            profile_layout.addWidget(self.profile_selector, 1)
+            
+            switch_button = QPushButton("Switch")
+            switch_button.clicked.connect(self.switch_profile)
+            profile_layout.addWidget(switch_button)
+            
+            settings_layout.addLayout(profile_layout)
+        
         # Add spacer
         settings_layout.addStretch()
         
@@ -213,9 +313,14 @@ class MainWindow(QMainWindow):
         tabs.addTab(dashboard_tab, "Dashboard")
         tabs.addTab(settings_tab, "Settings")
         
-        # Analytics tab
-        self.analytics_view = AnalyticsView(self.app_controller.db)
+        # Analytics tab, built when first opened
+        self.analytics_view = LazyAnalyticsView(
+            self.app_controller.db, async_db=self.async_db,
+            prewarm_delay=self.analytics_prewarm_delay, parent=self
+        )
         tabs.addTab(self.analytics_view, "Analytics")
+        self.tabs = tabs
+        tabs.currentChanged.connect(self.on_tab_changed)
         # refresh button for analytics
         refresh_analytics_button = QPushButton("Refresh Analytics")
         refresh_analytics_button.clicked.connect(self.refresh_analytics)
@@ -247,6 +352,7 @@ class MainWindow(QMainWindow):
         self.pause_action = QAction("Pause", self)
         self.pause_action.triggered.connect(self.toggle_timer)
         tray_menu.addAction(self.pause_action)
+        self.view_model.bind('pause_text', self.pause_action.setText)
         
         tray_menu.addSeparator()
         
@@ -274,19 +380,16 @@ class MainWindow(QMainWindow):
     
     def toggle_timer(self):
         """Toggle between paused and running states."""
-        if self.app_controller.timer.is_running:
-            if self.app_controller.timer.is_paused:
+        state = self.app_controller.timer.snapshot()
+        if state.is_running:
+            if state.is_paused:
                 self.app_controller.resume_timer()
-                self.start_pause_button.setText("Pause")
-                self.pause_action.setText("Pause")
             else:
                 self.app_controller.pause_timer()
-                self.start_pause_button.setText("Resume")
-                self.pause_action.setText("Resume")
         else:
             self.app_controller.start_timer()
-            self.start_pause_button.setText("Pause")
-            self.pause_action.setText("Pause")
+        self.view_model.update()
+        self.update_tray_tooltip()
     
     def save_settings(self):
         """Save the current settings."""
@@ -295,88 +398,86 @@ class MainWindow(QMainWindow):
         break_duration = self.break_slider.value()
         inactivity_threshold = self.inactivity_slider.value() * 60  # Convert to seconds
         
-        # Update database
-        db = self.app_controller.db
-        db.set_setting('work_duration', work_duration)
-        db.set_setting('break_duration', break_duration)
-        db.set_setting('inactivity_threshold', inactivity_threshold)
-        db.set_setting('start_with_system', str(self.start_with_system.isChecked()).lower())
-        db.set_setting('minimize_to_tray', str(self.minimize_to_tray.isChecked()).lower())
-        
-        # Update timer
-        self.app_controller.timer.work_duration = work_duration
-        self.app_controller.timer.break_duration = break_duration
-        self.app_controller.timer.inactivity_threshold = inactivity_threshold
+        # One write for all of them; the store pushes the change to the timer
+        self.app_controller.settings.update(
+            work_duration=work_duration,
+            break_duration=break_duration,
+            inactivity_threshold=inactivity_threshold,
+            start_with_system=self.start_with_system.isChecked(),
+            minimize_to_tray=self.minimize_to_tray.isChecked()
+        )
+    
+    def switch_profile(self):
+        """Switch to the profile named in the profile selector."""
+        name = self.profile_selector.currentText().strip()
+        try:
+            self.app_controller.profiles.validate_name(name)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Profile", str(e))
+            return
+        self.app_controller.switch_profile(name)
+    
+    def on_profile_switched(self, profile, previous):
+        """Point the window at the new profile's database and settings."""
+        self.async_db.cancel('dashboard')
+        self.async_db.cancel('analytics')
+        self.async_db.db = profile.db
+        self.analytics_view.db = profile.db
+        
+        if previous is not None:
+            previous.settings.unsubscribe(self._settings_listener)
+        profile.settings.subscribe(self._settings_listener)
+        self.apply_settings(profile.settings.settings)
+        
+        names = self.app_controller.profiles.list_profiles()
+        if profile.name not in names:
+            names.append(profile.name)
+        self.profile_selector.clear()
+        self.profile_selector.addItems(names)
+        self.profile_selector.setCurrentText(profile.name)
+        self.setWindowTitle(f"OptiPause20 - {profile.name}")
+        self.analytics_view.refresh_analytics()
+    
+    def apply_settings(self, settings):
+        """Show a settings snapshot in the settings tab."""
+        self.work_slider.setValue(settings.work_duration // 60)
+        self.break_slider.setValue(settings.break_duration)
+        self.inactivity_slider.setValue(settings.inactivity_threshold // 60)
+        self.start_with_system.setChecked(settings.start_with_system)
+        self.minimize_to_tray.setChecked(settings.minimize_to_tray)
     
     def update_ui(self):
         """Update UI elements with current state."""
-        timer = self.app_controller.timer
-        
-        # Update time display
-        if timer.is_running:
-            if timer.is_in_break:
-                remaining = timer.get_remaining_break_time()
-                self.status_label.setText("Break")
-                self.status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: green;")
-            else:
-                remaining = timer.get_remaining_work_time()
-                if timer.is_paused:
-                    self.status_label.setText("Paused")
-                    self.status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: orange;")
-                else:
-                    self.status_label.setText("Working")
-                    self.status_label.setStyleSheet("font-size: 16px; font-weight: bold;")
-            
-            # Format time as MM:SS
-            minutes = remaining // 60
-            seconds = remaining % 60
-            self.time_label.setText(f"{minutes:02d}:{seconds:02d}")
-        else:
-            self.status_label.setText("Stopped")
-            self.status_label.setStyleSheet("font-size: 16px; font-weight: bold; color: red;")
-            self.time_label.setText("--:--")
-        
-        # Update statistics from database
-        try:
-            import datetime
-            today = datetime.date.today().isoformat()
-            
-            # Get today's stats
-            db = self.app_controller.db
-            cursor = db.conn.cursor()
-            cursor.execute('SELECT * FROM daily_stats WHERE date = ?', (today,))
-            stats = cursor.fetchone()
-            
-            if stats:
-                # Update screen time (convert seconds to hours)
-                screen_time_hours = stats['total_work_seconds'] / 3600.0
-                self.screen_time_label.setText(f"{screen_time_hours:.1f} hours")
-                
-                # Update breaks taken
-                self.breaks_taken_label.setText(f"{stats['completed_breaks']}")
-                
-                # Update streak (days with completed breaks)
-                streak_data = db.get_streak_data(days=30)
-                current_streak = 0
-                
-                for row in streak_data:
-                    if row['completed_breaks'] > 0:
-                        current_streak += 1
-                    else:
-                        break
-                        
-                self.streak_label.setText(f"{current_streak} days")
-            else:
-                # No stats for today yet
-                self.screen_time_label.setText("0 hours")
-                self.breaks_taken_label.setText("0")
-                self.streak_label.setText("0 days")
-        except Exception as e:
-            print(f"Error updating statistics: {e}")
+        # Only widgets whose text or state changed are touched
+        self.view_model.update()
+        
+        # Statistics arrive through today_stats_signal; only a new day
+        # needs a reload, off the GUI thread
+        today_stats = self.app_controller.today_stats
+        if today_stats.is_stale():
+            self.async_db.submit(
+                today_stats.reload,
+                key='dashboard',
+                on_error=lambda e: print(f"Error updating statistics: {e}")
+            )
+    
+    def _show_dashboard_stats(self, snapshot):
+        """Show a TodayStats snapshot on the dashboard."""
+        self.view_model.set_today_stats(snapshot)
+        if hasattr(self, 'tray_refresh_timer'):
+            self.update_tray_tooltip()
+    
+    def _set_status_style(self, state):
+        """Switch the status label to the style for ``state``."""
+        self.status_label.setProperty("state", state)
+        style = self.status_label.style()
+        style.unpolish(self.status_label)
+        style.polish(self.status_label)
     
     def show_break_notification(self):
         """Show the break notification window."""
         print("Attempting to show break notification")
+        self.update_tray_tooltip()
         try:
             # Clean up any existing notification
             self.hide_break_notification()
@@ -387,6 +488,7 @@ class MainWindow(QMainWindow):
             # Connect signals
             self.notification.closed.connect(self.on_notification_closed)
             self.notification.break_ended.connect(self.app_controller.on_break_end)
+            self.notification.break_skipped.connect(self.app_controller.on_break_skip)
             
             # Get break duration
             break_duration = self.app_controller.timer.break_duration
@@ -429,6 +531,55 @@ class MainWindow(QMainWindow):
         self.notification = None
         print("Notification reference set to None")
 
+    def showEvent(self, event):
+        """Bring the window up to date at once and refresh it while shown."""
+        super().showEvent(event)
+        self.update_ui()
+        self.update_timer.start()
+    
+    def hideEvent(self, event):
+        """Stop refreshing a window nobody sees."""
+        super().hideEvent(event)
+        self.update_timer.stop()
+    
+    def changeEvent(self, event):
+        """Treat a minimized window like a hidden one."""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            if self.isMinimized():
+                self.update_timer.stop()
+            elif self.isVisible() and not self.update_timer.isActive():
+                self.update_ui()
+                self.update_timer.start()
+    
+    def update_tray_tooltip(self):
+        """Show the timer state in the tray tooltip at minute granularity.
+        
+        The next update is scheduled for when the text would change, at
+        most tray_refresh_interval away, so a tray-resident app wakes up
+        about once a minute.
+        """
+        state = self.app_controller.timer.snapshot()
+        next_update = self.tray_refresh_interval
+        if not state.is_running:
+            status = "Stopped"
+        elif state.is_in_break:
+            status = "On a break"
+            next_update = min(next_update, (self.app_controller.timer.get_remaining_break_time() + 1) * 1000)
+        elif state.is_paused:
+            status = "Paused"
+        else:
+            remaining = self.app_controller.timer.get_remaining_work_time()
+            status = f"Next break in {max(1, -(-remaining // 60))} min"
+            # Until the minute count drops
+            next_update = min(next_update, ((remaining - 1) % 60 + 1) * 1000)
+        
+        streak = self.app_controller.today_stats.snapshot.current_streak
+        tooltip = f"Eye Care - 20-20-20 Rule\n{status}\nStreak: {streak} days"
+        if tooltip != self.tray_icon.toolTip():
+            self.tray_icon.setToolTip(tooltip)
+        self.tray_refresh_timer.start(max(1000, next_update))
+    
     def closeEvent(self, event):
         """Handle window close event."""
         print("Main window close event triggered")
@@ -443,6 +594,7 @@ class MainWindow(QMainWindow):
             else:
                 print("Closing application")
                 self.tray_icon.hide()
+                self.async_db.shutdown()
                 event.accept()
         except Exception as e:
             print(f"Error in closeEvent: {e}")
\ No newline at end of file
@@ -7,6 +7,7 @@ class NotificationWindow(QWidget):
     
     closed = pyqtSignal()
     break_ended = pyqtSignal()
+    break_skipped = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(None, Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.FramelessWindowHint)
@@ -50,7 +51,7 @@ class NotificationWindow(QWidget):
         
         self.skip_button = QPushButton("Skip")
         self.skip_button.setStyleSheet("background-color: #e74c3c; color: white; padding: 8px;")
-        self.skip_button.clicked.connect(self.on_break_end)
+        self.skip_button.clicked.connect(self.on_break_skip)
         
         self.done_button = QPushButton("Done")
         self.done_button.setStyleSheet("background-color: #2ecc71; color: white; padding: 8px;")
@@ -111,6 +112,15 @@ class NotificationWindow(QWidget):
     def on_break_end(self):
         """Handle break end (manual or countdown finish)."""
         print("Break ended, closing notification")
+        self._finish(self.break_ended)
+        
+    def on_break_skip(self):
+        """Handle the user skipping the break."""
+        print("Break skipped, closing notification")
+        self._finish(self.break_skipped)
+        
+    def _finish(self, signal):
+        """Stop the countdown, emit ``signal`` and close the window."""
         # Stop timers
         if self.countdown_timer.isActive():
             self.countdown_timer.stop()
@@ -119,9 +129,9 @@ class NotificationWindow(QWidget):
             
         # Emit signal before closing
         try:
-            self.break_ended.emit()
+            signal.emit()
         except RuntimeError as e:
-            print(f"Error emitting break_ended signal: {e}")
+            print(f"Error emitting break signal: {e}")
         
         # Close window using singleShot to avoid recursion
         QTimer.singleShot(0, self.close)
@@ -0,0 +1,97 @@
+class DashboardViewModel:
+    """
+    Display state of the dashboard, derived from the timer and today's stats.
+
+    Widgets bind a setter to each field they show. ``update()`` recomputes
+    all fields and calls only the setters of fields whose value differs
+    from what was last rendered, so a tick that changes nothing but the
+    countdown touches only the countdown label.
+
+    ``status`` is a style key (working, paused, break, stopped) meant for
+    a dynamic property matched by a stylesheet set up once, instead of a
+    stylesheet string per change.
+
+    Has no Qt dependency, so it can be exercised without a display.
+    """
+    FIELDS = (
+        'status',
+        'status_text',
+        'time_text',
+        'pause_text',
+        'screen_time_text',
+        'breaks_text',
+        'streak_text'
+    )
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.today_stats = None  # latest TodayStats snapshot
+        self.setter_calls = 0  # widget updates made, for diagnostics
+        self._rendered = {}
+        self._bindings = {}
+
+    def bind(self, field, setter):
+        """Call ``setter(value)`` whenever ``field`` changes."""
+        if field not in self.FIELDS:
+            raise ValueError(f"Unknown dashboard field: {field}")
+        self._bindings.setdefault(field, []).append(setter)
+        self._rendered.pop(field, None)
+
+    def set_today_stats(self, snapshot):
+        """Take a new TodayStats snapshot and render what changed."""
+        self.today_stats = snapshot
+        return self.update()
+
+    def invalidate(self):
+        """Forget what was rendered so the next update sets every field."""
+        self._rendered.clear()
+
+    def compute(self):
+        """Derive every display field from the current state."""
+        state = self.timer.snapshot()
+        if not state.is_running:
+            values = {
+                'status': 'stopped',
+                'status_text': "Stopped",
+                'time_text': "--:--",
+                'pause_text': "Start"
+            }
+        else:
+            if state.is_in_break:
+                remaining = self.timer.get_remaining_break_time()
+                status, status_text = 'break', "Break"
+            else:
+                remaining = self.timer.get_remaining_work_time()
+                if state.is_paused:
+                    status, status_text = 'paused', "Paused"
+                else:
+                    status, status_text = 'working', "Working"
+            values = {
+                'status': status,
+                'status_text': status_text,
+                'time_text': f"{remaining // 60:02d}:{remaining % 60:02d}",
+                'pause_text': "Resume" if state.is_paused else "Pause"
+            }
+
+        if self.today_stats is not None:
+            stats = self.today_stats.stats
+            values['screen_time_text'] = f"{stats.total_work_hours:.1f} hours"
+            values['breaks_text'] = f"{stats.completed_breaks}"
+            values['streak_text'] = f"{self.today_stats.current_streak} days"
+        return values
+
+    def update(self):
+        """Render the fields that changed; return their names."""
+        changed = []
+        for field, value in self.compute().items():
+            if field in self._rendered and self._rendered[field] == value:
+                continue
+            self._rendered[field] = value
+            changed.append(field)
+            for setter in self._bindings.get(field, ()):
+                try:
+                    setter(value)
+                    self.setter_calls += 1
+                except Exception as e:
+                    print(f"Error updating dashboard field {field}: {e}")
+        return changed
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The application modules are imported the way main.py imports them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from data.database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A scratch database, closed after the test."""
+    database = Database(tmp_path / 'eye_care.db')
+    yield database
+    database.close()
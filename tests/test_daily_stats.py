@@ -0,0 +1,74 @@
+from data.migrations import rebuild_daily_stats
+
+
+def _daily(db):
+    db.flush()
+    rows = db.conn.execute(
+        'SELECT date, total_work_seconds, longest_session_seconds FROM daily_stats ORDER BY date'
+    ).fetchall()
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def _hourly_totals(db):
+    rows = db.conn.execute('SELECT date, SUM(work_seconds) FROM hourly_rollup GROUP BY date').fetchall()
+    return dict(rows)
+
+
+def test_multi_day_session_is_credited_to_each_day(db):
+    # A session left running from Monday evening to Wednesday morning,
+    # checkpointed every 30 minutes of uninterrupted work
+    session_id = db.start_session('2024-03-04T22:00:00')
+    duration = 0
+    for step in range(1, 70):
+        duration = step * 1800
+        hour, half = divmod(22 * 60 + step * 30, 60)
+        day, hour = divmod(hour, 24)
+        db.checkpoint_session(session_id, duration, 0, f'2024-03-{4 + day:02d}T{hour:02d}:{half:02d}:00')
+    db.end_session(session_id, '2024-03-06T09:00:00', duration + 1800, 0)
+
+    daily = _daily(db)
+    assert daily == {
+        '2024-03-04': (2 * 3600, 2 * 3600),
+        '2024-03-05': (24 * 3600, 24 * 3600),
+        '2024-03-06': (9 * 3600, 9 * 3600),
+    }
+    assert _hourly_totals(db) == {date: work for date, (work, _) in daily.items()}
+
+
+def test_checkpoint_after_midnight_is_split(db):
+    session_id = db.start_session('2024-03-04T23:00:00')
+    db.checkpoint_session(session_id, 1800, 0, '2024-03-04T23:30:00')
+    # One long checkpoint interval across midnight
+    db.end_session(session_id, '2024-03-05T00:45:00', 1800 + 4500, 0)
+
+    assert _daily(db) == {
+        '2024-03-04': (3600, 3600),
+        '2024-03-05': (2700, 2700),
+    }
+
+
+def test_longest_session_is_per_day(db):
+    long_id = db.start_session('2024-03-04T20:00:00')
+    db.end_session(long_id, '2024-03-05T01:00:00', 5 * 3600, 0)
+    short_id = db.start_session('2024-03-05T08:00:00')
+    db.end_session(short_id, '2024-03-05T10:00:00', 2 * 3600, 0)
+
+    assert _daily(db) == {
+        '2024-03-04': (4 * 3600, 4 * 3600),
+        '2024-03-05': (3 * 3600, 2 * 3600),
+    }
+
+
+def test_rebuild_matches_triggers(db):
+    session_id = db.start_session('2024-03-04T22:00:00')
+    db.end_session(session_id, '2024-03-06T09:00:00', 35 * 3600, 0)
+    other_id = db.start_session('2024-03-06T10:00:00')
+    db.end_session(other_id, '2024-03-06T11:00:00', 3600, 0)
+    maintained = _daily(db)
+
+    db.run_write(lambda cursor: cursor.execute('DELETE FROM daily_stats'))
+    # Chunked like the backfill, with the long session across both chunks
+    db.run_write(lambda cursor: rebuild_daily_stats(cursor, '2024-03-04', '2024-03-05'))
+    db.run_write(lambda cursor: rebuild_daily_stats(cursor, '2024-03-05', '2024-03-07'))
+
+    assert _daily(db) == maintained
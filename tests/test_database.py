@@ -0,0 +1,27 @@
+import threading
+
+
+def test_read_connections_of_ended_threads_are_closed(db):
+    # The background migrator reads through a connection of its own
+    if db.migrator.migrator_thread is not None:
+        db.migrator.migrator_thread.join(timeout=10)
+    db.get_all_settings()
+    open_before = len(db._connections)
+    connections = []
+
+    def read():
+        db.get_all_settings()
+        connections.append(db.conn)
+
+    for _ in range(20):
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+
+    assert len(db._connections) == open_before
+    for conn in connections:
+        try:
+            conn.execute('SELECT 1')
+        except Exception:
+            continue
+        raise AssertionError("connection of an ended thread is still open")
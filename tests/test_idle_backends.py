@@ -0,0 +1,280 @@
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+from core import idle_backends
+from core.clock import VirtualClock
+from core.idle_backends import IdleBackend, select_linux_backend
+from core.system_monitor import SystemMonitor
+
+
+class FakeBackend(IdleBackend):
+    """Backend with a scripted idle state; a signal wait blocks until interrupted."""
+    def __init__(self, name, supports_signals=False):
+        self.name = name
+        self.supports_signals = supports_signals
+        self.idle = False
+        self.closed = False
+        self._interrupted = threading.Event()
+
+    def is_idle(self):
+        return self.idle
+
+    def wait_for_change(self, timeout):
+        self._interrupted.wait(timeout)
+        return False
+
+    def interrupt(self):
+        self._interrupted.set()
+
+    def close(self):
+        self.closed = True
+
+
+def _factory(name, available=True):
+    """Candidate factory creating a FakeBackend, or failing like a missing backend."""
+    def create():
+        if not available:
+            raise RuntimeError(f"{name} unavailable")
+        return FakeBackend(name)
+    return create
+
+
+def _unavailable(*args, **kwargs):
+    raise RuntimeError("unavailable")
+
+
+@pytest.mark.parametrize("available, expected", [
+    ((True, True, True), "logind"),
+    ((False, True, True), "xscreensaver"),
+    ((False, False, True), "activity"),
+    ((False, False, False), None),
+])
+def test_selection_order(available, expected):
+    candidates = [
+        _factory(name, ok)
+        for name, ok in zip(("logind", "xscreensaver", "activity"), available)
+    ]
+    backend = select_linux_backend(candidates=candidates)
+    assert (backend.name if backend else None) == expected
+
+
+def test_idle_threshold_reaches_backend(monkeypatch):
+    monkeypatch.setattr(idle_backends, "LogindBackend", _unavailable)
+    monkeypatch.setattr(idle_backends, "XScreenSaverBackend", _unavailable)
+    clock = VirtualClock()
+    backend = select_linux_backend(activity_source=lambda: 0.0, clock=clock, idle_threshold=120)
+    assert backend.name == "activity"
+
+    clock.advance(119)
+    assert not backend.is_idle()
+    clock.advance(1)
+    assert backend.is_idle()
+
+    monitor = SystemMonitor(clock=clock, backend=backend, idle_threshold=120)
+    monitor.set_idle_threshold(600)
+    assert not backend.is_idle()
+
+
+def test_polling_backs_off_and_resets_on_transition():
+    clock = VirtualClock()
+    state = {"idle": False}
+    probe_times = []
+
+    def probe():
+        probe_times.append(clock.now())
+        return state["idle"]
+
+    monitor = SystemMonitor(clock=clock, idle_probe=probe)
+    monitor.start()
+    clock.advance(200)
+    state["idle"] = True
+    first_after_change = len(probe_times)
+    clock.advance(100)
+    monitor.stop()
+
+    multiplier = monitor.battery_multiplier if monitor.on_battery else 1
+    expected, interval = [], monitor.min_check_interval
+    for _ in range(8):
+        interval = min(interval * monitor.backoff_factor, monitor.max_check_interval)
+        expected.append(interval * multiplier)
+    gaps = [later - earlier for earlier, later in zip(probe_times, probe_times[1:])]
+    assert gaps[:8] == expected
+
+    # The probe that sees the change schedules the next one at the minimum
+    reset_gap = probe_times[first_after_change + 1] - probe_times[first_after_change]
+    assert reset_gap == monitor.min_check_interval * multiplier
+
+
+def test_stop_interrupts_signal_wait():
+    backend = FakeBackend("signals", supports_signals=True)
+    monitor = SystemMonitor(backend=backend)
+    monitor.signal_wait_timeout = 60
+    monitor.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    monitor.stop()
+    assert not monitor.monitor_thread.is_alive()
+    assert time.monotonic() - started < 1.0
+    assert backend.closed
+
+
+class FakeLogind:
+    """Stand-in for logind's session interface on a private bus."""
+    SESSION_PATH = "/org/freedesktop/login1/session/_31"
+
+    def __init__(self, address):
+        from jeepney.bus_messages import message_bus
+        from jeepney.io.blocking import open_dbus_connection
+
+        self.conn = open_dbus_connection(bus=address)
+        self.conn.send_and_get_reply(message_bus.RequestName("org.freedesktop.login1"))
+        self.hints = {"LockedHint": False, "IdleHint": False}
+        self._lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def set_hint(self, name, value):
+        """Change a hint and emit PropertiesChanged like logind does."""
+        from jeepney import DBusAddress, new_signal
+
+        self.hints[name] = value
+        emitter = DBusAddress(self.SESSION_PATH, interface="org.freedesktop.DBus.Properties")
+        with self._lock:
+            self.conn.send(new_signal(
+                emitter, "PropertiesChanged", "sa{sv}as",
+                ("org.freedesktop.login1.Session", {name: ("b", value)}, [])
+            ))
+
+    def _reply(self, msg):
+        from jeepney import HeaderFields, new_error, new_method_return
+
+        path = msg.header.fields.get(HeaderFields.path)
+        member = msg.header.fields.get(HeaderFields.member)
+        if member == "GetSession":
+            return new_method_return(msg, "o", (self.SESSION_PATH,))
+        if member == "Get" and path.endswith("/session/auto"):
+            return new_method_return(msg, "v", (("s", "1"),))
+        if member == "Get" and path == self.SESSION_PATH and msg.body[1] in self.hints:
+            return new_method_return(msg, "v", (("b", self.hints[msg.body[1]]),))
+        return new_error(msg, "org.freedesktop.DBus.Error.UnknownMethod")
+
+    def _serve(self):
+        from jeepney import MessageType
+
+        while self._running:
+            try:
+                msg = self.conn.receive(timeout=0.05)
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            if msg.header.message_type == MessageType.method_call:
+                with self._lock:
+                    self.conn.send(self._reply(msg))
+
+    def close(self):
+        self._running = False
+        self._thread.join()
+        self.conn.close()
+
+
+@pytest.fixture
+def fake_logind(tmp_path):
+    """A private dbus-daemon with a FakeLogind on it; yields (address, service)."""
+    pytest.importorskip("jeepney")
+    if idle_backends.open_dbus_connection is None:
+        pytest.skip("jeepney was not importable by the idle backends")
+    dbus_daemon = shutil.which("dbus-daemon")
+    if dbus_daemon is None:
+        pytest.skip("dbus-daemon is not installed")
+
+    daemon = subprocess.Popen(
+        [dbus_daemon, "--session", "--nofork", "--print-address=1",
+         f"--address=unix:path={tmp_path / 'bus'}"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        address = daemon.stdout.readline().strip()
+        service = FakeLogind(address)
+        yield address, service
+        service.close()
+    finally:
+        daemon.terminate()
+        daemon.wait()
+
+
+def test_logind_backend_follows_signals(fake_logind):
+    address, service = fake_logind
+    backend = idle_backends.LogindBackend(bus=address)
+    try:
+        assert backend.session_path == FakeLogind.SESSION_PATH
+        assert not backend.is_idle()
+
+        threading.Timer(0.1, service.set_hint, ("LockedHint", True)).start()
+        started = time.monotonic()
+        assert backend.wait_for_change(10)
+        assert time.monotonic() - started < 5
+        assert backend.is_idle()
+
+        # Nothing changes: the wait times out
+        assert not backend.wait_for_change(0.2)
+    finally:
+        backend.close()
+
+
+def test_logind_interrupt_wakes_wait_at_once(fake_logind):
+    address, _ = fake_logind
+    backend = idle_backends.LogindBackend(bus=address)
+    try:
+        result = {}
+
+        def wait():
+            result["changed"] = backend.wait_for_change(60)
+            result["woken"] = time.monotonic()
+
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        time.sleep(0.2)
+        interrupted = time.monotonic()
+        backend.interrupt()
+        waiter.join(timeout=5)
+
+        assert not waiter.is_alive()
+        assert result["changed"] is False
+        assert result["woken"] - interrupted < 0.1
+        # Later waits return at once as well
+        assert backend.wait_for_change(60) is False
+    finally:
+        backend.close()
+
+
+def test_monitor_stops_promptly_with_logind(fake_logind):
+    address, service = fake_logind
+    events = []
+    became_idle = threading.Event()
+
+    def on_idle():
+        events.append("idle")
+        became_idle.set()
+
+    monitor = SystemMonitor(
+        on_system_idle=on_idle,
+        on_system_active=lambda: events.append("active"),
+        backend=idle_backends.LogindBackend(bus=address)
+    )
+    monitor.start()
+    time.sleep(0.2)
+    service.set_hint("IdleHint", True)
+    assert became_idle.wait(5)
+
+    started = time.monotonic()
+    monitor.stop()
+    assert time.monotonic() - started < 0.5
+    assert not monitor.monitor_thread.is_alive()
+    assert events == ["idle"]
@@ -0,0 +1,40 @@
+import pytest
+
+
+def _wait_for_migrations(db):
+    # The start_time indexes are built by a background backfill
+    if db.migrator.migrator_thread is not None:
+        db.migrator.migrator_thread.join(timeout=10)
+    assert not db.migrator.is_pending()
+
+
+def _executed_sql(db, query):
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        query()
+    finally:
+        db.conn.set_trace_callback(None)
+    return [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+
+
+@pytest.mark.parametrize("method, table, index", [
+    ("get_stats_between", "daily_stats", "sqlite_autoindex_daily_stats_1"),
+    ("get_sessions_between", "sessions", "idx_sessions_start_time"),
+    ("get_breaks_between", "breaks", "idx_breaks_start_time"),
+])
+@pytest.mark.parametrize("bounds", [("2024-03-01", "2024-03-31"), (None, None)])
+def test_range_queries_use_indexes(db, method, table, index, bounds):
+    for day in range(1, 29):
+        session_id = db.start_session(f"2024-03-{day:02d}T09:00:00")
+        db.end_session(session_id, f"2024-03-{day:02d}T10:00:00", 3600, 1)
+        db.record_break(session_id, f"2024-03-{day:02d}T09:20:00")
+    db.flush()
+    _wait_for_migrations(db)
+
+    statements = _executed_sql(db, lambda: getattr(db, method)(*bounds))
+    assert statements
+    for sql in statements:
+        plan = " | ".join(row[3] for row in db.conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+        assert f"SCAN {table}" not in plan, plan
+        assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
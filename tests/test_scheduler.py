@@ -0,0 +1,83 @@
+from core.clock import VirtualClock
+from core.scheduler import ReminderScheduler
+from core.timer import EyeCareTimer
+
+
+def _attached(clock, **kwargs):
+    activity = {"time": clock.now()}
+    scheduler = ReminderScheduler(clock=clock, inactivity_threshold=300, activity_source=lambda: activity["time"])
+    timer = EyeCareTimer(work_duration=1200, break_duration=20, clock=clock, scheduler=scheduler, **kwargs)
+    return scheduler, timer, activity
+
+
+def test_inactivity_pauses_attached_timer():
+    clock = VirtualClock()
+    scheduler, timer, activity = _attached(clock)
+    scheduler.start()
+    timer.start()
+
+    clock.advance(300)
+    assert scheduler.is_paused and timer.is_paused
+    assert timer.get_remaining_work_time() == 900
+
+    clock.advance(100)
+    activity["time"] = clock.now()
+    scheduler.update_activity()
+    assert not scheduler.is_paused and not timer.is_paused
+    assert timer.get_remaining_work_time() == 900
+
+
+def test_timer_pause_goes_through_scheduler():
+    clock = VirtualClock()
+    scheduler, timer, _ = _attached(clock)
+    scheduler.start()
+    timer.start()
+
+    timer.manually_pause()
+    assert scheduler.is_paused and scheduler.is_manually_paused
+    assert timer.is_paused and timer.is_manually_paused
+
+    # Neither input nor the system coming back ends a manual pause
+    timer.update_activity()
+    timer.resume_from_idle()
+    assert scheduler.is_paused and timer.is_paused
+
+    timer.resume()
+    assert not scheduler.is_paused and not timer.is_paused
+
+
+def test_attach_while_paused_pauses_timer():
+    clock = VirtualClock()
+    scheduler, timer, _ = _attached(clock)
+    scheduler.start()
+    scheduler.manually_pause()
+
+    timer.start()
+    assert timer.is_paused and timer.is_manually_paused
+
+    clock.advance(5000)
+    assert timer.breaks_taken == 0
+
+
+def test_scheduler_drives_attached_timer_with_virtual_clock():
+    clock = VirtualClock()
+    events = []
+    scheduler, timer, activity = _attached(
+        clock,
+        on_break_start=lambda: events.append(("start", clock.now())),
+        on_break_end=lambda: events.append(("end", clock.now()))
+    )
+    scheduler.start()
+    timer.start()
+    for _ in range(25):
+        activity["time"] = clock.now()
+        clock.advance(100)
+
+    assert events == [("start", 1200), ("end", 1220), ("start", 2420), ("end", 2440)]
+
+    # A stopped timer is no longer driven
+    timer.stop()
+    for _ in range(25):
+        activity["time"] = clock.now()
+        clock.advance(100)
+    assert len(events) == 4
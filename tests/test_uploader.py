@@ -0,0 +1,22 @@
+import datetime
+
+from fleet.uploader import FleetUploader
+
+
+def test_recent_daily_stats_are_sent_again(db):
+    today = datetime.date.today()
+    for days_ago in (10, 3, 0):
+        db.update_daily_stats((today - datetime.timedelta(days=days_ago)).isoformat(), 60, 1, 1, 60)
+    # Everything up to today went out already
+    db.run_write(lambda cursor: cursor.execute(
+        "INSERT INTO upload_state (stream, watermark) VALUES ('daily_stats', ?)", (today.isoformat(),)
+    ))
+
+    uploader = FleetUploader(db, 'http://collector.invalid/upload', client_id='test')
+    payload, watermarks = uploader.collect()
+
+    assert [row['date'] for row in payload['daily_stats']] == [
+        (today - datetime.timedelta(days=3)).isoformat(),
+        today.isoformat(),
+    ]
+    assert watermarks['daily_stats'] == today.isoformat()